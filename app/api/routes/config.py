@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from app.config_store import default_output_dir, load_config, save_config
+from app.encoder_profiles import default_profile
 from app.schemas import ConfigResponse, ConfigUpdateRequest, OkResponse
 
 
@@ -20,6 +21,8 @@ def get_config():
         cfg["subtitle_position"] = "middle"
     if "subtitle_language" not in cfg:
         cfg["subtitle_language"] = "id"
+    if "encoder_profile" not in cfg:
+        cfg["encoder_profile"] = default_profile()
     if "deps_verbose" not in cfg:
         cfg["deps_verbose"] = False
     if "use_gemini_suggestions" not in cfg:
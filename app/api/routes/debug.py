@@ -1,5 +1,13 @@
 import os
 from fastapi import APIRouter
+from app.broker import stats as broker_stats
+from app.format_cache import stats as format_cache_stats
+from app.job_events import subscriber_count
+from app.job_pool import stats as job_pool_stats
+from app.job_store import stats as job_store_stats
+from app.media_cache import stats as media_cache_stats
+from app.scheduler import stats as scheduler_stats
+from app.services.metadata_service import stats as metadata_cache_stats
 from app.yt_utils import get_cookies_path
 
 router = APIRouter(prefix="/debug", tags=["Debug"])
@@ -21,3 +29,28 @@ def list_files():
         "env_home": os.environ.get("HOME"),
         "cwd": os.getcwd()
     }
+
+
+@router.get("/format_cache")
+def format_cache():
+    return {"ok": True, **format_cache_stats()}
+
+
+@router.get("/media_cache")
+def media_cache():
+    return {"ok": True, **media_cache_stats()}
+
+
+@router.get("/scheduler")
+def scheduler():
+    return {"ok": True, **scheduler_stats(), "event_streams": subscriber_count(), "executor": job_pool_stats(), "broker": broker_stats()}
+
+
+@router.get("/jobs")
+def jobs():
+    return {"ok": True, **job_store_stats()}
+
+
+@router.get("/metadata_cache")
+def metadata_cache():
+    return {"ok": True, **metadata_cache_stats()}
@@ -1,27 +1,79 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
 
-from app.jobs import get_job
-from app.schemas import JobStatusResponse, OpenOutputResponse, StartJobRequest, StartJobResponse
-from app.services.clip_service import inspect_output_dir, open_output_folder, start_clip_job
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app import job_events
+from app.jobs import get_job, job_log_cursor, read_job_logs
+from app.scheduler import QueueFull
+from app.schemas import (
+    BatchJobRequest,
+    BatchJobResponse,
+    CancelJobResponse,
+    JobStatusResponse,
+    OpenOutputResponse,
+    StartJobRequest,
+    StartJobResponse,
+)
+from app.services.batch_service import start_batch_job
+from app.services.clip_service import cancel_job, inspect_output_dir, open_output_folder, start_clip_job
 
 
 router = APIRouter()
 
+# baris log maksimal per response status (sisanya diambil di poll berikutnya lewat cursor)
+STATUS_LOG_LINES = 2500
+
 
 @router.post("/start", response_model=StartJobResponse)
 def start(data: StartJobRequest):
     try:
         return start_clip_job(data.model_dump(exclude_none=True))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/batch", response_model=BatchJobResponse)
+def batch(data: BatchJobRequest):
+    """
+    Banyak URL + segmen dalam satu submit: items, atau isi file CSV / JSONL di field file. Jadi satu job
+    parent (progress gabungan di /api/status/{job_id}) dengan satu job anak per video.
+    """
+    try:
+        return start_batch_job(data.model_dump(exclude_none=True))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
-def status(job_id: str):
-    job = get_job(job_id)
+def status(job_id: str, request: Request, response: Response, since: int | None = None):
+    """
+    Status job. Tanpa since: log dikirim sebagai tail (cara lama). Dengan since (log_cursor dari response
+    sebelumnya): cuma baris log baru yang dikirim, plus ETag; kalau tidak ada yang berubah balasannya 304.
+    """
+    job = get_job(job_id, with_logs=since is None)
     if not job:
         return {"ok": False}
-    logs = "".join(job.get("logs", [])[-2500:])
+    log_cursor = None
+    logs_truncated = None
+    if since is None:
+        logs = "".join(job.get("logs", [])[-STATUS_LOG_LINES:])
+    else:
+        etag = f'W/"{job_id}-{float(job.get("updated_at") or 0):.6f}-{job_log_cursor(job_id)}-{max(0, since)}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        page = read_job_logs(job_id, since=since, limit=STATUS_LOG_LINES)
+        logs = "".join(page["lines"])
+        if job.get("archived") and not since:
+            logs = "".join(job.get("log_tail") or [])
+        log_cursor = page["cursor"]
+        logs_truncated = page["truncated"]
 
     done = bool(job.get("done", False))
     output_dir = job.get("output_dir")
@@ -46,10 +98,38 @@ def status(job_id: str):
         "output_dir_ok": out_ok,
         "output_dir_error": out_err,
         "success_count": int(job.get("success_count", 0)),
+        "clips": list(job.get("clips") or []),
+        "queue_position": job.get("queue_position") or None,
+        "outputs": list(job.get("outputs") or []),
+        "archived": bool(job.get("archived")),
+        "parent_id": job.get("parent_id"),
+        "children": job.get("children"),
         "logs": logs,
+        "log_cursor": log_cursor,
+        "logs_truncated": logs_truncated,
     }
 
 
+@router.get("/jobs/{job_id}/events")
+async def events(job_id: str, request: Request, last_event_id: str | None = None):
+    """Stream SSE progress job (status, log, clip selesai). Reconnect lanjut dari header Last-Event-ID."""
+    if not await asyncio.to_thread(get_job, job_id, False):
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan.")
+    return StreamingResponse(
+        job_events.stream(job_id, get_job, read_job_logs, last_event_id=request.headers.get("last-event-id") or last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/cancel/{job_id}", response_model=CancelJobResponse)
+def cancel(job_id: str):
+    try:
+        return cancel_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.post("/open_output/{job_id}", response_model=OpenOutputResponse)
 def open_output(job_id: str):
     try:
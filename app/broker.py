@@ -0,0 +1,291 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app import job_events, job_store
+from app.scheduler import QueueFull, max_queued_jobs
+
+
+# alasan cancel token waktu lease job diambil alih worker lain: job jangan ditandai batal/selesai dari sini
+LEASE_LOST = "lease_lost"
+
+_LOCAL = threading.local()
+_INIT_LOCK = threading.Lock()
+_INITIALIZED = set()
+
+
+def _env_int(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return int(default)
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return int(default)
+
+
+def _env_float(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return float(default)
+    try:
+        return float(str(v).strip())
+    except Exception:
+        return float(default)
+
+
+def enabled():
+    """Job tidak dijalankan di server web tapi diantrikan ke broker buat worker node (YTCLIPPER_JOB_EXECUTOR=broker)."""
+    return str(os.environ.get("YTCLIPPER_JOB_EXECUTOR") or "thread").strip().lower() == "broker"
+
+
+def lease_s():
+    return max(5.0, _env_float("YTCLIPPER_BROKER_LEASE_S", 60))
+
+
+def max_attempts():
+    return max(1, _env_int("YTCLIPPER_BROKER_MAX_ATTEMPTS", 3))
+
+
+def db_path():
+    """
+    Database antrian broker, terpisah dari job store. Dibuka semua mesin (lewat network filesystem),
+    jadi pakai journal DELETE + busy timeout, bukan WAL (WAL butuh shared memory di satu host).
+    """
+    p = os.environ.get("YTCLIPPER_BROKER_DB_PATH")
+    if p:
+        return str(p)
+    return f"{os.path.splitext(job_store.db_path())[0]}_broker.sqlite3"
+
+
+def _conn():
+    path = db_path()
+    conns = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    conn = conns.get(path)
+    if conn is not None:
+        return conn
+    os.makedirs(os.path.dirname(os.path.abspath(path)) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA synchronous=FULL")
+    with _INIT_LOCK:
+        if path not in _INITIALIZED:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS broker_tasks ("
+                " job_id TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " enqueued_at REAL NOT NULL,"
+                " lease_owner TEXT,"
+                " lease_expires REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0)"
+            )
+            _INITIALIZED.add(path)
+    conns[path] = conn
+    return conn
+
+
+class _Tx:
+    """BEGIN IMMEDIATE ... COMMIT di database broker (claim/lease atomik antar mesin)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _queued_ids(conn):
+    return [r[0] for r in conn.execute("SELECT job_id FROM broker_tasks WHERE lease_owner IS NULL ORDER BY enqueued_at, job_id")]
+
+
+def _publish_positions():
+    with _Tx(_conn()) as conn:
+        queued = _queued_ids(conn)
+        running = conn.execute("SELECT COUNT(*) FROM broker_tasks WHERE lease_owner IS NOT NULL").fetchone()[0]
+    for pos, job_id in enumerate(queued, 1):
+        try:
+            job_store.update(
+                job_id,
+                {"stage": "queued", "queue_position": pos, "status": f"⏳ Antri #{pos} di broker ({running} job lagi jalan di worker)"},
+            )
+        except Exception:
+            pass
+        job_events.publish(job_id)
+
+
+def enqueue(job_id, payload):
+    """
+    Masukkan job ke antrian broker (tabel broker_tasks di database broker); worker node mengambilnya lewat claim().
+
+    Returns:
+        int: posisi antrian.
+
+    Raises:
+        QueueFull: sudah ada YTCLIPPER_JOB_QUEUE_SIZE job yang belum diambil worker.
+    """
+    limit = max(1, max_queued_jobs())
+    with _Tx(_conn()) as conn:
+        waiting = conn.execute("SELECT COUNT(*) FROM broker_tasks WHERE lease_owner IS NULL").fetchone()[0]
+        if waiting >= limit:
+            raise QueueFull(f"Antrian broker penuh: {waiting} job belum diambil worker. Coba lagi sebentar lagi, Bos!")
+        conn.execute(
+            "INSERT OR REPLACE INTO broker_tasks (job_id, payload, enqueued_at, lease_owner, lease_expires, attempts)"
+            " VALUES (?, ?, ?, NULL, NULL, 0)",
+            (job_id, json.dumps(payload, ensure_ascii=False), time.time()),
+        )
+    _publish_positions()
+    return queue_position(job_id)
+
+
+def _reap(conn, now):
+    """Lease yang kedaluwarsa (worker mati / putus) dikembalikan ke antrian; yang sudah kehabisan jatah attempt dibuang."""
+    expired = conn.execute(
+        "SELECT job_id, attempts FROM broker_tasks WHERE lease_owner IS NOT NULL AND lease_expires < ?", (now,)
+    ).fetchall()
+    requeued, failed = [], []
+    for job_id, attempts in expired:
+        if int(attempts) >= max_attempts():
+            conn.execute("DELETE FROM broker_tasks WHERE job_id = ?", (job_id,))
+            failed.append((job_id, int(attempts)))
+        else:
+            conn.execute("UPDATE broker_tasks SET lease_owner = NULL, lease_expires = NULL WHERE job_id = ?", (job_id,))
+            requeued.append((job_id, int(attempts)))
+    return requeued, failed
+
+
+def _report_reaped(requeued, failed):
+    for job_id, attempts in requeued:
+        job = job_store.get(job_id, with_logs=False)
+        if not job or job.get("done"):
+            continue
+        job_store.append_log(job_id, f"\n⚠️ Worker hilang (lease habis), job diantrikan ulang (percobaan {attempts}/{max_attempts()}).\n")
+        job_store.update(job_id, {"running": False, "stage": "queued", "status": "⏳ Diantrikan ulang (worker hilang)", "eta": ""})
+        job_events.publish(job_id)
+    for job_id, attempts in failed:
+        job = job_store.get(job_id, with_logs=False)
+        if not job or job.get("done"):
+            continue
+        err = f"Worker hilang {attempts}x berturut-turut, job dihentikan."
+        job_store.append_log(job_id, f"\n💥 {err}\n")
+        job_store.update(
+            job_id,
+            {"running": False, "done": True, "percent": 0.0, "stage": "error", "status": "Error", "eta": "", "error": err},
+        )
+        job_events.publish(job_id)
+
+
+def reap(now=None):
+    """Kembalikan lease kedaluwarsa ke antrian. Returns: jumlah job yang diantrikan ulang / digagalkan."""
+    with _Tx(_conn()) as conn:
+        requeued, failed = _reap(conn, time.time() if now is None else float(now))
+    _report_reaped(requeued, failed)
+    if requeued:
+        _publish_positions()
+    return {"requeued": len(requeued), "failed": len(failed)}
+
+
+def claim(worker_id, lease=None):
+    """
+    Ambil job terlama yang belum di-lease (lease kedaluwarsa di-reap dulu) dan pegang lease-nya selama
+    lease detik; worker wajib renew() sebelum habis.
+
+    Returns:
+        tuple | None: (job_id, payload, attempts) atau None kalau antrian kosong.
+    """
+    lease = lease_s() if lease is None else float(lease)
+    while True:
+        now = time.time()
+        with _Tx(_conn()) as conn:
+            requeued, failed = _reap(conn, now)
+            row = conn.execute(
+                "SELECT job_id, payload, attempts FROM broker_tasks WHERE lease_owner IS NULL ORDER BY enqueued_at, job_id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE broker_tasks SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE job_id = ?",
+                    (str(worker_id), now + lease, row[0]),
+                )
+        _report_reaped(requeued, failed)
+        if row is None:
+            return None
+        job_id, payload, attempts = row[0], json.loads(row[1]), int(row[2]) + 1
+        job = job_store.get(job_id, with_logs=False)
+        if not job or job.get("done"):
+            # job sudah selesai / diputus dari sisi server (mis. ditandai yatim) → buang dari antrian
+            complete(job_id, worker_id)
+            continue
+        _publish_positions()
+        return job_id, payload, attempts
+
+
+def renew(job_id, worker_id, lease=None):
+    """Perpanjang lease. Returns: False kalau lease sudah bukan milik worker ini (diambil alih worker lain)."""
+    lease = lease_s() if lease is None else float(lease)
+    with _Tx(_conn()) as conn:
+        cur = conn.execute(
+            "UPDATE broker_tasks SET lease_expires = ? WHERE job_id = ? AND lease_owner = ?",
+            (time.time() + lease, job_id, str(worker_id)),
+        )
+        return cur.rowcount > 0
+
+
+def complete(job_id, worker_id):
+    """Job selesai (sukses/gagal/batal) → keluarkan dari broker. Returns: False kalau lease sudah bukan milik worker ini."""
+    with _Tx(_conn()) as conn:
+        cur = conn.execute("DELETE FROM broker_tasks WHERE job_id = ? AND lease_owner = ?", (job_id, str(worker_id)))
+        return cur.rowcount > 0
+
+
+def cancel(job_id):
+    """
+    Keluarkan job yang belum diambil worker.
+
+    Returns:
+        bool: True kalau job tadi masih antri; False kalau sudah di-lease worker / tidak dikenal.
+    """
+    with _Tx(_conn()) as conn:
+        cur = conn.execute("DELETE FROM broker_tasks WHERE job_id = ? AND lease_owner IS NULL", (job_id,))
+        removed = cur.rowcount > 0
+    if removed:
+        _publish_positions()
+    return removed
+
+
+def queue_position(job_id):
+    with _Tx(_conn()) as conn:
+        queued = _queued_ids(conn)
+    if job_id not in queued:
+        return 0
+    return queued.index(job_id) + 1
+
+
+def stats():
+    """Antrian & lease broker buat endpoint debug. Di luar mode broker database-nya tidak dibuka (tidak ikut dibuat)."""
+    if not enabled():
+        return {"enabled": False}
+    now = time.time()
+    with _Tx(_conn()) as conn:
+        queued = _queued_ids(conn)
+        leased = conn.execute(
+            "SELECT job_id, lease_owner, lease_expires, attempts FROM broker_tasks WHERE lease_owner IS NOT NULL ORDER BY enqueued_at"
+        ).fetchall()
+    return {
+        "enabled": enabled(),
+        "lease_s": lease_s(),
+        "max_attempts": max_attempts(),
+        "queued": queued,
+        "leased": [
+            {"job_id": jid, "worker": owner, "expires_in": round(float(exp) - now, 1), "attempts": int(attempts)}
+            for jid, owner, exp, attempts in leased
+        ],
+    }
@@ -5,17 +5,114 @@ import uuid
 import json
 import tempfile
 import glob
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 
-from app.config_store import default_output_dir
-from app.core_constants import BOTTOM_HEIGHT, MAX_DURATION, PADDING, TOP_HEIGHT
-from app.ffmpeg_deps import cek_dependensi
-from app.subtitle_ai import generate_subtitle, set_whisper_model
+from app import job_control, media_cache, yt_engine
+from app.config_store import default_output_dir, load_config
+from app.core_constants import MAX_DURATION, PADDING
+from app.encoder_profiles import resolve_profile
+from app.ffmpeg_deps import cek_dependensi_cached
+from app.media_probe import IDENTITY_CROP_MODES, negotiate, start_time, stream_copy_enabled
+from app.format_cache import client_profile, run_candidates
+from app.progress import (
+    YTDLP_PROGRESS_TEMPLATE,
+    parse_ytdlp_progress,
+    run_ffmpeg_progress,
+    run_with_progress,
+)
+from app.render_graph import (
+    CROP_MODES,
+    OUTPUT_HEIGHT,
+    OUTPUT_WIDTH,
+    build_variant_render_graph,
+    normalize_crop_modes,
+    required_source_height,
+)
+from app.source_plan import SourceSpan, make_scratch_dir, plan_source_spans, remove_scratch_dir
+from app.subtitle_ai import generate_subtitle, set_whisper_model, write_srt
+from app.transcript import build_transcript, shared_transcript_enabled
 from app.yt_info import extract_video_id, get_duration
-from app.services.gemini_service import generate_clip_metadata
+from app.yt_stream import (
+    capped_format_candidates,
+    direct_streams_enabled,
+    invalidate_streams,
+    resolve_streams,
+    source_height_cap,
+    stream_input_args,
+)
+from app.services.metadata_service import get_clip_metadata, get_clip_metadata_many
 from app.yt_utils import get_yt_dlp_cookies_args
 
 
+_STAGE_GROUPS = {
+    "download": "download",
+    "clip": "encode",
+    "subtitle": "transcribe",
+}
+_STAGE_DEFAULT_LIMITS = {"download": 3, "encode": 2, "transcribe": 1}
+_STAGE_SEMAPHORES = {}
+_STAGE_SEMAPHORES_LOCK = threading.Lock()
+
+
+def _config_int(env_name, cfg_key, default):
+    raw = os.environ.get(env_name)
+    if raw is None:
+        try:
+            raw = (load_config() or {}).get(cfg_key)
+        except Exception:
+            raw = None
+    if raw is None or str(raw).strip() == "":
+        return int(default)
+    try:
+        return int(str(raw).strip())
+    except Exception:
+        return int(default)
+
+
+def clip_worker_count(requested=None):
+    if requested is not None:
+        try:
+            return max(1, int(requested))
+        except Exception:
+            pass
+    default = max(1, min(4, (os.cpu_count() or 1) // 4))
+    return max(1, _config_int("YTCLIPPER_CLIP_WORKERS", "clip_workers", default))
+
+
+def clip_stage_limit(group):
+    group = str(group)
+    default = _STAGE_DEFAULT_LIMITS.get(group, 1)
+    env_name = f"YTCLIPPER_CLIP_{group.upper()}_CONCURRENCY"
+    return max(1, _config_int(env_name, f"clip_{group}_concurrency", default))
+
+
+def _stage_semaphore(group):
+    with _STAGE_SEMAPHORES_LOCK:
+        sem = _STAGE_SEMAPHORES.get(group)
+        if sem is None:
+            sem = threading.BoundedSemaphore(clip_stage_limit(group))
+            _STAGE_SEMAPHORES[group] = sem
+        return sem
+
+
+@contextmanager
+def _stage_slot(stage):
+    group = _STAGE_GROUPS.get(stage)
+    if not group:
+        yield
+        return
+    sem = _stage_semaphore(group)
+    sem.acquire()
+    try:
+        yield
+    finally:
+        sem.release()
+
+
 def unique_path(folder, stem, ext):
     base = f"{stem}{ext}"
     path = os.path.join(folder, base)
@@ -49,20 +146,318 @@ def _fmt_time(s):
     return f"{m}:{sec:02d}"
 
 
-def proses_satu_clip(
-    video_id,
-    item,
-    index,
-    total_duration,
-    crop_mode="default",
-    use_subtitle=False,
-    subtitle_language=None,
-    subtitle_position="middle",
-    output_dir=None,
-    apply_padding=False,
-    event_cb=None,
-    gemini_api_key=None,
-):
+DOWNLOAD_FORMAT_CANDIDATES = [
+    "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+    "bestvideo+bestaudio/best",
+    "best/b",
+    "bv*+ba/b",
+]
+
+
+def _clip_text(s, limit=4000):
+    s = "" if s is None else str(s)
+    if len(s) <= limit:
+        return s
+    head = s[: int(limit * 0.6)]
+    tail = s[-int(limit * 0.4) :]
+    return head + "\n... (truncated) ...\n" + tail
+
+
+def _run(cmd, label, runner=None):
+    try:
+        if runner is not None:
+            res = runner(cmd)
+        else:
+            res = job_control.run_process(cmd)
+        if res.stderr:
+            err = res.stderr.strip()
+            if err:
+                print(f"[{label}]\n" + _clip_text(err))
+        return res
+    except subprocess.CalledProcessError as e:
+        cmd_text = " ".join(str(x) for x in cmd)
+        print(f"[{label}] Command gagal\n{cmd_text}")
+        out = (e.stdout or "").strip()
+        err = (e.stderr or "").strip()
+        if out:
+            print(f"[{label}] stdout\n" + _clip_text(out))
+        if err:
+            print(f"[{label}] stderr\n" + _clip_text(err))
+        raise
+
+
+def source_crop_mode(crop_modes):
+    """Crop mode yang butuh resolusi sumber paling tinggi (dipakai buat pilih format download)."""
+    if isinstance(crop_modes, str):
+        return crop_modes
+    return max(crop_modes, key=required_source_height)
+
+
+def download_format_candidates(crop_mode):
+    return capped_format_candidates(required_source_height(crop_mode), DOWNLOAD_FORMAT_CANDIDATES)
+
+
+def _run_ffmpeg(cmd, label, duration_s, on_progress=None):
+    """_run tapi ffmpeg-nya lapor progress (media time yang sudah diproses) ke on_progress."""
+    if not on_progress:
+        return _run(cmd, label)
+    return _run(cmd, label, runner=lambda c: run_ffmpeg_progress(c, duration_s, on_progress))
+
+
+def _copy_range(resolved, start, end, temp_base, label, on_progress=None):
+    """
+    Download [start, end] dari stream hasil resolve (-c copy, timestamp asli lewat -copyts) pakai ffmpeg
+    yang didaftarkan ke token job, jadi langsung dimatikan kalau job dibatalkan.
+    """
+    input_args, map_args = stream_input_args(resolved, start=start, end=end)
+    out_file = temp_base + ".mkv"
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        *input_args,
+        *map_args,
+        "-c",
+        "copy",
+        "-copyts",
+        out_file,
+    ]
+    with _stage_slot("download"):
+        _run_ffmpeg(cmd, label, end - start, on_progress)
+    return out_file if os.path.exists(out_file) else None
+
+
+def _download_range_direct(video_id, start, end, temp_base, format_candidates, stats=None, on_progress=None):
+    resolved = resolve_streams(video_id, format_candidates, profile=client_profile("clip"))
+    video = resolved.get("video") or {}
+    if stats is not None:
+        stats["source_format"] = resolved.get("format")
+        stats["source_height"] = video.get("height")
+    return _copy_range(resolved, start, end, temp_base, f"download-direct[{resolved.get('format')}]", on_progress)
+
+
+_PIPE_VCODECS = ("avc1", "h264", "hev1", "hvc1", "hevc", "mp4v", "vp9", "vp09", "av01")
+_PIPE_ACODECS = ("mp4a", "aac", "mp3", "ac-3", "opus")
+_PIPE_CONTAINER = ["-copyts", "-f", "matroska"]
+
+
+def _scratch_root():
+    base = os.environ.get("YTCLIPPER_SCRATCH_DIR") or tempfile.gettempdir()
+    os.makedirs(base, exist_ok=True)
+    return base
+
+
+def pipe_streaming_enabled():
+    return str(os.environ.get("YTCLIPPER_PIPE_STREAMING", "1")).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def _codec_ok(codec, allowed):
+    c = str(codec or "").strip().lower()
+    return bool(c) and c != "none" and c.startswith(allowed)
+
+
+def pipe_container(resolved):
+    """
+    Argumen muxer buat nyalurin stream hasil resolve lewat pipe (Matroska dengan timestamp asli),
+    atau None kalau codec-nya tidak dikenal (caller fallback ke file temp).
+    """
+    video = resolved.get("video") or {}
+    audio = resolved.get("audio") or {}
+    vcodec = video.get("vcodec")
+    acodec = audio.get("acodec") if audio else video.get("acodec")
+    if not video or not _codec_ok(vcodec, _PIPE_VCODECS):
+        return None
+    if acodec not in (None, "none") and not _codec_ok(acodec, _PIPE_ACODECS):
+        return None
+    return list(_PIPE_CONTAINER)
+
+
+def stream_copy_candidate(video_id, format_candidates, crop_modes, burn_subtitle=False):
+    """
+    Sumber yang videonya kemungkinan bisa di-copy (h264 persis OUTPUT_WIDTH x OUTPUT_HEIGHT, crop identitas,
+    tanpa subtitle). Clip begini lebih murah lewat file lokal + stream copy daripada di-render lewat pipe.
+    """
+    if burn_subtitle or not stream_copy_enabled() or any(m not in IDENTITY_CROP_MODES for m in crop_modes):
+        return False
+    try:
+        video = resolve_streams(video_id, format_candidates, profile=client_profile("clip")).get("video") or {}
+        return _codec_ok(video.get("vcodec"), ("avc1", "h264")) and (int(video.get("width") or 0), int(video.get("height") or 0)) == (
+            OUTPUT_WIDTH,
+            OUTPUT_HEIGHT,
+        )
+    except Exception:
+        return False
+
+
+def render_piped(video_id, start, end, format_candidates, render_graph, stats=None, on_progress=None):
+    """
+    Download range lewat ffmpeg (-c copy ke stdout) langsung disambung ke stdin ffmpeg render,
+    jadi tidak ada file temp sumber di disk. Copy mulai dari keyframe sebelum start, jadi potongan
+    pasnya dilakukan render_graph(trim=(start, end), has_audio) di filtergraph dengan timestamp asli.
+    Raise kalau codec tidak bisa di-pipe atau salah satu proses gagal. Progress render (yang sekaligus
+    progress download-nya) dilaporkan ke on_progress.
+    """
+    resolved = resolve_streams(video_id, format_candidates, profile=client_profile("clip"))
+    container = pipe_container(resolved)
+    if not container:
+        raise ValueError("Codec stream tidak bisa disalurkan lewat pipe.")
+    if stats is not None:
+        stats["source_format"] = resolved.get("format")
+        stats["source_height"] = (resolved.get("video") or {}).get("height")
+    audio = resolved.get("audio") or {}
+    acodec = audio.get("acodec") if audio else (resolved.get("video") or {}).get("acodec")
+    has_audio = acodec not in (None, "none")
+    input_args, map_args = stream_input_args(resolved, start=start, end=end)
+    cmd_download = ["ffmpeg", "-hide_banner", "-loglevel", "error", *input_args, *map_args, "-c", "copy", *container, "pipe:1"]
+    cmd_render = [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-copyts",
+        "-i",
+        "pipe:0",
+        *render_graph(trim=(start, end), has_audio=has_audio),
+    ]
+
+    render_error = None
+    with tempfile.TemporaryFile() as dl_err:
+        downloader = subprocess.Popen(cmd_download, stdout=subprocess.PIPE, stderr=dl_err)
+        with job_control.track(downloader):
+            try:
+                run_ffmpeg_progress(cmd_render, end - start, on_progress, stdin=downloader.stdout)
+            except subprocess.CalledProcessError as e:
+                render_error = e
+            except Exception:
+                downloader.kill()
+                downloader.wait()
+                raise
+            finally:
+                downloader.stdout.close()
+            if render_error is not None and downloader.poll() is None:
+                downloader.kill()
+            downloader.wait()
+        dl_err.seek(0)
+        download_err = dl_err.read().decode("utf-8", "replace").strip()
+
+    if render_error is not None:
+        failed_first = downloader.returncode not in (0, -9) and download_err
+        raise subprocess.CalledProcessError(
+            render_error.returncode, cmd_render, stderr=download_err if failed_first else render_error.stderr
+        )
+    if downloader.returncode != 0:
+        raise subprocess.CalledProcessError(downloader.returncode, cmd_download, stderr=download_err)
+    if stats is not None:
+        stats["streamed"] = True
+
+
+def _file_size(path):
+    try:
+        return int(os.path.getsize(path))
+    except Exception:
+        return None
+
+
+def download_range(video_id, start, end, temp_base, format_candidates=None, stats=None, on_progress=None):
+    format_candidates = list(format_candidates or DOWNLOAD_FORMAT_CANDIDATES)
+    t0 = time.perf_counter()
+    out = _download_range(video_id, start, end, temp_base, format_candidates, stats=stats, on_progress=on_progress)
+    if stats is not None:
+        stats["download_s"] = round(time.perf_counter() - t0, 2)
+        stats["download_bytes"] = _file_size(out) if out else None
+    return out
+
+
+def _download_range(video_id, start, end, temp_base, format_candidates, stats=None, on_progress=None):
+    if direct_streams_enabled():
+        for attempt in range(2):
+            try:
+                out = _download_range_direct(video_id, start, end, temp_base, format_candidates, stats=stats, on_progress=on_progress)
+                if out:
+                    return out
+            except job_control.Cancelled:
+                raise
+            except Exception as e:
+                invalidate_streams(video_id)
+                if attempt == 1:
+                    print(f"⚠️ Download langsung dari stream gagal, fallback ke yt-dlp: {type(e).__name__}: {_clip_text(str(e), 300)}")
+
+    profile = client_profile("clip")
+    out_tpl = temp_base + ".%(ext)s"
+    if yt_engine.inprocess_enabled():
+
+        def _inproc(fmt):
+            # format dipilih yt-dlp in-process, tapi ffmpeg-nya dijalankan sendiri (bukan downloader yt-dlp)
+            # supaya ter-track job_control: cancel langsung mematikan download, tidak nunggu progress hook
+            info = yt_engine.select_format(video_id, fmt)
+            parts = info.get("requested_formats") or [info]
+            resolved = {"video": parts[0], "audio": parts[1] if len(parts) > 1 else None}
+            if not _copy_range(resolved, start, end, temp_base, f"download-inproc[{fmt}]", on_progress):
+                raise ValueError("File hasil download tidak ditemukan.")
+
+        inproc_error = None
+        try:
+            run_candidates(video_id, profile, format_candidates, _inproc)
+        except Exception as e:
+            inproc_error = e
+        cand = sorted(glob.glob(temp_base + ".*"), key=lambda p: os.path.getmtime(p), reverse=True)
+        if cand and not inproc_error:
+            return cand[0]
+        for f in cand:
+            try:
+                os.remove(f)
+            except Exception:
+                pass
+        job_control.check()
+        yt_engine.invalidate_info(video_id)
+        print(f"⚠️ yt-dlp in-process gagal, fallback ke subprocess: {_clip_text(str(inproc_error), 300)}")
+
+    def _subproc(fmt):
+        cmd_download = [
+            sys.executable,
+            "-m",
+            "yt_dlp",
+            "--force-ipv4",
+            "--quiet",
+            "--no-warnings",
+            "--no-playlist",
+            "--progress",
+            "--newline",
+            "--progress-template",
+            f"download:{YTDLP_PROGRESS_TEMPLATE}",
+            "--remote-components",
+            "ejs:github",
+            "--extractor-args",
+            "youtube:player_client=android,ios",
+            "--downloader",
+            "ffmpeg",
+            "--downloader-args",
+            f"ffmpeg_i:-ss {start} -to {end} -hide_banner -loglevel error",
+            "--downloader-args",
+            "ffmpeg_o:-copyts",
+            "-f",
+            fmt,
+            "--restrict-filenames",
+        ] + get_yt_dlp_cookies_args() + [
+            "-o",
+            out_tpl,
+            f"https://youtu.be/{video_id}",
+        ]
+        with _stage_slot("download"):
+            _run(cmd_download, f"download[{fmt}]", runner=lambda c: run_with_progress(c, parse_ytdlp_progress, on_progress))
+
+    fmt, _ = run_candidates(video_id, profile, format_candidates, _subproc)
+    if stats is not None:
+        stats["source_format"] = fmt
+
+    cand = sorted(glob.glob(temp_base + ".*"), key=lambda p: os.path.getmtime(p), reverse=True)
+    return cand[0] if cand else None
+
+
+def clip_range(item, total_duration, apply_padding=False):
     start_original = float(item.get("start", 0))
     if "end" in item:
         end_original = float(item.get("end", start_original))
@@ -82,6 +477,158 @@ def proses_satu_clip(
     max_end = start + float(MAX_DURATION)
     if end > max_end:
         end = max_end
+    return start, end
+
+
+def download_format_key(crop_mode):
+    cap = source_height_cap(required_source_height(crop_mode))
+    return f"h{cap}" if cap else "best"
+
+
+def _source_base(path, start):
+    """
+    Detik video asli di awal file potongan. Download -ss + -c copy mulai dari keyframe sebelum start
+    (timestamp asli disimpan lewat -copyts), jadi diukur dari file; start cuma dipakai kalau tidak terbaca.
+    """
+    t = start_time(path)
+    return float(start) if t is None else t
+
+
+def acquire_source(video_id, start, end, temp_base, crop_mode="default", stats=None, on_progress=None):
+    """
+    Siapkan file sumber yang mencakup [start, end]: dari cache media lokal kalau ada,
+    kalau tidak download lalu simpan ke cache.
+
+    Returns:
+        dict | None: {"path", "base", "release"}; base = detik video di awal file (keyframe sebelum start,
+        bukan start), release() wajib dipanggil.
+    """
+    fmt_key = download_format_key(crop_mode)
+    hit = media_cache.lookup(video_id, fmt_key, start, end)
+    if hit:
+        if stats is not None:
+            stats["cache"] = "hit"
+        return {"path": hit["path"], "base": float(hit["start"]), "release": lambda: media_cache.release(hit["key"])}
+
+    path = download_range(
+        video_id, start, end, temp_base, format_candidates=download_format_candidates(crop_mode), stats=stats, on_progress=on_progress
+    )
+    if not path or not os.path.exists(path):
+        return None
+    if stats is not None:
+        stats["cache"] = "miss"
+    base = _source_base(path, start)
+    entry = media_cache.store(video_id, fmt_key, base, end, path)
+    if entry:
+        return {"path": entry["path"], "base": base, "release": lambda: media_cache.release(entry["key"])}
+
+    def _remove():
+        try:
+            os.remove(path)
+        except Exception:
+            pass
+
+    return {"path": path, "base": base, "release": _remove}
+
+
+def _cleanup_clip_files(temp_base, *paths):
+    for f in list(glob.glob(temp_base + ".*")) + list(paths):
+        if os.path.exists(f):
+            try:
+                os.remove(f)
+            except Exception:
+                pass
+
+
+def _fmt_bytes(n):
+    if n is None:
+        return "?"
+    n = float(n)
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024.0 or unit == "GB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024.0
+
+
+def _print_clip_stats(index, stats, shared=False):
+    parts = []
+    if stats.get("source_height"):
+        parts.append(f"{int(stats['source_height'])}p")
+    if shared:
+        parts.append("sumber bersama")
+    elif stats.get("streamed"):
+        parts.append("stream langsung tanpa file temp")
+    else:
+        parts.append(f"download {_fmt_bytes(stats.get('download_bytes'))} ({stats.get('download_s', '?')}s)")
+    parts.append(f"decode+render {stats.get('render_s', '?')}s")
+    print(f"📦 Clip #{index}: " + ", ".join(parts))
+    streams = stats.get("streams") or {}
+    if streams:
+        desc = ", ".join(f"{m}: video {st['video']}, audio {st['audio']}" for m, st in streams.items())
+        print(f"🎚️ Clip #{index} stream → {desc}")
+
+
+def _write_ai_metadata(output_files, meta):
+    for out_file in output_files:
+        meta_file = os.path.splitext(out_file)[0] + "_ai.txt"
+        with open(meta_file, "w", encoding="utf-8") as f:
+            f.write("JUDUL:\n")
+            for t in meta.get("titles", []):
+                f.write(f"- {t}\n")
+            f.write(f"\nCAPTION:\n{meta.get('caption', '')}\n")
+            f.write(f"\nHASHTAGS:\n{' '.join(meta.get('hashtags', []))}\n")
+
+    print(f"✅ [AI] Saran judul & caption tersimpan di {os.path.basename(meta_file)}")
+    print(f"__AI_JSON__{json.dumps(meta)}")
+
+
+def _generate_ai_batch(clip_stats, gemini_api_key, event_cb=None):
+    pending = [(i, st) for i, st in enumerate(clip_stats, 1) if st.get("ai_text") and st.get("outputs")]
+    if not pending:
+        return
+    if event_cb:
+        event_cb({"stage": "ai"})
+    print(f"\n✨ [AI] Menggenerate judul & caption untuk {len(pending)} clip...")
+    try:
+        metas = get_clip_metadata_many([st["ai_text"] for _, st in pending], gemini_api_key)
+    except Exception as e:
+        print(f"⚠️ [AI Error] {str(e)}")
+        return
+    for (index, st), meta in zip(pending, metas):
+        if isinstance(meta, Exception) or not meta:
+            print(f"⚠️ [AI Error] Clip #{index}: {str(meta)}")
+            continue
+        print(f"🎬 [AI] Clip #{index}")
+        try:
+            _write_ai_metadata(st["outputs"], meta)
+        except Exception as e:
+            print(f"⚠️ [AI Error] {str(e)}")
+
+
+def proses_satu_clip(
+    video_id,
+    item,
+    index,
+    total_duration,
+    crop_mode="default",
+    use_subtitle=False,
+    subtitle_language=None,
+    subtitle_position="middle",
+    output_dir=None,
+    apply_padding=False,
+    event_cb=None,
+    gemini_api_key=None,
+    source=None,
+    stats=None,
+    crop_modes=None,
+    transcript=None,
+    defer_ai=False,
+    encoder_profile=None,
+):
+    start, end = clip_range(item, total_duration, apply_padding=apply_padding)
+    modes = list(crop_modes) if crop_modes else [crop_mode]
+    if stats is None:
+        stats = {}
 
     duration = end - start
     print(f"\n{'='*40}")
@@ -98,297 +645,192 @@ def proses_satu_clip(
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     tag = uuid.uuid4().hex[:8]
     stem = f"clip_{index}_{ts}_{tag}"
-    temp_base = os.path.join(output_dir, f"temp_{index}_{ts}_{tag}")
-    out_tpl = temp_base + ".%(ext)s"
-    temp_file = temp_base + ".mp4"
-    cropped_file = unique_path(output_dir, f"temp_cropped_{index}_{ts}_{tag}", ".mp4")
+    temp_base = os.path.join(_scratch_root(), f"temp_{index}_{ts}_{tag}")
     subtitle_file = unique_path(output_dir, f"temp_{index}_{ts}_{tag}", ".srt")
-    output_file = unique_path(output_dir, stem, ".mp4")
-
-    format_candidates = [
-        "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
-        "bestvideo+bestaudio/best",
-        "best/b",
-        "bv*+ba/b",
-    ]
+    if len(modes) == 1:
+        cropped_files = [unique_path(output_dir, f"temp_cropped_{index}_{ts}_{tag}", ".mp4")]
+        output_files = [unique_path(output_dir, stem, ".mp4")]
+    else:
+        cropped_files = [unique_path(output_dir, f"temp_cropped_{index}_{ts}_{tag}_{m}", ".mp4") for m in modes]
+        output_files = [unique_path(output_dir, f"{stem}_{m}", ".mp4") for m in modes]
+    output_file = output_files[0]
 
-    try:
+    input_args = None
+    owned_src = None
 
-        def _clip_text(s, limit=4000):
-            s = "" if s is None else str(s)
-            if len(s) <= limit:
-                return s
-            head = s[: int(limit * 0.6)]
-            tail = s[-int(limit * 0.4) :]
-            return head + "\n... (truncated) ...\n" + tail
+    def _progress(phase):
+        if not event_cb:
+            return None
+        return lambda f: event_cb({"stage": "progress", "clip_index": index, "phase": phase, "fraction": f})
 
-        def _run(cmd, label):
-            try:
-                res = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                if res.stderr:
-                    err = res.stderr.strip()
-                    if err:
-                        print(f"[{label}]\n" + _clip_text(err))
-                return res
-            except subprocess.CalledProcessError as e:
-                cmd_text = " ".join(str(x) for x in cmd)
-                print(f"[{label}] Command gagal\n{cmd_text}")
-                out = (e.stdout or "").strip()
-                err = (e.stderr or "").strip()
-                if out:
-                    print(f"[{label}] stdout\n" + _clip_text(out))
-                if err:
-                    print(f"[{label}] stderr\n" + _clip_text(err))
-                raise
+    try:
+        for m in modes:
+            if m not in CROP_MODES:
+                raise ValueError(f"crop_mode tidak dikenal: {m}")
 
+        job_control.check()
         if event_cb:
             event_cb({"stage": "download", "clip_index": index})
-        last_error = None
-        for fmt in format_candidates:
-            cmd_download = [
-                sys.executable,
-                "-m",
-                "yt_dlp",
-                "--force-ipv4",
-                "--quiet",
-                "--no-warnings",
-                "--no-playlist",
-                "--remote-components",
-                "ejs:github",
-                "--extractor-args",
-                "youtube:player_client=android,ios",
-                "--downloader",
-                "ffmpeg",
-                "--downloader-args",
-                f"ffmpeg_i:-ss {start} -to {end} -hide_banner -loglevel error",
-                "-f",
-                fmt,
-                "--restrict-filenames",
-            ] + get_yt_dlp_cookies_args() + [
-                "-o",
-                out_tpl,
-                f"https://youtu.be/{video_id}",
-            ]
+
+        src = source.acquire() if source is not None else None
+        shared = bool(src)
+        use_transcript = transcript is not None and transcript.covers(start, end)
+        subtitle_ok = False
+        streamed = False
+        fmt_candidates = download_format_candidates(source_crop_mode(modes))
+
+        if (
+            not shared
+            and pipe_streaming_enabled()
+            and direct_streams_enabled()
+            and (use_transcript or not use_subtitle)
+            and not stream_copy_candidate(video_id, fmt_candidates, modes, burn_subtitle=use_subtitle)
+            and not media_cache.lookup(video_id, download_format_key(source_crop_mode(modes)), start, end, pin=False)
+        ):
+            if use_subtitle:
+                if event_cb:
+                    event_cb({"stage": "subtitle", "clip_index": index})
+                subtitle_ok = write_srt(transcript.slice(start, end), subtitle_file) > 0
+            if event_cb:
+                event_cb({"stage": "clip", "clip_index": index, "outputs": modes})
+            t_render = time.perf_counter()
             try:
-                _run(cmd_download, f"download[{fmt}]")
-                last_error = None
-                break
-            except subprocess.CalledProcessError as e:
-                last_error = e
-        if last_error:
-            raise last_error
+                with _stage_slot("clip"):
+                    render_piped(
+                        video_id,
+                        start,
+                        end,
+                        fmt_candidates,
+                        lambda **kw: build_variant_render_graph(
+                            modes,
+                            cropped_files,
+                            subtitle_file=subtitle_file if subtitle_ok else None,
+                            subtitle_position=subtitle_position,
+                            encoder_profile=encoder_profile,
+                            **kw,
+                        ),
+                        stats=stats,
+                        on_progress=_progress("clip"),
+                    )
+                streamed = True
+                stats["streams"] = {m: {"video": "encode", "audio": "encode"} for m in modes}
+                stats["render_s"] = round(time.perf_counter() - t_render, 2)
+                _print_clip_stats(index, stats)
+            except Exception as e:
+                job_control.check()
+                print(f"⚠️ Clip #{index} gagal di-stream lewat pipe, fallback ke file temp: {_clip_text(str(getattr(e, 'stderr', '') or e))}")
+                for f in cropped_files:
+                    try:
+                        os.remove(f)
+                    except Exception:
+                        pass
 
-        cand = sorted(glob.glob(temp_base + ".*"), key=lambda p: os.path.getmtime(p), reverse=True)
-        if cand:
-            temp_file = cand[0]
-        if not os.path.exists(temp_file):
-            return False, "File temp tidak ditemukan setelah download"
+        if not streamed:
+            if shared:
+                print(f"♻️ Clip #{index} dipotong dari sumber bersama ({_fmt_time(source.start)} → {_fmt_time(source.end)})")
+            else:
+                src = acquire_source(
+                    video_id, start, end, temp_base, crop_mode=source_crop_mode(modes), stats=stats, on_progress=_progress("download")
+                )
+                if not src:
+                    return False, "File temp tidak ditemukan setelah download"
+                owned_src = src
+                if stats.get("cache") == "hit":
+                    print(f"💾 Clip #{index} diambil dari cache sumber lokal")
+            source_file = src["path"]
+            seek_start = start - float(src["base"])
+            seek_end = end - float(src["base"])
+            input_args = ["-ss", f"{seek_start:.3f}", "-to", f"{seek_end:.3f}", "-i", source_file]
 
-        if crop_mode == "default":
-            cmd_crop = [
-                "ffmpeg",
-                "-y",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-i",
-                temp_file,
-                "-vf",
-                "scale=-2:1280,pad=max(iw\\,720):ih:(ow-iw)/2:0,crop=720:1280:(iw-720)/2:(ih-1280)/2",
-                "-c:v",
-                "libx264",
-                "-preset",
-                "ultrafast",
-                "-crf",
-                "26",
-                "-c:a",
-                "aac",
-                "-b:a",
-                "128k",
-                cropped_file,
-            ]
-        elif crop_mode == "fit":
-            cmd_crop = [
+            job_control.check()
+            if use_subtitle:
+                if event_cb:
+                    event_cb({"stage": "subtitle", "clip_index": index})
+                if use_transcript:
+                    subtitle_ok = write_srt(transcript.slice(start, end), subtitle_file) > 0
+                    if not subtitle_ok:
+                        print(f"ℹ️ Clip #{index} tidak ada suara yang ke-transcribe, render tanpa subtitle.")
+                else:
+                    with _stage_slot("subtitle"):
+                        subtitle_ok = generate_subtitle(source_file, subtitle_file, language=subtitle_language, start=seek_start, end=seek_end)
+                if not subtitle_ok and not use_transcript:
+                    print(f"⚠️ Subtitle Clip #{index} gagal dibuat, lanjut render tanpa subtitle.")
+
+            job_control.check()
+            copy_plan = negotiate(source_file, modes, seek_start, seek_end, burn_subtitle=subtitle_ok)
+            if copy_plan["start"] != seek_start:
+                print(f"🔑 Clip #{index}: start digeser {copy_plan['start'] - seek_start:+.2f}s ke keyframe buat stream copy")
+                input_args = ["-ss", f"{copy_plan['start']:.3f}", "-to", f"{seek_end:.3f}", "-i", source_file]
+            stats["streams"] = {
+                m: {
+                    "video": "copy" if m in copy_plan["copy_video"] else "encode",
+                    "audio": "copy" if copy_plan["copy_audio"] else "encode",
+                }
+                for m in modes
+            }
+            cmd_render = [
                 "ffmpeg",
                 "-y",
                 "-hide_banner",
                 "-loglevel",
                 "error",
-                "-i",
-                temp_file,
-                "-vf",
-                "scale=720:1280:force_original_aspect_ratio=decrease,scale=trunc(iw/2)*2:trunc(ih/2)*2,pad=720:1280:(ow-iw)/2:(oh-ih)/2,setsar=1",
-                "-c:v",
-                "libx264",
-                "-preset",
-                "ultrafast",
-                "-crf",
-                "26",
-                "-c:a",
-                "aac",
-                "-b:a",
-                "128k",
-                cropped_file,
-            ]
-        elif crop_mode == "split_left":
-            vf = (
-                f"scale='max(720,iw*1280/ih)':1280[scaled];"
-                f"[scaled]split=2[s1][s2];"
-                f"[s1]crop=720:{TOP_HEIGHT}:(iw-720)/2:0[top];"
-                f"[s2]crop=720:{BOTTOM_HEIGHT}:0:{TOP_HEIGHT}[bottom];"
-                f"[top][bottom]vstack=inputs=2[out]"
-            )
-            cmd_crop = [
-                "ffmpeg",
-                "-y",
-                "-hide_banner",
-                "-loglevel",
-                "warning",
-                "-i",
-                temp_file,
-                "-filter_complex",
-                vf,
-                "-map",
-                "[out]",
-                "-map",
-                "0:a?",
-                "-c:v",
-                "libx264",
-                "-preset",
-                "ultrafast",
-                "-crf",
-                "26",
-                "-c:a",
-                "aac",
-                "-b:a",
-                "128k",
-                cropped_file,
+                *input_args,
+                *build_variant_render_graph(
+                    modes,
+                    cropped_files,
+                    subtitle_file=subtitle_file if subtitle_ok else None,
+                    subtitle_position=subtitle_position,
+                    encoder_profile=encoder_profile,
+                    copy_audio=copy_plan["copy_audio"],
+                    copy_video=copy_plan["copy_video"],
+                ),
             ]
-        elif crop_mode == "split_right":
-            vf = (
-                f"scale='max(720,iw*1280/ih)':1280[scaled];"
-                f"[scaled]split=2[s1][s2];"
-                f"[s1]crop=720:{TOP_HEIGHT}:(iw-720)/2:0[top];"
-                f"[s2]crop=720:{BOTTOM_HEIGHT}:iw-720:{TOP_HEIGHT}[bottom];"
-                f"[top][bottom]vstack=inputs=2[out]"
-            )
-            cmd_crop = [
-                "ffmpeg",
-                "-y",
-                "-hide_banner",
-                "-loglevel",
-                "warning",
-                "-i",
-                temp_file,
-                "-filter_complex",
-                vf,
-                "-map",
-                "[out]",
-                "-map",
-                "0:a?",
-                "-c:v",
-                "libx264",
-                "-preset",
-                "ultrafast",
-                "-crf",
-                "26",
-                "-c:a",
-                "aac",
-                "-b:a",
-                "128k",
-                cropped_file,
-            ]
-        else:
-            raise ValueError(f"crop_mode tidak dikenal: {crop_mode}")
 
-        if event_cb:
-            event_cb({"stage": "clip", "clip_index": index})
-        _run(cmd_crop, "ffmpeg")
+            if event_cb:
+                event_cb({"stage": "clip", "clip_index": index, "outputs": modes})
+            if len(modes) > 1:
+                print(f"🎞️ Clip #{index}: render {len(modes)} varian sekaligus ({', '.join(modes)})")
+            t_render = time.perf_counter()
+            with _stage_slot("clip"):
+                _run_ffmpeg(cmd_render, "ffmpeg", duration, _progress("clip"))
+            stats["render_s"] = round(time.perf_counter() - t_render, 2)
+            _print_clip_stats(index, stats, shared=shared)
 
-        try:
-            os.remove(temp_file)
-        except Exception:
-            pass
+        if owned_src:
+            owned_src["release"]()
+            owned_src = None
 
-        if use_subtitle:
-            if event_cb:
-                event_cb({"stage": "subtitle", "clip_index": index})
-            ok = generate_subtitle(cropped_file, subtitle_file, language=subtitle_language)
-            if ok:
-                if event_cb:
-                    event_cb({"stage": "subtitle_burn", "clip_index": index})
-                abs_subtitle_path = os.path.abspath(subtitle_file)
-                subtitle_path = abs_subtitle_path.replace("\\", "/").replace(":", "\\:")
-                pos = str(subtitle_position or "middle").strip().lower()
-                if pos in ("bottom", "bawah"):
-                    alignment = 2
-                    margin_v = 60
-                elif pos in ("top", "atas"):
-                    alignment = 8
-                    margin_v = 60
-                else:
-                    alignment = 5
-                    margin_v = 0
-                force_style = (
-                    "FontName=Arial,"
-                    "FontSize=12,"
-                    "Bold=1,"
-                    "PrimaryColour=&HFFFFFF,"
-                    "OutlineColour=&H000000,"
-                    "BorderStyle=1,"
-                    "Outline=2,"
-                    "Shadow=1,"
-                    f"Alignment={alignment},"
-                    f"MarginV={margin_v}"
-                )
-                cmd_subtitle = [
-                    "ffmpeg",
-                    "-y",
-                    "-hide_banner",
-                    "-loglevel",
-                    "error",
-                    "-i",
-                    cropped_file,
-                    "-vf",
-                    f"subtitles='{subtitle_path}':force_style='{force_style}'",
-                    "-c:v",
-                    "libx264",
-                    "-preset",
-                    "ultrafast",
-                    "-crf",
-                    "26",
-                    "-c:a",
-                    "copy",
-                    output_file,
-                ]
-                _run(cmd_subtitle, "subtitle")
-                for f in (cropped_file, subtitle_file):
-                    try:
-                        os.remove(f)
-                    except Exception:
-                        pass
-            else:
-                try:
-                    os.replace(cropped_file, output_file)
-                except Exception:
-                    return False, "Gagal replace file output (subtitle)"
-        else:
+        for m, cropped_file, out_file in zip(modes, cropped_files, output_files):
             try:
-                os.replace(cropped_file, output_file)
+                os.replace(cropped_file, out_file)
             except Exception:
                 return False, "Gagal replace file output"
+            if event_cb:
+                event_cb(
+                    {
+                        "stage": "output_done",
+                        "clip_index": index,
+                        "crop_mode": m,
+                        "file": os.path.basename(out_file),
+                        "streams": (stats.get("streams") or {}).get(m),
+                    }
+                )
+        stats["outputs"] = list(output_files)
 
-        if gemini_api_key:
+        if gemini_api_key and not job_control.is_cancelled():
             try:
-                print(f"✨ [AI] Menggenerate judul & caption untuk Clip #{index}...")
-                transcript_text = ""
+                if not defer_ai:
+                    print(f"✨ [AI] Menggenerate judul & caption untuk Clip #{index}...")
+                transcript_text = transcript.text(start, end) if use_transcript else ""
 
-                sub_source = subtitle_file if (use_subtitle and os.path.exists(subtitle_file)) else None
+                sub_source = subtitle_file if (not use_transcript and subtitle_ok and os.path.exists(subtitle_file)) else None
                 temp_sub = None
 
-                if not sub_source:
+                if not sub_source and not use_transcript:
                     temp_sub = unique_path(tempfile.gettempdir(), f"sub_temp_{uuid.uuid4().hex}", ".srt")
-                    if generate_subtitle(output_file, temp_sub):
+                    with _stage_slot("subtitle"):
+                        sub_ok = generate_subtitle(output_file, temp_sub)
+                    if sub_ok:
                         sub_source = temp_sub
 
                 if sub_source and os.path.exists(sub_source):
@@ -409,46 +851,43 @@ def proses_satu_clip(
                         pass
 
                 if transcript_text.strip():
-                    meta = generate_clip_metadata(transcript_text, gemini_api_key)
-                    meta_file = os.path.splitext(output_file)[0] + "_ai.txt"
-                    with open(meta_file, "w", encoding="utf-8") as f:
-                        f.write("JUDUL:\n")
-                        for t in meta.get("titles", []):
-                            f.write(f"- {t}\n")
-                        f.write(f"\nCAPTION:\n{meta.get('caption', '')}\n")
-                        f.write(f"\nHASHTAGS:\n{' '.join(meta.get('hashtags', []))}\n")
-
-                    print(f"✅ [AI] Saran judul & caption tersimpan di {os.path.basename(meta_file)}")
-                    print(f"__AI_JSON__{json.dumps(meta)}")
+                    if defer_ai:
+                        stats["ai_text"] = transcript_text
+                        print(f"🕒 [AI] Clip #{index} masuk antrian batch Gemini")
+                    else:
+                        _write_ai_metadata(output_files, get_clip_metadata(transcript_text, gemini_api_key))
                 else:
                     print("⚠️ [AI Warning] Tidak ada suara/transkrip terdeteksi untuk AI.")
             except Exception as e:
                 print(f"⚠️ [AI Error] {str(e)}")
 
-        print(f"✅ Clip #{index} selesai → {os.path.basename(output_file)}")
+        try:
+            if os.path.exists(subtitle_file):
+                os.remove(subtitle_file)
+        except Exception:
+            pass
+
+        print(f"✅ Clip #{index} selesai → {', '.join(os.path.basename(f) for f in output_files)}")
         return True, None
+    except job_control.Cancelled:
+        print(f"🛑 Clip #{index} dibatalkan")
+        _cleanup_clip_files(temp_base, *cropped_files, subtitle_file)
+        return False, "Dibatalkan"
     except subprocess.CalledProcessError as e:
-        print(f"❌ [ERROR] Clip #{index} gagal (crop_mode={crop_mode})")
+        print(f"❌ [ERROR] Clip #{index} gagal (crop_mode={','.join(modes)})")
         err_msg = str(e)
         if e.stderr:
              err_msg += "\nStderr: " + str(e.stderr).strip()[-200:]
         
-        for f in (temp_file, cropped_file, subtitle_file):
-            if os.path.exists(f):
-                try:
-                    os.remove(f)
-                except Exception:
-                    pass
+        _cleanup_clip_files(temp_base, *cropped_files, subtitle_file)
         return False, err_msg
     except Exception as e:
         print(f"❌ [ERROR] Clip #{index} exception: {e}")
-        for f in (temp_file, cropped_file, subtitle_file):
-            if os.path.exists(f):
-                try:
-                    os.remove(f)
-                except Exception:
-                    pass
+        _cleanup_clip_files(temp_base, *cropped_files, subtitle_file)
         return False, str(e)
+    finally:
+        if owned_src:
+            owned_src["release"]()
 
 
 def proses_dengan_segmen(
@@ -463,13 +902,19 @@ def proses_dengan_segmen(
     apply_padding=False,
     event_cb=None,
     gemini_api_key=None,
+    max_workers=None,
+    source_mode=None,
+    crop_modes=None,
+    encoder_profile=None,
+    target_turnaround_s=None,
 ):
     if whisper_model:
         set_whisper_model(whisper_model)
+    modes = normalize_crop_modes(crop_modes, default=crop_mode) if crop_modes else [crop_mode]
 
     if event_cb:
         event_cb({"stage": "dependency"})
-    cek_dependensi(install_whisper=use_subtitle)
+    cek_dependensi_cached(install_whisper=use_subtitle)
 
     video_id = extract_video_id(link)
     if not video_id:
@@ -511,24 +956,134 @@ def proses_dengan_segmen(
             continue
         cleaned.append({"start": start, "end": end, "enabled": True})
 
+    plan = [clip_range(seg, total_duration, apply_padding=apply_padding) for seg in cleaned]
+    if event_cb:
+        event_cb({"stage": "plan", "clips": [{"index": i, "duration": e - s} for i, (s, e) in enumerate(plan, 1)]})
+
+    job_control.check()
+    profile = resolve_profile(encoder_profile, media_seconds=sum(e - s for s, e in plan), target_s=target_turnaround_s, crop_modes=modes)
+    if encoder_profile == "auto":
+        print(f"🎛️ Encoder profile auto → {profile} (target {target_turnaround_s or 'default'}s)")
+
+    if source_mode is None:
+        source_mode = str(os.environ.get("YTCLIPPER_SOURCE_MODE") or (load_config() or {}).get("source_mode") or "auto")
+    source_mode = str(source_mode).strip().lower()
+    sources = [None] * len(cleaned)
+    clip_stats = [{} for _ in cleaned]
+    shared_stats = []
+    shared_stats_lock = threading.Lock()
+    scratch_dir = None
+    if source_mode != "per_clip" and len(cleaned) > 1:
+        gap_s = _config_int("YTCLIPPER_SOURCE_SPAN_GAP_S", "source_span_gap_s", 30)
+        max_span_s = _config_int("YTCLIPPER_SOURCE_SPAN_MAX_S", "source_span_max_s", 600)
+        ranges = [clip_range(seg, total_duration, apply_padding=apply_padding) for seg in cleaned]
+        spans = [sp for sp in plan_source_spans(ranges, gap_threshold_s=gap_s, max_span_s=max_span_s) if len(sp["members"]) > 1]
+        if spans:
+            scratch_dir = make_scratch_dir()
+
+            def _fetch_span(span):
+                base = os.path.join(scratch_dir, f"span_{int(span.start)}_{int(span.end)}_{uuid.uuid4().hex[:6]}")
+                print(f"⬇️ Download sumber bersama {_fmt_time(span.start)} → {_fmt_time(span.end)}")
+                span_stats = {}
+                src = acquire_source(video_id, span.start, span.end, base, crop_mode=source_crop_mode(modes), stats=span_stats)
+                with shared_stats_lock:
+                    shared_stats.append(span_stats)
+                if span_stats.get("cache") == "hit":
+                    print("💾 Sumber bersama diambil dari cache lokal")
+                else:
+                    print(f"📦 Sumber bersama: {_fmt_bytes(span_stats.get('download_bytes'))} ({span_stats.get('download_s', '?')}s)")
+                return src
+
+            for sp in spans:
+                shared = SourceSpan(sp["start"], sp["end"], refs=len(sp["members"]), fetch=_fetch_span)
+                for i in sp["members"]:
+                    sources[i] = shared
+            print(f"♻️ {sum(len(sp['members']) for sp in spans)} clip dipotong dari {len(spans)} download sumber bersama")
+
+    transcript = None
+    if (use_subtitle or gemini_api_key) and shared_transcript_enabled() and cleaned:
+        if event_cb:
+            event_cb({"stage": "transcript"})
+        print("🤖 Transcribe audio sekali untuk semua clip...")
+        t_asr = time.perf_counter()
+        with _stage_slot("subtitle"):
+            transcript = build_transcript(
+                video_id,
+                [clip_range(seg, total_duration, apply_padding=apply_padding) for seg in cleaned],
+                language=subtitle_language,
+            )
+        if transcript is not None:
+            print(f"✅ Transkrip bersama siap ({len(transcript.segments)} segmen, {time.perf_counter() - t_asr:.1f}s)")
+        else:
+            print("⚠️ Transkrip bersama gagal, subtitle dibuat per clip.")
+
+    def _run_one(index, seg):
+        item = {"start": seg["start"], "end": seg["end"]}
+        source = sources[index - 1]
+        try:
+            job_control.check()
+            ok, err = proses_satu_clip(
+                video_id=video_id,
+                item=item,
+                index=index,
+                total_duration=total_duration,
+                crop_mode=crop_mode,
+                crop_modes=modes,
+                use_subtitle=use_subtitle,
+                subtitle_language=subtitle_language,
+                subtitle_position=subtitle_position,
+                output_dir=output_dir,
+                apply_padding=apply_padding,
+                event_cb=event_cb,
+                gemini_api_key=gemini_api_key,
+                source=source,
+                stats=clip_stats[index - 1],
+                transcript=transcript,
+                defer_ai=bool(gemini_api_key),
+                encoder_profile=profile,
+            )
+        except job_control.Cancelled:
+            ok, err = False, "Dibatalkan"
+        except Exception as e:
+            ok, err = False, f"{type(e).__name__}: {str(e)}"
+        finally:
+            if source is not None:
+                source.release()
+        if event_cb:
+            event_cb({"stage": "clip_done", "clip_index": index, "ok": bool(ok)})
+        return ok, err
+
+    workers = min(clip_worker_count(max_workers), max(1, len(cleaned)))
+    try:
+        if workers > 1:
+            print(f"⚡ Worker paralel: {workers} clip sekaligus")
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clip") as pool:
+                futures = [pool.submit(job_control.wrap(_run_one), i + 1, seg) for i, seg in enumerate(cleaned)]
+                results = [f.result() for f in futures]
+        else:
+            results = [_run_one(i + 1, seg) for i, seg in enumerate(cleaned)]
+    finally:
+        remove_scratch_dir(scratch_dir)
+
+    if job_control.is_cancelled():
+        outputs = [f for st in clip_stats for f in st.get("outputs") or []]
+        return {
+            "success_count": sum(1 for ok, _ in results if ok),
+            "output_dir": output_dir,
+            "cancelled": True,
+            "outputs": outputs,
+        }
+
+    if gemini_api_key:
+        _generate_ai_batch(clip_stats, gemini_api_key, event_cb=event_cb)
+
+    download_bytes = sum(int(st.get("download_bytes") or 0) for st in clip_stats + shared_stats)
+    render_s = sum(float(st.get("render_s") or 0) for st in clip_stats)
+    print(f"📦 Total download sumber: {_fmt_bytes(download_bytes)}, total decode+render {render_s:.1f}s")
+
     success = 0
     errors = []
-    for seg in cleaned:
-        item = {"start": seg["start"], "end": seg["end"]}
-        ok, err = proses_satu_clip(
-            video_id=video_id,
-            item=item,
-            index=success + 1,
-            total_duration=total_duration,
-            crop_mode=crop_mode,
-            use_subtitle=use_subtitle,
-            subtitle_language=subtitle_language,
-            subtitle_position=subtitle_position,
-            output_dir=output_dir,
-            apply_padding=apply_padding,
-            event_cb=event_cb,
-            gemini_api_key=gemini_api_key,
-        )
+    for ok, err in results:
         if ok:
             success += 1
         elif err:
@@ -545,4 +1100,4 @@ def proses_dengan_segmen(
             msg += f"\nDetail error: {'; '.join(unique_errors)}"
         raise RuntimeError(msg)
 
-    return {"success_count": success, "output_dir": output_dir}
+    return {"success_count": success, "output_dir": output_dir, "download_bytes": download_bytes}
@@ -16,6 +16,7 @@ class Settings(BaseModel):
     debug: bool = True
     host: str = "127.0.0.1"
     port: int = 5000
+    workers: int = 1
 
     heatmap_debug: bool = False
     heatmap_cache_ttl_s: int = 900
@@ -41,6 +42,12 @@ def get_settings() -> Settings:
     except Exception:
         port = 5000
 
+    workers_raw = os.environ.get("YTCLIPPER_WEB_WORKERS", "1")
+    try:
+        workers = max(1, int(workers_raw))
+    except Exception:
+        workers = 1
+
     heatmap_debug = _env_bool("YTCLIPPER_HEATMAP_DEBUG", default=False)
 
     ttl_raw = os.environ.get("YTCLIPPER_HEATMAP_CACHE_TTL_S", "900")
@@ -61,6 +68,7 @@ def get_settings() -> Settings:
         debug=bool(debug),
         host=str(host),
         port=int(port),
+        workers=int(workers),
         heatmap_debug=bool(heatmap_debug),
         heatmap_cache_ttl_s=int(ttl_s),
         heatmap_slow_ms=int(slow_ms),
@@ -0,0 +1,228 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+
+# threads 0 = jumlah thread dipilih x264 sendiri (-threads tidak dikirim); YTCLIPPER_ENCODER_THREADS menimpa semua profile
+PROFILES = {
+    "draft": {"preset": "ultrafast", "crf": 26, "threads": 0, "tune": None, "audio_codec": "aac", "audio_bitrate": "128k"},
+    "balanced": {"preset": "veryfast", "crf": 23, "threads": 0, "tune": None, "audio_codec": "aac", "audio_bitrate": "128k"},
+    "archival": {"preset": "slow", "crf": 18, "threads": 0, "tune": "film", "audio_codec": "aac", "audio_bitrate": "192k"},
+}
+# urutan dari yang paling cepat ke yang kualitasnya paling bagus
+PROFILE_ORDER = ("draft", "balanced", "archival")
+DEFAULT_PROFILE = "draft"
+AUTO_PROFILE = "auto"
+
+CALIBRATION_FPS = 30
+
+_LOCK = threading.Lock()
+_CALIBRATION = None
+
+
+def _env_int(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return int(default)
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return int(default)
+
+
+def default_profile():
+    name = str(os.environ.get("YTCLIPPER_ENCODER_PROFILE") or DEFAULT_PROFILE).strip().lower()
+    return name if name in PROFILES or name == AUTO_PROFILE else DEFAULT_PROFILE
+
+
+def get_profile(name=None):
+    name = str(name or default_profile()).strip().lower()
+    if name == AUTO_PROFILE:
+        # "auto" yang belum di-resolve (resolve_profile) pakai profile paling cepat
+        name = DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"encoder_profile tidak dikenal: {name}")
+    profile = dict(PROFILES[name], name=name)
+    threads = _env_int("YTCLIPPER_ENCODER_THREADS", -1)
+    if threads >= 0:
+        profile["threads"] = threads
+    return profile
+
+
+def video_encode_args(name=None):
+    p = get_profile(name)
+    args = ["-c:v", "libx264", "-preset", str(p["preset"]), "-crf", str(p["crf"])]
+    if p.get("tune"):
+        args += ["-tune", str(p["tune"])]
+    if int(p.get("threads") or 0) > 0:
+        args += ["-threads", str(int(p["threads"]))]
+    return args
+
+
+def audio_encode_args(name=None):
+    p = get_profile(name)
+    return ["-c:a", str(p["audio_codec"]), "-b:a", str(p["audio_bitrate"])]
+
+
+def encode_args(name=None):
+    return video_encode_args(name) + audio_encode_args(name)
+
+
+def calibration_path():
+    p = os.environ.get("YTCLIPPER_ENCODER_CALIBRATION_PATH")
+    if p:
+        return str(p)
+    return os.path.join(os.path.expanduser("~"), ".ytclipper_encoder_calibration.json")
+
+
+def load_calibration():
+    global _CALIBRATION
+    with _LOCK:
+        if _CALIBRATION is not None:
+            return _CALIBRATION
+        data = {}
+        try:
+            with open(calibration_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("host") != platform.node():
+                data = {}
+        except Exception:
+            data = {}
+        _CALIBRATION = data
+        return _CALIBRATION
+
+
+def save_calibration(data):
+    global _CALIBRATION
+    path = calibration_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    with _LOCK:
+        _CALIBRATION = data
+
+
+def profile_fps(name, crop_modes=None, calibration=None):
+    """
+    FPS encode hasil kalibrasi untuk profile di host ini. Kalau beberapa crop mode dirender sekaligus,
+    waktu per frame tiap varian dijumlah (tiap varian di-encode terpisah dari satu decode).
+
+    Returns:
+        float | None: None kalau belum pernah dikalibrasi.
+    """
+    cal = load_calibration() if calibration is None else calibration
+    entry = (cal.get("profiles") or {}).get(name) or {}
+    if not crop_modes:
+        return float(entry["fps"]) if float(entry.get("fps") or 0) > 0 else None
+    per_mode = entry.get("crop_modes") or {}
+    fps = [float(per_mode.get(m) or entry.get("fps") or 0) for m in crop_modes]
+    if not all(f > 0 for f in fps):
+        return None
+    return 1.0 / sum(1.0 / f for f in fps)
+
+
+def pick_profile(media_seconds, target_s, crop_modes=None, calibration=None, source_fps=CALIBRATION_FPS):
+    """
+    Profile dengan kualitas paling bagus yang estimasi waktu encode-nya masih masuk target_s.
+    Tanpa data kalibrasi (atau tidak ada yang masuk) balik ke profile paling cepat.
+    """
+    frames = max(0.0, float(media_seconds)) * float(source_fps)
+    best = PROFILE_ORDER[0]
+    for name in PROFILE_ORDER:
+        fps = profile_fps(name, crop_modes, calibration=calibration)
+        if fps and frames / fps <= float(target_s):
+            best = name
+    return best
+
+
+def resolve_profile(name, media_seconds=0.0, target_s=None, crop_modes=None):
+    """Nama profile final untuk job: "auto" dipilih dari kalibrasi, selain itu divalidasi."""
+    name = str(name or default_profile()).strip().lower()
+    if name == AUTO_PROFILE:
+        target = target_s if target_s else _env_int("YTCLIPPER_TARGET_TURNAROUND_S", 600)
+        return pick_profile(media_seconds, target, crop_modes)
+    return get_profile(name)["name"]
+
+
+def _make_test_clip(path, seconds, height):
+    width = int(round(height * 16 / 9.0 / 2)) * 2
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        f"testsrc2=size={width}x{height}:rate={CALIBRATION_FPS}:duration={seconds}",
+        "-f",
+        "lavfi",
+        "-i",
+        f"sine=frequency=440:duration={seconds}",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "ultrafast",
+        "-crf",
+        "20",
+        "-c:a",
+        "aac",
+        "-shortest",
+        path,
+    ]
+    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def calibrate(profiles=None, crop_modes=None, seconds=5, source_height=1080, log=print):
+    """
+    Ukur fps encode tiap profile di host ini: clip uji dari lavfi dirender pakai filtergraph crop
+    yang sama dengan proses_satu_clip, hasilnya disimpan ke file kalibrasi.
+
+    Returns:
+        dict: data kalibrasi {"host", "ts", "seconds", "source_height", "profiles": {nama: {"fps", "crop_modes"}}}.
+    """
+    from app.render_graph import CROP_MODES, build_variant_render_graph
+
+    profiles = [p for p in (profiles or PROFILE_ORDER) if p in PROFILES]
+    crop_modes = [m for m in (crop_modes or CROP_MODES) if m in CROP_MODES]
+    frames = int(seconds) * CALIBRATION_FPS
+    work = tempfile.mkdtemp(prefix="ytclipper_calib_")
+    result = {"host": platform.node(), "ts": time.time(), "seconds": int(seconds), "source_height": int(source_height), "profiles": {}}
+    try:
+        src = os.path.join(work, "src.mp4")
+        _make_test_clip(src, int(seconds), int(source_height))
+        for name in profiles:
+            per_mode = {}
+            for mode in crop_modes:
+                out = os.path.join(work, f"{name}_{mode}.mp4")
+                cmd = [
+                    "ffmpeg",
+                    "-y",
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-i",
+                    src,
+                    *build_variant_render_graph([mode], [out], encoder_profile=name),
+                ]
+                t0 = time.perf_counter()
+                subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                per_mode[mode] = round(frames / max(1e-6, time.perf_counter() - t0), 1)
+                log(f"  {name:<9} {mode:<12} {per_mode[mode]:>7.1f} fps")
+            result["profiles"][name] = {
+                "fps": round(sum(per_mode.values()) / max(1, len(per_mode)), 1),
+                "crop_modes": per_mode,
+                "threads": get_profile(name)["threads"],
+            }
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    save_calibration(result)
+    return result
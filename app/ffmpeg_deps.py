@@ -3,6 +3,7 @@ import os
 import shutil
 import subprocess
 import sys
+import threading
 import time
 import traceback
 from datetime import datetime, timezone
@@ -13,6 +14,11 @@ import requests
 from app.config_store import load_config, save_config
 
 
+_CHECK_LOCK = threading.Lock()
+# install_whisper -> time.monotonic() cek dependensi terakhir yang sukses di proses ini
+_CHECKED = {}
+
+
 def _env_bool(name, default=False):
     v = os.environ.get(name)
     if v is None:
@@ -438,3 +444,30 @@ def cek_dependensi(
         raise
     finally:
         logger.close()
+
+
+def _check_ttl_s():
+    try:
+        return max(0.0, float(os.environ.get("YTCLIPPER_DEPS_CHECK_TTL_S", "300")))
+    except Exception:
+        return 300.0
+
+
+def cek_dependensi_cached(install_whisper=False):
+    """
+    cek_dependensi() yang hasil suksesnya diingat per proses selama YTCLIPPER_DEPS_CHECK_TTL_S detik,
+    jadi job beruntun (mis. anak-anak satu batch) tidak cek ulang yt-dlp/ffmpeg tiap job. Cek yang
+    barengan diantrikan, jadi pip/download ffmpeg tidak jalan dobel.
+
+    Returns:
+        bool: True kalau cek beneran dijalankan, False kalau pakai hasil sebelumnya.
+    """
+    ttl = _check_ttl_s()
+    with _CHECK_LOCK:
+        now = time.monotonic()
+        keys = (True,) if install_whisper else (False, True)
+        if ttl > 0 and any(now - _CHECKED.get(k, float("-inf")) < ttl for k in keys):
+            return False
+        cek_dependensi(install_whisper=install_whisper)
+        _CHECKED[bool(install_whisper)] = time.monotonic()
+        return True
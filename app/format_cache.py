@@ -0,0 +1,186 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+from app.job_control import Cancelled
+
+
+_LOCK = threading.Lock()
+_STATE = None
+_DIRTY = False
+_LAST_SAVE = 0.0
+
+_MAX_VIDEOS = 5000
+_SAVE_INTERVAL_S = 5.0
+_DEMOTE_MIN_ATTEMPTS = 4
+_DEMOTE_FAIL_RATE = 0.5
+
+YT_CLIENT = "youtube:player_client=android,ios"
+
+
+def cache_path():
+    p = os.environ.get("YTCLIPPER_FORMAT_CACHE_PATH")
+    if p:
+        return str(p)
+    return os.path.join(os.path.expanduser("~"), ".ytclipper_format_cache.json")
+
+
+def client_profile(kind):
+    return f"{kind}|{YT_CLIENT}"
+
+
+def _empty_state():
+    return {"videos": {}, "selectors": {}, "stats": {"hits": 0, "misses": 0, "fallbacks": 0, "wasted_runs": 0}}
+
+
+def _load():
+    global _STATE
+    if _STATE is not None:
+        return _STATE
+    state = _empty_state()
+    try:
+        with open(cache_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            for k in ("videos", "selectors", "stats"):
+                if isinstance(data.get(k), dict):
+                    state[k].update(data[k])
+    except Exception:
+        pass
+    _STATE = state
+    return _STATE
+
+
+def _save_locked(force=False):
+    global _DIRTY, _LAST_SAVE
+    if not _DIRTY:
+        return
+    now = time.time()
+    if not force and (now - _LAST_SAVE) < _SAVE_INTERVAL_S:
+        return
+    path = cache_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_STATE, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        _DIRTY = False
+        _LAST_SAVE = now
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+
+
+def flush():
+    with _LOCK:
+        if _STATE is not None:
+            _save_locked(force=True)
+
+
+atexit.register(flush)
+
+
+def ordered_candidates(video_id, profile, candidates):
+    """
+    Urutkan format selector: yang terakhir sukses untuk video+profile ini duluan, lalu
+    urutan default dengan selector yang sering gagal (lintas video) diturunin ke belakang.
+    """
+    candidates = list(candidates)
+    with _LOCK:
+        state = _load()
+        sel_stats = state["selectors"].get(profile) or {}
+        preferred = (state["videos"].get(f"{profile}|{video_id}") or {}).get("selector")
+
+    def _demoted(fmt):
+        st = sel_stats.get(fmt) or {}
+        ok = int(st.get("ok", 0) or 0)
+        fail = int(st.get("fail", 0) or 0)
+        total = ok + fail
+        return total >= _DEMOTE_MIN_ATTEMPTS and (float(fail) / float(total)) > _DEMOTE_FAIL_RATE
+
+    order = sorted(range(len(candidates)), key=lambda i: (_demoted(candidates[i]), i))
+    ordered = [candidates[i] for i in order]
+    if preferred in ordered:
+        ordered.remove(preferred)
+        ordered.insert(0, preferred)
+    return ordered
+
+
+def record_result(video_id, profile, selector, ok):
+    global _DIRTY
+    with _LOCK:
+        state = _load()
+        per_profile = state["selectors"].setdefault(profile, {})
+        st = per_profile.setdefault(selector, {"ok": 0, "fail": 0})
+        if ok:
+            st["ok"] = int(st.get("ok", 0)) + 1
+            videos = state["videos"]
+            videos[f"{profile}|{video_id}"] = {"selector": selector, "ts": float(time.time())}
+            if len(videos) > _MAX_VIDEOS:
+                for k, _ in sorted(videos.items(), key=lambda kv: float(kv[1].get("ts", 0)))[: len(videos) - _MAX_VIDEOS]:
+                    videos.pop(k, None)
+        else:
+            st["fail"] = int(st.get("fail", 0)) + 1
+            state["stats"]["wasted_runs"] = int(state["stats"].get("wasted_runs", 0)) + 1
+        _DIRTY = True
+        _save_locked()
+
+
+def _count(kind):
+    global _DIRTY
+    with _LOCK:
+        stats = _load()["stats"]
+        stats[kind] = int(stats.get(kind, 0)) + 1
+        _DIRTY = True
+
+
+def note_lookup(video_id, profile, attempts, succeeded):
+    with _LOCK:
+        known = f"{profile}|{video_id}" in _load()["videos"]
+    if not known:
+        _count("misses")
+    elif attempts <= 1 and succeeded:
+        _count("hits")
+    else:
+        _count("fallbacks")
+
+
+def run_candidates(video_id, profile, candidates, attempt):
+    """
+    Jalankan attempt(fmt) per selector sesuai urutan hasil belajar, catat sukses/gagalnya.
+    Mengembalikan (fmt, hasil attempt) dari selector pertama yang sukses.
+    """
+    last_error = None
+    attempts = 0
+    for fmt in ordered_candidates(video_id, profile, candidates):
+        attempts += 1
+        try:
+            result = attempt(fmt)
+        except Cancelled:
+            raise
+        except Exception as e:
+            last_error = e
+            record_result(video_id, profile, fmt, ok=False)
+            continue
+        note_lookup(video_id, profile, attempts, succeeded=True)
+        record_result(video_id, profile, fmt, ok=True)
+        return fmt, result
+    note_lookup(video_id, profile, attempts, succeeded=False)
+    if last_error:
+        raise last_error
+    raise ValueError("Tidak ada format selector yang dicoba.")
+
+
+def stats():
+    with _LOCK:
+        state = _load()
+        out = dict(state["stats"])
+        out["videos"] = len(state["videos"])
+        out["selectors"] = {p: {k: dict(v) for k, v in sel.items()} for p, sel in state["selectors"].items()}
+        out["path"] = cache_path()
+        return out
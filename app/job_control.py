@@ -0,0 +1,177 @@
+import contextlib
+import contextvars
+import functools
+import os
+import subprocess
+import threading
+
+
+_LOCK = threading.Lock()
+_TOKENS = {}
+_CURRENT = contextvars.ContextVar("ytclipper_cancel_token", default=None)
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _grace_s():
+    try:
+        return max(0.0, float(os.environ.get("YTCLIPPER_CANCEL_GRACE_S", "3")))
+    except Exception:
+        return 3.0
+
+
+class CancelToken:
+    """
+    Token pembatalan satu job. Child process yang didaftarkan lewat track() di-terminate waktu
+    cancel(), lalu di-kill kalau masih hidup setelah YTCLIPPER_CANCEL_GRACE_S.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._procs = set()
+        self.reason = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled("Job dibatalkan.")
+
+    def cancel(self, reason=None):
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self._event.set()
+        with self._lock:
+            procs = list(self._procs)
+        for p in procs:
+            _terminate(p)
+        if procs:
+            t = threading.Timer(_grace_s(), lambda: [_kill(p) for p in procs])
+            t.daemon = True
+            t.start()
+
+    @contextlib.contextmanager
+    def track(self, proc):
+        with self._lock:
+            self._procs.add(proc)
+        if self._event.is_set():
+            _terminate(proc)
+        try:
+            yield proc
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+
+    def process_count(self):
+        with self._lock:
+            return len(self._procs)
+
+
+def _terminate(proc):
+    try:
+        if proc.poll() is None:
+            proc.terminate()
+    except Exception:
+        pass
+
+
+def _kill(proc):
+    try:
+        if proc.poll() is None:
+            proc.kill()
+    except Exception:
+        pass
+
+
+def new_token(job_id):
+    token = CancelToken(job_id)
+    with _LOCK:
+        _TOKENS[job_id] = token
+    return token
+
+
+def get_token(job_id):
+    with _LOCK:
+        return _TOKENS.get(job_id)
+
+
+def drop_token(job_id):
+    with _LOCK:
+        _TOKENS.pop(job_id, None)
+
+
+def cancel(job_id, reason=None):
+    """Batalkan job yang jalan di proses ini. Returns: True kalau token-nya ada."""
+    token = get_token(job_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
+
+
+@contextlib.contextmanager
+def activate(token):
+    """Jadikan token aktif di context ini (dan thread yang dijalankan lewat wrap())."""
+    reset = _CURRENT.set(token)
+    try:
+        yield token
+    finally:
+        _CURRENT.reset(reset)
+
+
+def current():
+    return _CURRENT.get()
+
+
+def is_cancelled():
+    token = _CURRENT.get()
+    return bool(token and token.cancelled)
+
+
+def check():
+    """Checkpoint antar stage: raise Cancelled kalau job di context ini sudah dibatalkan."""
+    token = _CURRENT.get()
+    if token is not None:
+        token.check()
+
+
+def wrap(fn):
+    """
+    Bungkus fn supaya jalan di salinan context sekarang (token job & log job ikut ke thread pool).
+    Panggil sekali per submit: satu Context tidak bisa dijalankan dua thread barengan.
+    """
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def track(proc):
+    token = _CURRENT.get()
+    if token is None:
+        return contextlib.nullcontext(proc)
+    return token.track(proc)
+
+
+def run_process(cmd, stdin=None, timeout=None):
+    """
+    Pengganti subprocess.run(check=True, stdout/stderr PIPE, text=True) yang child process-nya
+    ikut dimatikan kalau job di context ini dibatalkan.
+    """
+    check()
+    proc = subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    with track(proc):
+        try:
+            out, err = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            out, err = proc.communicate()
+            raise subprocess.TimeoutExpired(cmd, timeout, output=out, stderr=err)
+    check()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, output=out, stderr=err)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout=out, stderr=err)
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+
+_LOCK = threading.Lock()
+_SUBSCRIBERS = {}
+
+# field job yang dikirim di event "status"
+STATUS_FIELDS = (
+    "running",
+    "done",
+    "percent",
+    "status",
+    "stage",
+    "eta",
+    "error",
+    "output_dir",
+    "success_count",
+    "queue_position",
+    "outputs",
+    "clips",
+    "children",
+)
+# baris log maksimal per event "log"
+LOG_PAGE_LINES = 2500
+RETRY_MS = 2000
+
+
+def _env_float(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return float(default)
+    try:
+        return float(str(v).strip())
+    except Exception:
+        return float(default)
+
+
+def heartbeat_s():
+    return max(1.0, _env_float("YTCLIPPER_SSE_HEARTBEAT_S", 15.0))
+
+
+def poll_s():
+    # perubahan dari proses server lain tidak lewat pub/sub, jadi store tetap dicek paling lambat tiap segini
+    return max(0.1, _env_float("YTCLIPPER_SSE_POLL_S", 1.0))
+
+
+class _Subscriber:
+    def __init__(self, loop):
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # event loop-nya sudah ditutup
+            pass
+
+
+def subscribe(job_id):
+    """Daftar ke notifikasi job ini. Harus dipanggil dari dalam event loop yang nunggu event-nya."""
+    sub = _Subscriber(asyncio.get_running_loop())
+    with _LOCK:
+        _SUBSCRIBERS.setdefault(job_id, set()).add(sub)
+    return sub
+
+
+def unsubscribe(job_id, sub):
+    with _LOCK:
+        subs = _SUBSCRIBERS.get(job_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            _SUBSCRIBERS.pop(job_id, None)
+
+
+def publish(job_id):
+    """Bangunin semua stream SSE job ini (dipanggil dari thread mana saja, murah kalau tidak ada subscriber)."""
+    with _LOCK:
+        subs = list(_SUBSCRIBERS.get(job_id) or ())
+    for sub in subs:
+        sub.notify()
+
+
+def subscriber_count(job_id=None):
+    with _LOCK:
+        if job_id is not None:
+            return len(_SUBSCRIBERS.get(job_id) or ())
+        return sum(len(s) for s in _SUBSCRIBERS.values())
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+def parse_event_id(value):
+    try:
+        return max(0, int(str(value).strip()))
+    except Exception:
+        return 0
+
+
+async def stream(job_id, get_job, read_logs, last_event_id=None):
+    """
+    Generator SSE satu job: event "log" (baris log baru), "status" (kalau ada field yang berubah),
+    "clip" (clip yang baru selesai), lalu "done" waktu job selesai. id event = cursor log, jadi
+    reconnect dengan Last-Event-ID lanjut dari baris log terakhir yang sudah diterima.
+
+    Args:
+        get_job (callable): get_job(job_id, with_logs) -> dict | None.
+        read_logs (callable): read_logs(job_id, since, limit) -> {"lines", "cursor", "truncated"}.
+    """
+    cursor = parse_event_id(last_event_id)
+    sub = subscribe(job_id)
+    last_state = None
+    done_clips = set()
+    last_sent = time.monotonic()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            sub.event.clear()
+            job = await asyncio.to_thread(get_job, job_id, False)
+            if not job:
+                yield format_event("error", {"error": "Job tidak ditemukan."})
+                return
+            page = await asyncio.to_thread(read_logs, job_id, cursor, LOG_PAGE_LINES)
+            out = []
+            if page["lines"] or page["truncated"]:
+                cursor = page["cursor"]
+                out.append(format_event("log", {"text": "".join(page["lines"]), "truncated": page["truncated"]}, cursor))
+            for clip in job.get("clips") or []:
+                if clip.get("stage") == "clip_done" and clip.get("index") not in done_clips:
+                    done_clips.add(clip.get("index"))
+                    out.append(format_event("clip", clip, cursor))
+            state = {k: job.get(k) for k in STATUS_FIELDS}
+            if state != last_state:
+                out.append(format_event("status", state, cursor))
+                last_state = state
+            if out:
+                yield "".join(out)
+                last_sent = time.monotonic()
+            if len(page["lines"]) >= LOG_PAGE_LINES:
+                continue
+            if state.get("done"):
+                yield format_event("done", state, cursor)
+                return
+            wait_s = min(poll_s(), max(0.0, heartbeat_s() - (time.monotonic() - last_sent)))
+            try:
+                await asyncio.wait_for(sub.event.wait(), timeout=wait_s)
+            except asyncio.TimeoutError:
+                pass
+            if time.monotonic() - last_sent >= heartbeat_s():
+                yield ": ping\n\n"
+                last_sent = time.monotonic()
+    finally:
+        unsubscribe(job_id, sub)
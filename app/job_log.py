@@ -0,0 +1,81 @@
+import contextlib
+import contextvars
+import logging
+import sys
+import threading
+
+
+_LOCK = threading.Lock()
+_CURRENT = contextvars.ContextVar("ytclipper_job_log", default=None)
+_HANDLER = None
+
+
+class _RoutingStream:
+    """
+    Pengganti sys.stdout / sys.stderr yang dipasang sekali per proses: tulisan dikirim ke writer job
+    di context sekarang (contextvar), kalau tidak ada job ke stream aslinya (console server).
+    """
+
+    def __init__(self, original):
+        self._original = original
+
+    def write(self, s):
+        writer = _CURRENT.get()
+        if writer is None:
+            return self._original.write(s)
+        writer.write(s)
+        return len(s)
+
+    def flush(self):
+        writer = _CURRENT.get()
+        if writer is None:
+            return self._original.flush()
+        return writer.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._original, name)
+
+
+class JobLogHandler(logging.Handler):
+    """Record logging dari modul app ikut masuk ke log job yang lagi aktif di context ini."""
+
+    def emit(self, record):
+        writer = _CURRENT.get()
+        if writer is None:
+            return
+        try:
+            writer.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+def install():
+    """Pasang routing stdout/stderr + handler logging (idempotent; dipasang ulang kalau sys.stdout diganti pihak lain)."""
+    global _HANDLER
+    with _LOCK:
+        if not isinstance(sys.stdout, _RoutingStream):
+            sys.stdout = _RoutingStream(sys.stdout)
+        if not isinstance(sys.stderr, _RoutingStream):
+            sys.stderr = _RoutingStream(sys.stderr)
+        if _HANDLER is None:
+            _HANDLER = JobLogHandler()
+            _HANDLER.setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+            logging.getLogger("app").addHandler(_HANDLER)
+
+
+@contextlib.contextmanager
+def activate(writer):
+    """
+    Semua print/logging di context ini (termasuk thread pool yang di-submit lewat job_control.wrap)
+    masuk ke writer.write(); job lain dan console server tidak ikut kecampur.
+    """
+    install()
+    token = _CURRENT.set(writer)
+    try:
+        yield writer
+    finally:
+        _CURRENT.reset(token)
+
+
+def current():
+    return _CURRENT.get()
@@ -0,0 +1,166 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import traceback
+from multiprocessing.connection import wait
+
+
+_LOCK = threading.Lock()
+_IDLE = []
+_BUSY = {}
+_STATS = {"started": 0, "recycled": 0, "crashed": 0}
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+def _env_int(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return int(default)
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return int(default)
+
+
+def process_mode():
+    """Job dijalankan di proses worker terpisah (YTCLIPPER_JOB_EXECUTOR=process), default di thread server."""
+    return str(os.environ.get("YTCLIPPER_JOB_EXECUTOR") or "thread").strip().lower() == "process"
+
+
+def max_jobs_per_worker():
+    return max(1, _env_int("YTCLIPPER_JOB_WORKER_MAX_JOBS", 20))
+
+
+def max_worker_rss_bytes():
+    return max(0, _env_int("YTCLIPPER_JOB_WORKER_MAX_RSS_MB", 0)) * 1024 * 1024
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+def _worker_main(conn):
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, job_id, args = task
+        try:
+            fn(job_id, *args)
+            conn.send(("ok", None, _rss_bytes()))
+        except BaseException:
+            conn.send(("error", traceback.format_exc(), _rss_bytes()))
+
+
+class _Worker:
+    def __init__(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), name="ytclipper-job-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.rss = None
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _acquire():
+    with _LOCK:
+        while _IDLE:
+            w = _IDLE.pop()
+            if w.process.is_alive():
+                return w
+            w.conn.close()
+        _STATS["started"] += 1
+    return _Worker()
+
+
+def _release(worker):
+    too_big = max_worker_rss_bytes() and (worker.rss or 0) > max_worker_rss_bytes()
+    if worker.jobs >= max_jobs_per_worker() or too_big:
+        with _LOCK:
+            _STATS["recycled"] += 1
+        worker.stop()
+        return
+    with _LOCK:
+        _IDLE.append(worker)
+
+
+def run(fn, job_id, *args):
+    """
+    Jalankan fn(job_id, *args) di proses worker (dipakai ulang, di-recycle tiap YTCLIPPER_JOB_WORKER_MAX_JOBS job
+    atau kalau RSS-nya lewat YTCLIPPER_JOB_WORKER_MAX_RSS_MB). State job dibagi lewat job store (SQLite), jadi
+    yang dikirim balik cuma selesai/gagal. fn harus bisa di-pickle (fungsi level modul).
+
+    Raises:
+        WorkerCrashed: proses worker mati di tengah job (segfault, OOM kill, dll.).
+        RuntimeError: fn raise exception di worker (traceback-nya ikut di pesan).
+    """
+    worker = _acquire()
+    with _LOCK:
+        _BUSY[job_id] = worker
+    try:
+        try:
+            worker.conn.send((fn, job_id, args))
+        except Exception:
+            _release(worker)
+            raise
+        wait([worker.conn, worker.process.sentinel])
+        if not worker.conn.poll():
+            worker.process.join(5)
+            with _LOCK:
+                _STATS["crashed"] += 1
+            worker.conn.close()
+            raise WorkerCrashed(f"Proses worker job mati (exit code {worker.process.exitcode}).")
+        status, detail, worker.rss = worker.conn.recv()
+        worker.jobs += 1
+        _release(worker)
+        if status != "ok":
+            raise RuntimeError(detail)
+    finally:
+        with _LOCK:
+            _BUSY.pop(job_id, None)
+
+
+def stats():
+    with _LOCK:
+        workers = [{"pid": w.process.pid, "jobs": w.jobs, "rss_bytes": w.rss, "job_id": None} for w in _IDLE]
+        workers += [{"pid": w.process.pid, "jobs": w.jobs, "rss_bytes": w.rss, "job_id": jid} for jid, w in _BUSY.items()]
+        return {
+            "mode": "process" if process_mode() else "thread",
+            "max_jobs_per_worker": max_jobs_per_worker(),
+            "workers": workers,
+            **_STATS,
+        }
+
+
+def shutdown():
+    with _LOCK:
+        idle = list(_IDLE)
+        _IDLE.clear()
+    for w in idle:
+        w.stop()
+
+
+atexit.register(shutdown)
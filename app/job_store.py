@@ -0,0 +1,478 @@
+import atexit
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+
+_LOCAL = threading.local()
+_INIT_LOCK = threading.Lock()
+_INITIALIZED = set()
+
+_BUF_LOCK = threading.Lock()
+_BUF_COND = threading.Condition(_BUF_LOCK)
+_BUF = {}
+_BUF_LINES = 0
+_FLUSHER = None
+_FLUSH_LOCK = threading.Lock()
+
+# log per job = ring buffer: kalau lewat _LOG_MAX_LINES dipangkas jadi _LOG_KEEP_LINES terakhir,
+# kalau lewat YTCLIPPER_JOB_LOG_MAX_BYTES dipangkas jadi 2/3-nya. id baris tetap naik terus (cursor klien).
+_LOG_MAX_LINES = 6000
+_LOG_KEEP_LINES = 4000
+_LOG_COUNTS = {}
+
+# field job yang masih disimpan setelah job selesai diarsipkan (log & detail progress dibuang)
+ARCHIVE_FIELDS = (
+    "id",
+    "running",
+    "done",
+    "percent",
+    "stage",
+    "status",
+    "eta",
+    "error",
+    "created_at",
+    "output_dir",
+    "success_count",
+    "outputs",
+    "cancel_requested",
+    "kind",
+    "children",
+    "parent_id",
+)
+# baris log terakhir yang ikut disimpan di ringkasan arsip
+ARCHIVE_LOG_TAIL = 20
+_LAST_EVICT = 0.0
+
+
+def _env_int(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return int(default)
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return int(default)
+
+
+def _env_float(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return float(default)
+    try:
+        return float(str(v).strip())
+    except Exception:
+        return float(default)
+
+
+def db_path():
+    p = os.environ.get("YTCLIPPER_JOB_DB_PATH")
+    if p:
+        return str(p)
+    return os.path.join(os.path.expanduser("~"), ".ytclipper_jobs.sqlite3")
+
+
+def journal_mode():
+    """
+    Mode journal SQLite job store. WAL butuh shared memory di satu host, jadi di mode broker multi-node
+    (database dibuka banyak mesin lewat network filesystem) default-nya DELETE.
+    """
+    default = "delete" if str(os.environ.get("YTCLIPPER_JOB_EXECUTOR") or "").strip().lower() == "broker" else "wal"
+    mode = str(os.environ.get("YTCLIPPER_JOB_DB_JOURNAL_MODE") or default).strip().lower()
+    return mode if mode in ("wal", "delete", "truncate") else default
+
+
+def _init_db(conn):
+    conn.execute(f"PRAGMA journal_mode={journal_mode().upper()}")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        " id TEXT PRIMARY KEY,"
+        " data TEXT NOT NULL,"
+        " created_at REAL NOT NULL,"
+        " updated_at REAL NOT NULL)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS job_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, text TEXT NOT NULL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS job_logs_job ON job_logs (job_id, id)")
+    # floor = id baris terakhir yang sudah kebuang dari ring buffer
+    conn.execute("CREATE TABLE IF NOT EXISTS job_log_floor (job_id TEXT PRIMARY KEY, floor INTEGER NOT NULL)")
+
+
+def _conn():
+    """Koneksi SQLite per thread (sqlite3 tidak boleh dipakai lintas thread) per path database."""
+    path = db_path()
+    conns = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    conn = conns.get(path)
+    if conn is not None:
+        return conn
+    os.makedirs(os.path.dirname(os.path.abspath(path)) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA busy_timeout=30000")
+    # synchronous berlaku per koneksi; journal_mode tersimpan di file database
+    conn.execute("PRAGMA synchronous=NORMAL" if journal_mode() == "wal" else "PRAGMA synchronous=FULL")
+    with _INIT_LOCK:
+        if path not in _INITIALIZED:
+            _init_db(conn)
+            _INITIALIZED.add(path)
+    conns[path] = conn
+    return conn
+
+
+class _Tx:
+    """BEGIN IMMEDIATE ... COMMIT: read-modify-write job aman walau ada beberapa proses server."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def transaction():
+    """Transaksi BEGIN IMMEDIATE langsung di database job store."""
+    return _Tx(_conn())
+
+
+def create(job):
+    job = dict(job)
+    job.pop("logs", None)
+    now = time.time()
+    with _Tx(_conn()) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, data, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (job["id"], json.dumps(job, ensure_ascii=False), float(job.get("created_at") or now), now),
+        )
+        conn.execute("DELETE FROM job_logs WHERE job_id = ?", (job["id"],))
+        conn.execute("DELETE FROM job_log_floor WHERE job_id = ?", (job["id"],))
+    try:
+        _maybe_evict()
+    except Exception:
+        pass
+
+
+def update(job_id, fields):
+    fields = dict(fields)
+    fields.pop("logs", None)
+    with _Tx(_conn()) as conn:
+        row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return False
+        data = json.loads(row[0])
+        data.update(fields)
+        conn.execute("UPDATE jobs SET data = ?, updated_at = ? WHERE id = ?", (json.dumps(data, ensure_ascii=False), time.time(), job_id))
+    return True
+
+
+def get(job_id, with_logs=True):
+    """
+    Snapshot job (dict) plus "logs" (list baris log) dan "updated_at", atau None.
+    Log yang masih di buffer proses ini di-flush dulu biar langsung kelihatan.
+    """
+    if with_logs:
+        flush_logs(job_id)
+    conn = _conn()
+    row = conn.execute("SELECT data, updated_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if not row:
+        return None
+    job = json.loads(row[0])
+    job["updated_at"] = float(row[1])
+    if with_logs:
+        job["logs"] = [r[0] for r in conn.execute("SELECT text FROM job_logs WHERE job_id = ? ORDER BY id", (job_id,))]
+        if job.get("archived") and not job["logs"]:
+            job["logs"] = list(job.get("log_tail") or [])
+    return job
+
+
+def log_cursor(job_id):
+    """id baris log terakhir job ini (0 kalau belum ada). Buffer proses ini di-flush dulu."""
+    flush_logs(job_id)
+    row = _conn().execute("SELECT MAX(id) FROM job_logs WHERE job_id = ?", (job_id,)).fetchone()
+    return int(row[0] or 0)
+
+
+def read_logs(job_id, since=0, limit=None):
+    """
+    Baris log job setelah cursor since (id baris terakhir yang sudah diterima klien).
+
+    Returns:
+        dict: {"lines": [...], "cursor": int, "truncated": bool}. truncated = ada baris setelah since
+        yang sudah kebuang dari ring buffer, jadi klien sebaiknya mulai ulang tampilan log-nya.
+    """
+    flush_logs(job_id)
+    since = max(0, int(since or 0))
+    conn = _conn()
+    sql = "SELECT id, text FROM job_logs WHERE job_id = ? AND id > ? ORDER BY id"
+    args = (job_id, since)
+    if limit:
+        sql += " LIMIT ?"
+        args += (int(limit),)
+    rows = conn.execute(sql, args).fetchall()
+    floor = conn.execute("SELECT floor FROM job_log_floor WHERE job_id = ?", (job_id,)).fetchone()
+    return {
+        "lines": [r[1] for r in rows],
+        "cursor": int(rows[-1][0]) if rows else since,
+        "truncated": bool(floor and since < int(floor[0])),
+    }
+
+
+def list_ids(running=None):
+    rows = _conn().execute("SELECT id, data FROM jobs ORDER BY created_at").fetchall()
+    if running is None:
+        return [r[0] for r in rows]
+    return [r[0] for r in rows if bool(json.loads(r[1]).get("running")) == bool(running)]
+
+
+def touch(job_id):
+    _conn().execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+
+def _log_max_bytes():
+    return max(4096, _env_int("YTCLIPPER_JOB_LOG_MAX_BYTES", 2_000_000))
+
+
+def _buffer_limit():
+    return max(1, _env_int("YTCLIPPER_JOB_LOG_BUFFER_LINES", 500))
+
+
+def append_log(job_id, text):
+    """
+    Tambah log ke buffer write-behind. Buffer di-flush thread background tiap
+    YTCLIPPER_JOB_LOG_FLUSH_S; kalau penuh, pemanggil ikut flush (back-pressure, memori tetap terbatas).
+    """
+    global _BUF_LINES
+    if not text:
+        return
+    _ensure_flusher()
+    with _BUF_COND:
+        _BUF.setdefault(job_id, []).append(str(text))
+        _BUF_LINES += 1
+        full = _BUF_LINES >= _buffer_limit()
+        if full:
+            _BUF_COND.notify()
+    if full:
+        flush_logs()
+
+
+def _take(job_id=None):
+    global _BUF_LINES
+    with _BUF_LOCK:
+        if job_id is None:
+            taken = dict(_BUF)
+            _BUF.clear()
+        else:
+            taken = {job_id: _BUF.pop(job_id)} if job_id in _BUF else {}
+        _BUF_LINES -= sum(len(v) for v in taken.values())
+    return taken
+
+
+def flush_logs(job_id=None):
+    # satu flush dalam satu waktu supaya urutan log per job tetap sama dengan urutan append
+    global _BUF_LINES
+    with _FLUSH_LOCK:
+        taken = _take(job_id)
+        if not taken:
+            return
+        try:
+            _write_logs(taken)
+        except Exception:
+            # balikin ke depan buffer, dicoba lagi di flush berikutnya
+            with _BUF_LOCK:
+                for jid, lines in taken.items():
+                    _BUF[jid] = lines + _BUF.get(jid, [])
+                    _BUF_LINES += len(lines)
+            raise
+
+
+def _write_logs(taken):
+    max_bytes = _log_max_bytes()
+    with _Tx(_conn()) as conn:
+        for jid, lines in taken.items():
+            conn.executemany("INSERT INTO job_logs (job_id, text) VALUES (?, ?)", [(jid, t) for t in lines])
+            n, size = _LOG_COUNTS.get(jid, (0, 0))
+            n += len(lines)
+            size += sum(len(t.encode("utf-8")) for t in lines)
+            if n > _LOG_MAX_LINES - _LOG_KEEP_LINES or size > max_bytes // 3:
+                # cek ukuran sebenarnya sesekali saja (bisa ada proses lain yang nulis log job yang sama)
+                _trim_logs(conn, jid, max_bytes)
+                n, size = 0, 0
+            _LOG_COUNTS[jid] = (n, size)
+
+
+def _trim_logs(conn, jid, max_bytes):
+    cut = 0
+    total = conn.execute("SELECT COUNT(*) FROM job_logs WHERE job_id = ?", (jid,)).fetchone()[0]
+    if total > _LOG_MAX_LINES:
+        row = conn.execute("SELECT id FROM job_logs WHERE job_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?", (jid, _LOG_KEEP_LINES)).fetchone()
+        cut = int(row[0]) if row else 0
+    size = conn.execute("SELECT SUM(LENGTH(CAST(text AS BLOB))) FROM job_logs WHERE job_id = ? AND id > ?", (jid, cut)).fetchone()[0]
+    if (size or 0) > max_bytes:
+        row = conn.execute(
+            "SELECT id FROM (SELECT id, SUM(LENGTH(CAST(text AS BLOB))) OVER (ORDER BY id DESC) AS acc FROM job_logs WHERE job_id = ?)"
+            " WHERE acc > ? ORDER BY id DESC LIMIT 1",
+            (jid, max_bytes * 2 // 3),
+        ).fetchone()
+        cut = max(cut, int(row[0]) if row else 0)
+    if not cut:
+        return
+    conn.execute("DELETE FROM job_logs WHERE job_id = ? AND id <= ?", (jid, cut))
+    conn.execute(
+        "INSERT INTO job_log_floor (job_id, floor) VALUES (?, ?) ON CONFLICT(job_id) DO UPDATE SET floor = MAX(floor, excluded.floor)",
+        (jid, cut),
+    )
+
+
+def retention_s():
+    return max(60.0, _env_float("YTCLIPPER_JOB_RETENTION_S", 86400))
+
+
+def log_budget_bytes():
+    return max(1_000_000, _env_int("YTCLIPPER_JOB_LOG_BUDGET_BYTES", 50_000_000))
+
+
+def archive_keep_s():
+    return max(retention_s(), _env_float("YTCLIPPER_JOB_ARCHIVE_KEEP_S", 30 * 86400))
+
+
+def _archive(conn, job_id, data, now):
+    tail = [r[0] for r in conn.execute("SELECT text FROM job_logs WHERE job_id = ? ORDER BY id DESC LIMIT ?", (job_id, ARCHIVE_LOG_TAIL))]
+    lines, size = conn.execute("SELECT COUNT(*), SUM(LENGTH(CAST(text AS BLOB))) FROM job_logs WHERE job_id = ?", (job_id,)).fetchone()
+    summary = {k: data[k] for k in ARCHIVE_FIELDS if k in data}
+    summary["clips"] = [{"index": c.get("index"), "ok": c.get("ok")} for c in data.get("clips") or [] if isinstance(c, dict)]
+    summary.update(archived=True, archived_at=now, log_lines=int(lines or 0), log_bytes=int(size or 0), log_tail=tail[::-1])
+    conn.execute("UPDATE jobs SET data = ?, updated_at = ? WHERE id = ?", (json.dumps(summary, ensure_ascii=False), now, job_id))
+    conn.execute("DELETE FROM job_logs WHERE job_id = ?", (job_id,))
+    conn.execute("DELETE FROM job_log_floor WHERE job_id = ?", (job_id,))
+    _LOG_COUNTS.pop(job_id, None)
+
+
+def evict(now=None):
+    """
+    Terapkan retensi job yang sudah selesai: yang lebih tua dari YTCLIPPER_JOB_RETENTION_S, atau yang paling
+    lama kalau total log semua job lewat YTCLIPPER_JOB_LOG_BUDGET_BYTES, diarsipkan jadi ringkasan (status,
+    error, output, beberapa baris log terakhir). Arsip yang lebih tua dari YTCLIPPER_JOB_ARCHIVE_KEEP_S dihapus.
+
+    Returns:
+        dict: {"archived": [job_id], "purged": int}
+    """
+    now = time.time() if now is None else float(now)
+    flush_logs()
+    archived = []
+    with _Tx(_conn()) as conn:
+        sizes = dict(conn.execute("SELECT job_id, SUM(LENGTH(CAST(text AS BLOB))) FROM job_logs GROUP BY job_id").fetchall())
+        total = sum(int(v or 0) for v in sizes.values())
+        budget = log_budget_bytes()
+        for job_id, raw, updated_at in conn.execute("SELECT id, data, updated_at FROM jobs ORDER BY updated_at").fetchall():
+            data = json.loads(raw)
+            if not data.get("done") or data.get("running") or data.get("archived"):
+                continue
+            if float(updated_at) > now - retention_s() and total <= budget:
+                continue
+            _archive(conn, job_id, data, now)
+            total -= int(sizes.get(job_id) or 0)
+            archived.append(job_id)
+        purged = conn.execute(
+            "DELETE FROM jobs WHERE updated_at < ? AND json_extract(data, '$.archived') = 1", (now - archive_keep_s(),)
+        ).rowcount
+    return {"archived": archived, "purged": int(purged or 0)}
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return int(rss) if sys.platform == "darwin" else int(rss) * 1024
+    except Exception:
+        return None
+
+
+def stats():
+    """Ukuran tabel job (database) dan memori yang dipegang proses ini untuk job."""
+    conn = _conn()
+    counts = {"running": 0, "finished": 0, "archived": 0, "queued": 0}
+    for (raw,) in conn.execute("SELECT data FROM jobs"):
+        data = json.loads(raw)
+        if data.get("archived"):
+            counts["archived"] += 1
+        elif data.get("running"):
+            counts["running"] += 1
+        elif data.get("done"):
+            counts["finished"] += 1
+        else:
+            counts["queued"] += 1
+    lines, size = conn.execute("SELECT COUNT(*), SUM(LENGTH(CAST(text AS BLOB))) FROM job_logs").fetchone()
+    path = db_path()
+    db_bytes = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+    with _BUF_LOCK:
+        buffered = _BUF_LINES
+        buffered_bytes = sum(len(t) for lines_ in _BUF.values() for t in lines_)
+    return {
+        "path": path,
+        "jobs": sum(counts.values()),
+        **counts,
+        "log_lines": int(lines or 0),
+        "log_bytes": int(size or 0),
+        "log_budget_bytes": log_budget_bytes(),
+        "db_bytes": db_bytes,
+        "buffered_log_lines": buffered,
+        "buffered_log_bytes": buffered_bytes,
+        "tracked_log_counters": len(_LOG_COUNTS),
+        "rss_bytes": _rss_bytes(),
+        "retention_s": retention_s(),
+    }
+
+
+def _maybe_evict():
+    global _LAST_EVICT
+    now = time.monotonic()
+    if now - _LAST_EVICT < max(1.0, _env_float("YTCLIPPER_JOB_EVICT_INTERVAL_S", 60)):
+        return
+    _LAST_EVICT = now
+    evict()
+
+
+def _flush_loop():
+    while True:
+        interval = max(0.05, _env_float("YTCLIPPER_JOB_LOG_FLUSH_S", 0.5))
+        with _BUF_COND:
+            _BUF_COND.wait(timeout=interval)
+        try:
+            flush_logs()
+            _maybe_evict()
+        except Exception:
+            time.sleep(interval)
+
+
+def _ensure_flusher():
+    global _FLUSHER
+    if _FLUSHER is not None:
+        return
+    with _INIT_LOCK:
+        if _FLUSHER is None:
+            t = threading.Thread(target=_flush_loop, name="job-log-flush", daemon=True)
+            t.start()
+            _FLUSHER = t
+
+
+def _flush_at_exit():
+    try:
+        flush_logs()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
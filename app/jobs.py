@@ -1,12 +1,28 @@
 import contextlib
+import os
 import threading
 import time
 
+from app import broker, job_control, job_events, job_log, job_pool, job_store, scheduler
 from app.clipper import format_hhmmss, proses_dengan_segmen
+from app.progress import ClipProgress
 
 
-_JOBS_LOCK = threading.Lock()
-_JOBS = {}
+_HEARTBEAT_S = 30.0
+# seberapa sering heartbeat ngecek flag cancel_requested di job store (cancel dari proses server lain)
+_CANCEL_POLL_S = 2.0
+
+_BATCH_LOCK = threading.Lock()
+# job anak batch -> job parent, biar update anak ikut membangunkan stream SSE parent di proses ini
+_BATCH_PARENT = {}
+
+
+def _stale_after_s():
+    # job yang masih "running" tapi tidak ada update selama ini dianggap yatim (prosesnya mati/restart)
+    try:
+        return max(_HEARTBEAT_S * 2, float(os.environ.get("YTCLIPPER_JOB_STALE_S", "300")))
+    except Exception:
+        return 300.0
 
 
 class JobWriter:
@@ -23,29 +39,42 @@ class JobWriter:
 
 
 def append_job_log(job_id, text):
-    with _JOBS_LOCK:
-        job = _JOBS.get(job_id)
-        if not job:
-            return
-        job["logs"].append(text)
-        if len(job["logs"]) > 6000:
-            job["logs"] = job["logs"][-4000:]
+    job_store.append_log(job_id, text)
+    job_events.publish(job_id)
 
 
 def update_job(job_id, **kwargs):
-    with _JOBS_LOCK:
-        job = _JOBS.get(job_id)
-        if not job:
-            return
-        job.update(kwargs)
+    job_store.update(job_id, kwargs)
+    job_events.publish(job_id)
+    with _BATCH_LOCK:
+        parent = _BATCH_PARENT.pop(job_id, None) if kwargs.get("done") else _BATCH_PARENT.get(job_id)
+    if parent:
+        job_events.publish(parent)
 
 
-def get_job(job_id):
-    with _JOBS_LOCK:
-        job = _JOBS.get(job_id)
-        if not job:
-            return None
-        return dict(job)
+def read_job_logs(job_id, since=0, limit=None):
+    return job_store.read_logs(job_id, since=since, limit=limit)
+
+
+def job_log_cursor(job_id):
+    return job_store.log_cursor(job_id)
+
+
+def get_job(job_id, with_logs=True):
+    job = job_store.get(job_id, with_logs=with_logs)
+    if not job:
+        return None
+    if job.get("kind") == "batch":
+        # parent batch tidak punya heartbeat sendiri: hidup/matinya diambil dari job anak (yang dicek stale masing-masing)
+        if not job.get("done"):
+            job = _aggregate_batch(job, with_logs)
+        return job
+    if job.get("running") and time.time() - float(job.get("updated_at") or 0) > _stale_after_s():
+        err = "Job terputus (server restart atau proses worker mati)."
+        fields = {"running": False, "done": True, "stage": "error", "status": "Error", "eta": "", "error": err}
+        job_store.update(job_id, fields)
+        job.update(fields)
+    return job
 
 
 def create_job(job_id, output_dir):
@@ -62,71 +91,204 @@ def create_job(job_id, output_dir):
         "created_at": time.time(),
         "output_dir": output_dir,
         "success_count": 0,
+        "clips": [],
     }
 
-    with _JOBS_LOCK:
-        _JOBS[job_id] = job
+    job_store.create(job)
     return job
 
 
-def run_job(job_id, payload):
+def create_batch_job(job_id, output_dir, children):
+    """
+    Job parent batch: tidak dijalankan sendiri, status & progress-nya digabung dari job anak waktu dibaca.
+
+    Args:
+        children: list {"job_id", "url", "clips"}; job anaknya dibuat terpisah lewat create_job().
+    """
+    job = create_job(job_id, output_dir)
+    entries = [{"job_id": c["job_id"], "url": c["url"], "clips": int(c.get("clips") or 0)} for c in children]
+    with _BATCH_LOCK:
+        for c in entries:
+            _BATCH_PARENT[c["job_id"]] = job_id
+    for c in entries:
+        job_store.update(c["job_id"], {"parent_id": job_id})
+    update_job(job_id, kind="batch", children=entries)
+    job.update(kind="batch", children=entries)
+    return job
+
+
+def _aggregate_batch(job, with_logs):
+    children = []
+    weight = 0
+    weighted = 0.0
+    finished = running = failed = 0
+    for entry in job.get("children") or []:
+        child = get_job(entry["job_id"], with_logs=False) or {"done": True, "stage": "error", "error": "Job anak hilang."}
+        clips = max(1, int(entry.get("clips") or 1))
+        done = bool(child.get("done"))
+        stage = str(child.get("stage") or "")
+        percent = 100.0 if done else float(child.get("percent") or 0.0)
+        weight += clips
+        weighted += percent * clips
+        finished += int(done)
+        running += int(bool(child.get("running")))
+        failed += int(done and stage in ("error", "rejected"))
+        children.append(
+            {
+                "job_id": entry["job_id"],
+                "url": entry.get("url"),
+                "clips": entry.get("clips"),
+                "stage": stage,
+                "status": str(child.get("status") or ""),
+                "percent": round(percent, 1),
+                "success_count": int(child.get("success_count") or 0),
+                "error": child.get("error"),
+                "queue_position": child.get("queue_position") or None,
+            }
+        )
+
+    total = len(children)
+    fields = {"children": children, "success_count": sum(c["success_count"] for c in children), "eta": ""}
+    if finished >= total:
+        fields.update(running=False, done=True, percent=100.0, queue_position=None)
+        if job.get("cancel_requested"):
+            fields.update(stage="cancelled", status="Dibatalkan")
+        elif total and failed >= total:
+            fields.update(stage="error", status="Error", error="Semua job di batch gagal.")
+        else:
+            fields.update(stage="done", status=f"Selesai ({failed} dari {total} job gagal)" if failed else "Selesai")
+    else:
+        queued = total - finished - running
+        fields.update(
+            running=running > 0,
+            percent=round(weighted / max(1, weight), 1),
+            stage="batch" if running or finished else "queued",
+            status=f"[{finished}/{total} job selesai] {running} jalan, {queued} antri",
+        )
+    if all(job.get(k) == v for k, v in fields.items()):
+        return job
+    job_store.update(job["id"], fields)
+    return job_store.get(job["id"], with_logs=with_logs) or job
+
+
+@contextlib.contextmanager
+def _heartbeat(job_id, token=None):
+    """
+    Sentuh updated_at job tiap _HEARTBEAT_S selama step panjang (download/Whisper) biar tidak dianggap yatim.
+    Kalau ada token, flag cancel_requested di job store juga dicek tiap _CANCEL_POLL_S.
+    """
+    stop = threading.Event()
+
+    def _loop():
+        last_touch = time.monotonic()
+        while not stop.wait(_CANCEL_POLL_S if token is not None else _HEARTBEAT_S):
+            try:
+                if token is not None and not token.cancelled:
+                    job = job_store.get(job_id, with_logs=False)
+                    if job and job.get("cancel_requested"):
+                        token.cancel()
+                if time.monotonic() - last_touch >= _HEARTBEAT_S:
+                    job_store.touch(job_id)
+                    last_touch = time.monotonic()
+            except Exception:
+                pass
+
+    t = threading.Thread(target=_loop, name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+    t.start()
+    try:
+        yield
+    finally:
+        stop.set()
+
+
+def run_job(job_id, payload, finalize=None):
+    """
+    Jalankan satu job clip sampai selesai (status, progress & log ditulis ke job store).
+
+    Args:
+        finalize: opsional, dipanggil dengan hasil proses_dengan_segmen sebelum job ditandai selesai;
+            dict yang dikembalikan menimpa field hasil (worker node pakai ini buat upload output).
+    """
     stage_text = {
         "dependency": "⚙️ Cek dependensi...",
         "duration": "📊 Ambil info video...",
         "download": "⬇️ Download video...",
         "clip": "✂️ Proses clipping...",
         "subtitle": "🤖 AI generating subtitle...",
-        "subtitle_burn": "🔥 Burning subtitle...",
+        "transcript": "🤖 Transcribe audio semua clip...",
+        "ai": "✨ AI generating judul & caption...",
     }
 
     total_clips = max(1, int(payload.get("total_clips", 1)))
     base_percent = 7.0
-    per_clip = (100.0 - base_percent) / float(total_clips)
-    clip_stage = {"download": 0.55, "clip": 0.35, "subtitle": 0.07, "subtitle_burn": 0.03}
-    if not payload.get("use_subtitle", False):
-        clip_stage = {"download": 0.60, "clip": 0.40}
+    phases = ["download", "subtitle", "clip"] if payload.get("use_subtitle", False) else ["download", "clip"]
+    durations = {
+        i: max(0.0, float(seg.get("end", 0)) - float(seg.get("start", 0)))
+        for i, seg in enumerate([s for s in payload.get("segments", []) if s.get("enabled", True)], 1)
+    }
+
+    def publish(snap):
+        percent = max(0.0, min(100.0, base_percent + snap["fraction"] * (100.0 - base_percent)))
+        eta = format_hhmmss(int(snap["eta_s"])) if snap.get("eta_s") is not None else ""
+        update_job(job_id, percent=percent, eta=eta, clips=snap["clips"])
 
-    start_ts = time.perf_counter()
-    state = {"clip_index": 1, "stage": "dependency"}
+    tracker = ClipProgress(durations, phases, publish=publish)
 
-    def push(stage, clip_index=None):
+    def push(stage, clip_index=None, ok=None, outputs=None, output_done=None):
         if clip_index is not None:
-            state["clip_index"] = int(clip_index)
-        state["stage"] = stage
-        clip_i = max(1, int(state["clip_index"]))
-        done_clips = float(clip_i - 1)
-        stage_part = clip_stage.get(stage, 0.0)
-        percent = base_percent + (done_clips + stage_part) * per_clip
-        percent = max(0.0, min(100.0, percent))
-
-        elapsed = time.perf_counter() - start_ts
-        if percent > 0.1:
-            remaining = elapsed * (100.0 - percent) / percent
-            eta = format_hhmmss(int(remaining))
+            snap = tracker.update(clip_index, stage=stage, ok=ok, outputs=outputs, output_done=output_done, force=True)
         else:
-            eta = ""
+            snap = tracker.snapshot()
+            publish(snap)
+        active = [c["index"] for c in snap["clips"] if c["stage"] != "clip_done"]
+        finished = sum(1 for c in snap["clips"] if c["stage"] == "clip_done")
 
         status_msg = stage_text.get(stage, stage)
-        if stage in ("download", "clip", "subtitle", "subtitle_burn"):
-            status_msg = f"[Clip {clip_i}/{total_clips}] {status_msg}"
+        if output_done:
+            status_msg = f"✅ Varian {output_done.get('crop_mode')} jadi: {output_done.get('file')}"
+        if stage == "clip_done":
+            status_msg = f"[{finished}/{total_clips} clip selesai]"
+            if active:
+                status_msg += f" {len(active)} clip masih diproses..."
+        elif clip_index is not None:
+            status_msg = f"[Clip {int(clip_index)}/{total_clips}] {status_msg}"
+            if len(active) > 1:
+                status_msg += f" ({len(active)} clip paralel)"
 
-        update_job(job_id, percent=percent, stage=stage, status=status_msg, eta=eta)
+        update_job(job_id, stage=stage, status=status_msg)
         print(f"📍 {status_msg}")
 
     def event_cb(evt):
         try:
-            push(evt.get("stage", ""), clip_index=evt.get("clip_index"))
+            stage = evt.get("stage", "")
+            if stage == "progress":
+                tracker.update(evt.get("clip_index"), phase=evt.get("phase"), fraction=evt.get("fraction"))
+                return
+            if stage == "plan":
+                tracker.set_durations({c["index"]: c["duration"] for c in evt.get("clips", [])})
+                return
+            if stage == "output_done":
+                push("clip", clip_index=evt.get("clip_index"), output_done=evt)
+                return
+            push(stage, clip_index=evt.get("clip_index"), ok=evt.get("ok"), outputs=evt.get("outputs"))
         except Exception:
             return
 
+    job = job_store.get(job_id, with_logs=False) or {}
+    if job.get("cancel_requested"):
+        mark_job_cancelled(job_id)
+        return
+
     update_job(job_id, running=True, percent=0.0, stage="dependency", status="🚀 Memulai...", eta="", error=None)
 
+    token = job_control.new_token(job_id)
     writer = JobWriter(job_id)
-    with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+    with job_control.activate(token), _heartbeat(job_id, token), job_log.activate(writer):
         print(f"🎬 Memproses {total_clips} clip...")
         print(f"📁 Output: {payload.get('output_dir', 'default')}")
-        print(f"🎨 Crop mode: {payload.get('crop_mode', 'default')}")
+        print(f"🎨 Crop mode: {', '.join(payload.get('crop_modes') or [payload.get('crop_mode', 'default')])}")
         print(f"📝 Subtitle: {'ON' if payload.get('use_subtitle') else 'OFF'}")
+        print(f"🎛️ Encoder profile: {payload.get('encoder_profile') or 'default'}")
         print("-" * 40)
         try:
             segments = payload["segments"]
@@ -142,7 +304,17 @@ def run_job(job_id, payload):
                 apply_padding=payload.get("apply_padding", False),
                 event_cb=event_cb,
                 gemini_api_key=payload.get("gemini_api_key"),
+                max_workers=payload.get("clip_workers"),
+                crop_modes=payload.get("crop_modes"),
+                encoder_profile=payload.get("encoder_profile"),
+                target_turnaround_s=payload.get("target_turnaround_s"),
+                source_mode=payload.get("source_mode"),
             )
+            if result.get("cancelled"):
+                _report_cancelled(job_id, result.get("success_count", 0), result.get("outputs") or [], token)
+                return
+            if finalize is not None:
+                result.update(finalize(result) or {})
             update_job(
                 job_id,
                 running=False,
@@ -154,16 +326,68 @@ def run_job(job_id, payload):
                 output_dir=result.get("output_dir"),
                 success_count=result.get("success_count", 0),
             )
+        except job_control.Cancelled:
+            _report_cancelled(job_id, 0, [], token)
         except Exception as e:
+            if token.cancelled:
+                _report_cancelled(job_id, 0, [], token)
+                return
             import traceback
 
             error_detail = f"{type(e).__name__}: {str(e)}"
             print(f"\n[FATAL ERROR] {error_detail}")
             print(traceback.format_exc())
             update_job(job_id, running=False, done=True, percent=0.0, stage="error", status="Error", eta="", error=error_detail)
+        finally:
+            job_control.drop_token(job_id)
+            # log job ini langsung ditulis, jangan nunggu flusher (penting kalau job jalan di proses worker)
+            job_store.flush_logs(job_id)
+
+
+def mark_job_cancelled(job_id, success_count=0, outputs=()):
+    update_job(
+        job_id,
+        running=False,
+        done=True,
+        stage="cancelled",
+        status="Dibatalkan",
+        eta="",
+        queue_position=None,
+        success_count=int(success_count or 0),
+        outputs=[os.path.basename(f) for f in outputs],
+    )
+
+
+def _report_cancelled(job_id, success_count, outputs, token=None):
+    if token is not None and token.reason == broker.LEASE_LOST:
+        # job sudah diambil alih worker lain: status job punya dia, di sini cukup berhenti
+        print("\n⚠️ Lease job hilang, proses di worker ini dihentikan.")
+        return
+    print("\n🛑 Job dibatalkan.")
+    if outputs:
+        print(f"📦 Output yang sudah jadi sebelum dibatalkan ({len(outputs)}):")
+        for f in outputs:
+            print(f"   • {os.path.basename(f)}")
+    mark_job_cancelled(job_id, success_count, outputs)
+
+
+def _execute(job_id, payload):
+    if not job_pool.process_mode():
+        run_job(job_id, payload)
+        return
+    try:
+        job_pool.run(run_job, job_id, payload)
+    except (job_pool.WorkerCrashed, RuntimeError) as e:
+        err = str(e).strip().splitlines()[-1] if str(e).strip() else type(e).__name__
+        append_job_log(job_id, f"\n💥 {err}\n")
+        update_job(job_id, running=False, done=True, percent=0.0, stage="error", status="Error", eta="", error=err)
 
 
 def start_job(job_id, payload):
-    t = threading.Thread(target=run_job, args=(job_id, payload), daemon=True)
-    t.start()
-    return t
+    """
+    Antrikan job ke scheduler global, atau ke broker kalau job dijalankan worker node
+    (YTCLIPPER_JOB_EXECUTOR=broker); raise scheduler.QueueFull kalau antrian penuh.
+    """
+    if broker.enabled():
+        return broker.enqueue(job_id, payload)
+    return scheduler.submit(job_id, _execute, payload)
@@ -0,0 +1,307 @@
+import contextlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+_LOCK = threading.Lock()
+_INDEX = None
+# (mtime_ns, size) index.json waktu _INDEX terakhir dibaca/ditulis; beda = ada proses lain yang nulis
+_INDEX_STAT = None
+
+
+def _env_int(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return int(default)
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return int(default)
+
+
+def cache_dir():
+    p = os.environ.get("YTCLIPPER_MEDIA_CACHE_DIR")
+    if p:
+        return str(p)
+    return os.path.join(os.path.expanduser("~"), ".ytclipper_media_cache")
+
+
+def budget_bytes():
+    return max(0, _env_int("YTCLIPPER_MEDIA_CACHE_MAX_MB", 2048)) * 1024 * 1024
+
+
+def enabled():
+    return budget_bytes() > 0
+
+
+def _index_path():
+    return os.path.join(cache_dir(), "index.json")
+
+
+def _lock_path():
+    return os.path.join(cache_dir(), "index.lock")
+
+
+def _stat():
+    try:
+        st = os.stat(_index_path())
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+@contextlib.contextmanager
+def _file_lock():
+    """Lock antar proses (pool worker / worker node di host yang sama) selama baca-ubah-tulis index.json."""
+    os.makedirs(cache_dir(), exist_ok=True)
+    with open(_lock_path(), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read_disk():
+    global _INDEX, _INDEX_STAT
+    entries = {}
+    stat = _stat()
+    try:
+        with open(_index_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            entries = data.get("entries") or {}
+    except Exception:
+        entries = {}
+    _INDEX = {k: v for k, v in entries.items() if isinstance(v, dict) and os.path.exists(str(v.get("path", "")))}
+    _INDEX_STAT = stat
+    return _INDEX
+
+
+def _load():
+    """Index buat dibaca: dibaca ulang dari disk kalau index.json sudah diubah proses lain."""
+    if _INDEX is not None and _stat() == _INDEX_STAT:
+        return _INDEX
+    return _read_disk()
+
+
+@contextlib.contextmanager
+def _update_locked():
+    """
+    Baca-ubah-tulis index di bawah file lock: index dibaca ulang dari disk dulu, jadi entry yang ditulis
+    proses lain tidak ketimpa (file-nya tetap kehitung budget dan bisa di-evict).
+    """
+    with _file_lock():
+        index = _read_disk()
+        yield index
+        _save_locked()
+
+
+def _save_locked():
+    global _INDEX_STAT
+    path = _index_path()
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(cache_dir(), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"entries": _INDEX}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        _INDEX_STAT = _stat()
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+
+
+def _covers(entry, start, end):
+    e_start = float(entry.get("start") or 0.0)
+    e_end = entry.get("end")
+    if float(start) < e_start:
+        return False
+    if e_end is None:
+        return True
+    if end is None:
+        return False
+    return float(end) <= float(e_end)
+
+
+def _drop_locked(key):
+    entry = _INDEX.pop(key, None)
+    if not entry:
+        return
+    try:
+        os.remove(str(entry.get("path")))
+    except Exception:
+        pass
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        try:
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _pin_locked(entry, delta):
+    """Pin disimpan di index per pid ({"pins": {pid: n}}), jadi proses lain tidak meng-evict file yang lagi dibaca."""
+    pins = dict(entry.get("pins") or {})
+    pid = str(os.getpid())
+    n = int(pins.get(pid) or 0) + int(delta)
+    if n > 0:
+        pins[pid] = n
+    else:
+        pins.pop(pid, None)
+    entry["pins"] = pins
+
+
+def _pinned_locked(entry):
+    """Ada pin dari proses yang masih hidup; pin dari proses yang sudah mati dibuang."""
+    pins = {pid: n for pid, n in (entry.get("pins") or {}).items() if int(n or 0) > 0 and _pid_alive(int(pid))}
+    entry["pins"] = pins
+    return bool(pins)
+
+
+def _evict_locked(budget):
+    total = sum(int(e.get("size") or 0) for e in _INDEX.values())
+    if total <= budget:
+        return
+    for key, entry in sorted(_INDEX.items(), key=lambda kv: float(kv[1].get("last_used") or 0)):
+        if total <= budget:
+            break
+        if _pinned_locked(entry):
+            continue
+        total -= int(entry.get("size") or 0)
+        _drop_locked(key)
+
+
+def lookup(video_id, format_key, start, end=None, pin=True):
+    """
+    Cari file sumber di cache yang mencakup range [start, end] (end None = full video).
+
+    Returns:
+        dict | None: {"key", "path", "start", "end", "size"}; kalau pin=True, panggil release(key) setelah selesai.
+    """
+    if not enabled():
+        return None
+    with _LOCK:
+        index = _load()
+        best = None
+        for key, entry in index.items():
+            if entry.get("video_id") != str(video_id) or entry.get("format_key") != str(format_key):
+                continue
+            if not _covers(entry, start, end):
+                continue
+            if not os.path.exists(str(entry.get("path"))):
+                continue
+            if best is None or int(entry.get("size") or 0) < int(best[1].get("size") or 0):
+                best = (key, entry)
+        if best is None:
+            return None
+        key, entry = best
+        if not pin:
+            return {"key": key, **entry}
+        with _update_locked() as index:
+            if key not in index:
+                return None
+            index[key]["last_used"] = float(time.time())
+            _pin_locked(index[key], 1)
+            entry = index[key]
+        return {"key": key, **entry}
+
+
+def store(video_id, format_key, start, end, src_path, pin=True, move=True):
+    """
+    Simpan file hasil download ke cache (di-move kalau bisa). Mengembalikan entry seperti lookup,
+    atau None kalau cache mati / file lebih besar dari budget.
+    """
+    if not enabled() or not src_path or not os.path.exists(src_path):
+        return None
+    size = int(os.path.getsize(src_path))
+    budget = budget_bytes()
+    if size > budget:
+        return None
+    key = uuid.uuid4().hex
+    ext = os.path.splitext(src_path)[1] or ".bin"
+    dest = os.path.join(cache_dir(), f"{video_id}_{key[:12]}{ext}")
+    try:
+        os.makedirs(cache_dir(), exist_ok=True)
+        if move:
+            shutil.move(src_path, dest)
+        else:
+            shutil.copyfile(src_path, dest)
+    except Exception:
+        return None
+    entry = {
+        "video_id": str(video_id),
+        "format_key": str(format_key),
+        "start": float(start or 0.0),
+        "end": None if end is None else float(end),
+        "path": dest,
+        "size": size,
+        "last_used": float(time.time()),
+        "pins": {str(os.getpid()): 1} if pin else {},
+    }
+    with _LOCK:
+        with _update_locked() as index:
+            index[key] = entry
+            _evict_locked(budget)
+    return {"key": key, **entry}
+
+
+def release(key):
+    with _LOCK:
+        with _update_locked() as index:
+            if key in index:
+                _pin_locked(index[key], -1)
+            _evict_locked(budget_bytes())
+
+
+def stats():
+    with _LOCK:
+        index = _load()
+        return {
+            "dir": cache_dir(),
+            "entries": len(index),
+            "bytes": sum(int(e.get("size") or 0) for e in index.values()),
+            "budget_bytes": budget_bytes(),
+            "pinned": sum(1 for e in index.values() if e.get("pins")),
+        }
@@ -0,0 +1,210 @@
+import json
+import os
+import re
+import subprocess
+import threading
+
+from app.render_graph import OUTPUT_HEIGHT, OUTPUT_WIDTH
+
+
+# codec yang bisa langsung di-copy ke container output (.mp4)
+COPY_AUDIO_CODECS = ("aac",)
+COPY_VIDEO_CODECS = ("h264",)
+# crop mode yang jadi identitas kalau sumbernya sudah persis OUTPUT_WIDTH x OUTPUT_HEIGHT
+IDENTITY_CROP_MODES = ("default", "fit")
+
+_LOCK = threading.Lock()
+_PROBES = {}
+
+
+def _env_bool(name, default=False):
+    v = os.environ.get(name)
+    if v is None:
+        return bool(default)
+    return str(v).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def _env_float(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return float(default)
+    try:
+        return float(str(v).strip())
+    except Exception:
+        return float(default)
+
+
+def stream_copy_enabled():
+    return _env_bool("YTCLIPPER_STREAM_COPY", True)
+
+
+def snap_tolerance_s():
+    return max(0.0, _env_float("YTCLIPPER_COPY_SNAP_TOLERANCE_S", 0.5))
+
+
+def _ffprobe(args):
+    res = subprocess.run(["ffprobe", "-v", "error", "-of", "json", *args], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return json.loads(res.stdout or "{}")
+
+
+def _probe_key(path):
+    try:
+        st = os.stat(path)
+        return (os.path.abspath(path), int(st.st_size), int(st.st_mtime_ns))
+    except Exception:
+        return None
+
+
+def probe(path):
+    """
+    Info codec stream pertama video & audio di file lokal (ffprobe), di-cache per path+ukuran+mtime.
+
+    Returns:
+        dict | None: {"video": {...} | None, "audio": {...} | None, "start_time": float};
+        None kalau ffprobe tidak ada / gagal.
+    """
+    key = _probe_key(path)
+    if key is None:
+        return None
+    with _LOCK:
+        if key in _PROBES:
+            return _PROBES[key]
+    try:
+        data = _ffprobe(
+            [
+                "-show_entries",
+                "stream=index,codec_type,codec_name,width,height,pix_fmt,sample_aspect_ratio,sample_rate,channels:format=start_time",
+                str(path),
+            ]
+        )
+    except Exception:
+        return None
+    out = {"video": None, "audio": None, "start_time": 0.0}
+    for st in data.get("streams") or []:
+        kind = st.get("codec_type")
+        if kind in ("video", "audio") and out[kind] is None:
+            out[kind] = st
+    try:
+        out["start_time"] = float((data.get("format") or {}).get("start_time") or 0.0)
+    except Exception:
+        pass
+    with _LOCK:
+        if len(_PROBES) > 256:
+            _PROBES.clear()
+        _PROBES[key] = out
+    return out
+
+
+_START_RE = re.compile(r"Duration:.*?, start: (-?[0-9.]+)")
+
+
+def start_time(path):
+    """
+    Timestamp awal file (format start_time). File potongan -ss + -c copy dengan -copyts mulai di keyframe
+    sebelum start yang diminta, jadi ini detik video asli di awal file. ffprobe dulu, fallback ke header ffmpeg -i.
+
+    Returns:
+        float | None: None kalau tidak bisa dibaca.
+    """
+    info = probe(path)
+    if info is not None:
+        return float(info.get("start_time") or 0.0)
+    try:
+        res = subprocess.run(["ffmpeg", "-hide_banner", "-i", str(path)], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except Exception:
+        return None
+    m = _START_RE.search(res.stderr or "")
+    return float(m.group(1)) if m else None
+
+
+def keyframes(path, start, end, start_time=0.0):
+    """
+    Timestamp keyframe video di [start, end]. Waktu relatif ke awal file (start_time dikurangi),
+    sama dengan acuan -ss input ffmpeg.
+    """
+    lo = float(start_time) + max(0.0, float(start))
+    hi = float(start_time) + float(end)
+    try:
+        data = _ffprobe(
+            [
+                "-select_streams",
+                "v:0",
+                "-skip_frame",
+                "nokey",
+                "-read_intervals",
+                f"{lo:.3f}%{hi:.3f}",
+                "-show_entries",
+                "frame=pts_time,best_effort_timestamp_time",
+                str(path),
+            ]
+        )
+    except Exception:
+        return []
+    out = []
+    for fr in data.get("frames") or []:
+        t = fr.get("pts_time", fr.get("best_effort_timestamp_time"))
+        try:
+            out.append(float(t) - float(start_time))
+        except Exception:
+            continue
+    return sorted(set(out))
+
+
+def snap_to_keyframe(t, keyframe_times, tolerance_s):
+    """Keyframe terdekat dari t kalau jaraknya <= tolerance_s, selain itu None."""
+    best = None
+    for k in keyframe_times:
+        if abs(k - float(t)) <= float(tolerance_s) and (best is None or abs(k - float(t)) < abs(best - float(t))):
+            best = k
+    return best
+
+
+def audio_copyable(info):
+    audio = (info or {}).get("audio") or {}
+    return str(audio.get("codec_name") or "").lower() in COPY_AUDIO_CODECS
+
+
+def video_copyable(info, crop_mode):
+    """Crop mode ini tidak mengubah apa-apa di sumber (geometri & codec sudah sama dengan output)."""
+    video = (info or {}).get("video") or {}
+    if crop_mode not in IDENTITY_CROP_MODES:
+        return False
+    if str(video.get("codec_name") or "").lower() not in COPY_VIDEO_CODECS:
+        return False
+    if str(video.get("pix_fmt") or "yuv420p") != "yuv420p":
+        return False
+    if str(video.get("sample_aspect_ratio") or "1:1") not in ("1:1", "0:1", "N/A"):
+        return False
+    try:
+        return int(video.get("width")) == OUTPUT_WIDTH and int(video.get("height")) == OUTPUT_HEIGHT
+    except Exception:
+        return False
+
+
+def negotiate(path, crop_modes, start, end, burn_subtitle=False):
+    """
+    Tentukan stream mana yang bisa di-copy untuk render [start, end] (detik di timeline file) dari path.
+    Video cuma di-copy kalau crop-nya identitas, tidak ada subtitle yang di-burn, dan start bisa digeser
+    ke keyframe dalam toleransi (start ikut digeser ke keyframe itu untuk semua varian).
+
+    Returns:
+        dict: {"copy_audio": bool, "copy_video": [crop mode], "start": float, "end": float, "probe": dict | None}
+    """
+    plan = {"copy_audio": False, "copy_video": [], "start": float(start), "end": float(end), "probe": None}
+    if not stream_copy_enabled():
+        return plan
+    info = probe(path)
+    if not info:
+        return plan
+    plan["probe"] = info
+    plan["copy_audio"] = audio_copyable(info)
+    modes = [m for m in crop_modes if video_copyable(info, m)]
+    if not modes or burn_subtitle:
+        return plan
+    tol = snap_tolerance_s()
+    kf = snap_to_keyframe(start, keyframes(path, float(start) - tol, float(start) + tol, info.get("start_time") or 0.0), tol)
+    if kf is None:
+        return plan
+    plan["copy_video"] = modes
+    plan["start"] = kf
+    return plan
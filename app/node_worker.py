@@ -0,0 +1,156 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+from app import broker, job_control
+from app.config_store import default_output_dir
+from app.jobs import append_job_log, run_job, update_job
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def upload_outputs(src_dir, dest_dir):
+    """
+    Pindahkan hasil render dari folder kerja lokal worker ke folder output bersama. File ditulis dulu
+    sebagai .part lalu di-rename, jadi server web tidak pernah lihat file setengah jadi; nama yang
+    bentrok diberi akhiran _2, _3, ... File temp clipper (temp_*) tidak ikut.
+
+    Returns:
+        list: path file di folder tujuan.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    moved = []
+    for name in sorted(os.listdir(src_dir)):
+        src = os.path.join(src_dir, name)
+        if not os.path.isfile(src) or name.startswith("temp_"):
+            continue
+        stem, ext = os.path.splitext(name)
+        dst = os.path.join(dest_dir, name)
+        i = 2
+        while os.path.exists(dst):
+            dst = os.path.join(dest_dir, f"{stem}_{i}{ext}")
+            i += 1
+        part = dst + ".part"
+        shutil.copyfile(src, part)
+        os.replace(part, dst)
+        os.remove(src)
+        moved.append(dst)
+    return moved
+
+
+def _upload_leftovers(job_id, work_dir, dest_dir):
+    """Job batal / gagal: clip yang sudah jadi tetap di-upload (folder kerja lokal habis ini dihapus)."""
+    try:
+        files = upload_outputs(work_dir, dest_dir)
+    except Exception as e:
+        append_job_log(job_id, f"⚠️ Gagal upload output yang sudah jadi ke {dest_dir}: {e}\n")
+        return
+    if not files:
+        return
+    append_job_log(job_id, f"📤 {len(files)} file yang sudah jadi di-upload ke {dest_dir}\n")
+    update_job(job_id, output_dir=dest_dir, outputs=[os.path.basename(f) for f in files])
+
+
+def _renew_loop(job_id, worker_id, lease, stop, lost):
+    while not stop.wait(lease / 3.0):
+        try:
+            ok = broker.renew(job_id, worker_id, lease)
+        except Exception:
+            continue
+        if not ok:
+            lost.set()
+            job_control.cancel(job_id, broker.LEASE_LOST)
+            return
+
+
+def run_task(job_id, payload, worker_id, output_root=None, scratch_dir=None, lease=None):
+    """
+    Jalankan satu job hasil claim(): render di folder kerja lokal, upload ke folder output bersama
+    (output_root kalau di-set, kalau tidak output_dir dari payload), lease diperpanjang selama jalan.
+
+    Returns:
+        bool: True kalau job selesai di worker ini (lease tidak diambil alih worker lain).
+    """
+    lease = broker.lease_s() if lease is None else float(lease)
+    dest_dir = output_root or payload.get("output_dir") or default_output_dir()
+    work_dir = tempfile.mkdtemp(prefix=f"ytclipper_{job_id[:8]}_", dir=scratch_dir)
+    stop, lost = threading.Event(), threading.Event()
+    renewer = threading.Thread(target=_renew_loop, args=(job_id, worker_id, lease, stop, lost), daemon=True)
+    renewer.start()
+
+    def _finalize(result):
+        files = upload_outputs(work_dir, dest_dir)
+        print(f"📤 {len(files)} file di-upload ke {dest_dir}")
+        return {"output_dir": dest_dir}
+
+    try:
+        append_job_log(job_id, f"🖥️ Diambil worker {worker_id}\n")
+        run_job(job_id, dict(payload, output_dir=work_dir), finalize=_finalize)
+    finally:
+        stop.set()
+        renewer.join()
+        if not lost.is_set():
+            _upload_leftovers(job_id, work_dir, dest_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if lost.is_set():
+        return False
+    broker.complete(job_id, worker_id)
+    return True
+
+
+def serve(worker_id=None, concurrency=1, poll_s=2.0, output_root=None, scratch_dir=None, stop=None, drain=False):
+    """
+    Loop worker node: claim job dari broker dan jalankan sampai concurrency job barengan.
+
+    Args:
+        stop: threading.Event buat berhenti (job yang lagi jalan ditunggu sampai selesai).
+        drain: berhenti sendiri begitu antrian kosong dan semua job selesai (dipakai test / batch).
+
+    Returns:
+        int: jumlah job yang dijalankan.
+    """
+    # worker node selalu mode broker, walau env tidak di-set: job store bersama dibuka lewat network
+    # filesystem, jadi wajib journal DELETE (job_store.journal_mode), bukan WAL
+    os.environ["YTCLIPPER_JOB_EXECUTOR"] = "broker"
+    worker_id = worker_id or default_worker_id()
+    stop = stop or threading.Event()
+    slots = threading.Semaphore(max(1, int(concurrency)))
+    threads = []
+    count = 0
+
+    def _run(job_id, payload):
+        try:
+            run_task(job_id, payload, worker_id, output_root=output_root, scratch_dir=scratch_dir)
+        except Exception as e:
+            print(f"[WORKER] Job {job_id} gagal: {type(e).__name__}: {e}")
+        finally:
+            slots.release()
+
+    while not stop.is_set():
+        if not slots.acquire(timeout=poll_s):
+            continue
+        try:
+            task = broker.claim(worker_id)
+        except Exception as e:
+            print(f"[WORKER] Gagal ambil job dari broker: {e}")
+            task = None
+        threads = [t for t in threads if t.is_alive()]
+        if task is None:
+            slots.release()
+            if drain and not threads:
+                break
+            stop.wait(poll_s)
+            continue
+        job_id, payload, attempts = task
+        print(f"[WORKER] {worker_id} ambil job {job_id} (percobaan {attempts})")
+        t = threading.Thread(target=_run, args=(job_id, payload), name=f"node-job-{job_id[:8]}", daemon=True)
+        threads.append(t)
+        t.start()
+        count += 1
+    for t in threads:
+        t.join()
+    return count
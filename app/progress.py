@@ -0,0 +1,224 @@
+import re
+import subprocess
+import tempfile
+import threading
+import time
+
+from app import job_control
+
+
+YTDLP_PROGRESS_PREFIX = "__YTP__"
+YTDLP_PROGRESS_TEMPLATE = YTDLP_PROGRESS_PREFIX + "%(progress.downloaded_bytes)s/%(progress.total_bytes)s/%(progress.total_bytes_estimate)s"
+
+_TIME_RE = re.compile(r"^(\d+):(\d+):(\d+(?:\.\d+)?)$")
+
+
+def with_progress_args(cmd):
+    """Sisipkan `-progress pipe:1 -nostats` setelah binary ffmpeg."""
+    cmd = list(cmd)
+    return cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+
+
+def parse_out_time(key, value):
+    """Detik media yang sudah diproses dari satu baris -progress (out_time_us / out_time_ms / out_time)."""
+    value = str(value).strip()
+    if key in ("out_time_us", "out_time_ms"):
+        # ffmpeg nulis out_time_ms dalam mikrodetik juga
+        try:
+            return max(0.0, int(value) / 1_000_000.0)
+        except Exception:
+            return None
+    if key == "out_time":
+        m = _TIME_RE.match(value)
+        if not m:
+            return None
+        return max(0.0, int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3)))
+    return None
+
+
+def parse_ytdlp_progress(line):
+    """Fraksi 0..1 dari baris progress-template yt-dlp, atau None."""
+    line = str(line or "").strip()
+    if not line.startswith(YTDLP_PROGRESS_PREFIX):
+        return None
+    parts = line[len(YTDLP_PROGRESS_PREFIX):].split("/")
+    try:
+        done = float(parts[0])
+    except Exception:
+        return None
+    for raw in parts[1:]:
+        try:
+            total = float(raw)
+        except Exception:
+            continue
+        if total > 0:
+            return max(0.0, min(1.0, done / total))
+    return None
+
+
+def ffmpeg_progress_fraction(line, duration_s):
+    """Fraksi 0..1 dari satu baris output `-progress` ffmpeg terhadap duration_s, atau None."""
+    key, _, value = str(line or "").partition("=")
+    key = key.strip()
+    if key == "progress" and value.strip() == "end":
+        return 1.0
+    sec = parse_out_time(key, value)
+    if sec is None or not duration_s or float(duration_s) <= 0:
+        return None
+    return min(1.0, sec / float(duration_s))
+
+
+def ytdlp_progress_hook(on_progress):
+    """
+    progress_hooks yt-dlp (in-process) yang diterjemahkan ke on_progress(fraksi). Sekalian jadi
+    checkpoint pembatalan: download in-process berhenti di hook berikutnya kalau job dibatalkan.
+    """
+
+    def _hook(d):
+        job_control.check()
+        if on_progress is None:
+            return
+        if d.get("status") == "finished":
+            on_progress(1.0)
+            return
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        done = d.get("downloaded_bytes")
+        if d.get("status") == "downloading" and total and done is not None:
+            on_progress(max(0.0, min(1.0, float(done) / float(total))))
+
+    return _hook
+
+
+def run_with_progress(cmd, parse_line, on_progress=None, stdin=None):
+    """
+    Jalankan cmd, baca stdout per baris, dan kirim fraksi hasil parse_line(line) ke on_progress.
+    Stderr ditampung di file temp biar pipe tidak penuh. Proses didaftarkan ke token job aktif
+    (job_control), jadi ikut dimatikan kalau job dibatalkan.
+
+    Returns:
+        subprocess.CompletedProcess; raise CalledProcessError kalau exit code != 0.
+    """
+    with tempfile.TemporaryFile() as err_file:
+        proc = subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=err_file, text=True)
+        with job_control.track(proc):
+            try:
+                for line in proc.stdout:
+                    frac = parse_line(line)
+                    if frac is not None and on_progress:
+                        on_progress(frac)
+            finally:
+                proc.stdout.close()
+                proc.wait()
+        err_file.seek(0)
+        stderr = err_file.read().decode("utf-8", "replace")
+    job_control.check()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, output="", stderr=stderr)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout="", stderr=stderr)
+
+
+def run_ffmpeg_progress(cmd, duration_s, on_progress=None, stdin=None):
+    """Jalankan ffmpeg dengan `-progress pipe:1`; fraksi = media time yang sudah diproses / duration_s."""
+    duration_s = float(duration_s or 0)
+    return run_with_progress(with_progress_args(cmd), lambda line: ffmpeg_progress_fraction(line, duration_s), on_progress, stdin=stdin)
+
+
+class ClipProgress:
+    """
+    Tracker progress per clip untuk satu job. update() murah (lock sendiri, tidak nyentuh job store);
+    snapshot ke job cuma di-publish lewat publish(snapshot) paling sering tiap min_interval_s.
+
+    Bobot tiap fase = durasi clip (detik media), jadi percent & ETA dihitung dari media time
+    yang sudah diproses dibanding total media time semua fase semua clip.
+    """
+
+    def __init__(self, durations, phases, publish=None, min_interval_s=0.25, clock=time.monotonic):
+        self.durations = {int(i): max(0.0, float(d)) for i, d in durations.items()}
+        self.phases = list(phases)
+        self.publish = publish
+        self.min_interval_s = float(min_interval_s)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._done = {i: {p: 0.0 for p in self.phases} for i in self.durations}
+        self._stage = {}
+        self._ok = {}
+        self._outputs = {}
+        self._started_at = None
+        self._last_publish = 0.0
+
+    def set_durations(self, durations):
+        """Ganti bobot clip dengan hasil plan (segmen yang di-skip ikut hilang dari total)."""
+        with self._lock:
+            self.durations = {int(i): max(0.0, float(d)) for i, d in durations.items()}
+            self._done = {i: self._done.get(i) or {p: 0.0 for p in self.phases} for i in self.durations}
+
+    def _total_units(self):
+        return sum(d * len(self.phases) for d in self.durations.values())
+
+    def update(self, clip_index, phase=None, fraction=None, stage=None, ok=None, outputs=None, output_done=None, force=False):
+        i = int(clip_index)
+        now = self.clock()
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = now
+            if i not in self._done:
+                self._done[i] = {p: 0.0 for p in self.phases}
+                self.durations.setdefault(i, 0.0)
+            if phase in self._done[i] and fraction is not None:
+                self._done[i][phase] = max(self._done[i][phase], max(0.0, min(1.0, float(fraction))))
+            if stage is not None:
+                self._stage[i] = stage
+                if stage in self.phases:
+                    for p in self.phases[: self.phases.index(stage)]:
+                        self._done[i][p] = 1.0
+                if stage == "clip_done":
+                    for p in self._done[i]:
+                        self._done[i][p] = 1.0
+                    self._ok[i] = ok
+            if outputs:
+                self._outputs[i] = [{"crop_mode": m, "done": False, "file": None} for m in outputs]
+            if output_done:
+                for o in self._outputs.get(i, []):
+                    if o["crop_mode"] == output_done.get("crop_mode") and not o["done"]:
+                        o["done"] = True
+                        o["file"] = output_done.get("file")
+                        o["streams"] = output_done.get("streams")
+                        break
+            due = force or (now - self._last_publish) >= self.min_interval_s
+            if due:
+                self._last_publish = now
+                snap = self._snapshot_locked(now)
+        if due and self.publish:
+            self.publish(snap)
+        return snap if due else None
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot_locked(self.clock())
+
+    def _snapshot_locked(self, now):
+        total = self._total_units()
+        done_units = 0.0
+        clips = []
+        for i in sorted(self._done):
+            d = self.durations.get(i, 0.0)
+            frac = sum(self._done[i].values()) / float(len(self.phases) or 1)
+            done_units += frac * d * len(self.phases)
+            if i in self._stage:
+                clips.append(
+                    {
+                        "index": i,
+                        "stage": self._stage[i],
+                        "ok": self._ok.get(i),
+                        "percent": round(frac * 100.0, 1),
+                        "phases": {p: round(v * 100.0, 1) for p, v in self._done[i].items()},
+                        "outputs": [dict(o) for o in self._outputs.get(i, [])],
+                    }
+                )
+        fraction = (done_units / total) if total > 0 else 0.0
+        eta_s = None
+        if self._started_at is not None and done_units > 0:
+            elapsed = max(1e-6, now - self._started_at)
+            rate = done_units / elapsed
+            eta_s = max(0.0, (total - done_units) / rate) if rate > 0 else None
+        return {"fraction": fraction, "eta_s": eta_s, "clips": clips}
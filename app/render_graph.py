@@ -0,0 +1,183 @@
+import math
+import os
+
+from app.core_constants import BOTTOM_HEIGHT, TOP_HEIGHT
+from app.encoder_profiles import audio_encode_args, video_encode_args
+
+
+CROP_MODES = ("default", "fit", "split_left", "split_right")
+
+OUTPUT_WIDTH = 720
+OUTPUT_HEIGHT = 1280
+
+
+def crop_chain(crop_mode, src="0:v", out="vout", prefix=""):
+    if crop_mode == "default":
+        return f"[{src}]scale=-2:1280,pad=max(iw\\,720):ih:(ow-iw)/2:0,crop=720:1280:(iw-720)/2:(ih-1280)/2[{out}]"
+    if crop_mode == "fit":
+        return (
+            f"[{src}]scale=720:1280:force_original_aspect_ratio=decrease,"
+            f"scale=trunc(iw/2)*2:trunc(ih/2)*2,pad=720:1280:(ow-iw)/2:(oh-ih)/2,setsar=1[{out}]"
+        )
+    if crop_mode in ("split_left", "split_right"):
+        bottom_x = "0" if crop_mode == "split_left" else "iw-720"
+        p = prefix
+        return (
+            f"[{src}]scale='max(720,iw*1280/ih)':1280[{p}scaled];"
+            f"[{p}scaled]split=2[{p}s1][{p}s2];"
+            f"[{p}s1]crop=720:{TOP_HEIGHT}:(iw-720)/2:0[{p}top];"
+            f"[{p}s2]crop=720:{BOTTOM_HEIGHT}:{bottom_x}:{TOP_HEIGHT}[{p}bottom];"
+            f"[{p}top][{p}bottom]vstack=inputs=2[{out}]"
+        )
+    raise ValueError(f"crop_mode tidak dikenal: {crop_mode}")
+
+
+def normalize_crop_modes(crop_modes, default="default"):
+    """
+    Rapikan daftar crop mode (varian output): buang yang tidak dikenal/duplikat, urutan dipertahankan.
+    """
+    if isinstance(crop_modes, str):
+        crop_modes = [crop_modes]
+    out = []
+    for m in crop_modes or []:
+        m = str(m or "").strip()
+        if m in CROP_MODES and m not in out:
+            out.append(m)
+    return out or [default]
+
+
+def required_source_height(crop_mode, source_aspect=16.0 / 9.0):
+    """
+    Tinggi sumber minimal supaya crop_mode tidak perlu upscale ke frame OUTPUT_WIDTH x OUTPUT_HEIGHT.
+    default/split nge-scale tinggi sumber ke OUTPUT_HEIGHT, fit cuma butuh lebar sumber >= OUTPUT_WIDTH.
+    """
+    if crop_mode == "fit":
+        return int(math.ceil(round(OUTPUT_WIDTH / float(source_aspect), 6)))
+    if crop_mode in CROP_MODES:
+        return int(OUTPUT_HEIGHT)
+    raise ValueError(f"crop_mode tidak dikenal: {crop_mode}")
+
+
+def variants_source_height(crop_modes, source_aspect=16.0 / 9.0):
+    return max(required_source_height(m, source_aspect) for m in normalize_crop_modes(crop_modes))
+
+
+def subtitle_force_style(subtitle_position="middle"):
+    pos = str(subtitle_position or "middle").strip().lower()
+    if pos in ("bottom", "bawah"):
+        alignment = 2
+        margin_v = 60
+    elif pos in ("top", "atas"):
+        alignment = 8
+        margin_v = 60
+    else:
+        alignment = 5
+        margin_v = 0
+    return (
+        "FontName=Arial,"
+        "FontSize=12,"
+        "Bold=1,"
+        "PrimaryColour=&HFFFFFF,"
+        "OutlineColour=&H000000,"
+        "BorderStyle=1,"
+        "Outline=2,"
+        "Shadow=1,"
+        f"Alignment={alignment},"
+        f"MarginV={margin_v}"
+    )
+
+
+def subtitle_filter(subtitle_file, subtitle_position="middle"):
+    abs_subtitle_path = os.path.abspath(subtitle_file)
+    subtitle_path = abs_subtitle_path.replace("\\", "/").replace(":", "\\:")
+    return f"subtitles='{subtitle_path}':force_style='{subtitle_force_style(subtitle_position)}'"
+
+
+def build_render_graph(crop_mode, subtitle_file=None, subtitle_position="middle"):
+    """
+    Bikin argumen ffmpeg untuk render satu clip dalam sekali encode: crop/scale sesuai
+    crop_mode, lalu burn subtitle (kalau ada) di filtergraph yang sama.
+
+    Returns:
+        list: argumen "-filter_complex ... -map ..." siap disisipkan setelah input.
+    """
+    if subtitle_file:
+        graph = crop_chain(crop_mode, out="vcrop") + f";[vcrop]{subtitle_filter(subtitle_file, subtitle_position)}[vout]"
+    else:
+        graph = crop_chain(crop_mode, out="vout")
+    return ["-filter_complex", graph, "-map", "[vout]", "-map", "0:a?"]
+
+
+def build_variant_render_graph(
+    crop_modes,
+    output_files,
+    subtitle_file=None,
+    subtitle_position="middle",
+    trim=None,
+    has_audio=True,
+    encoder_profile=None,
+    copy_audio=False,
+    copy_video=(),
+):
+    """
+    Argumen ffmpeg untuk render beberapa varian crop dari satu decode: video sumber di-split
+    sekali, tiap cabang di-crop (dan diburn subtitle) lalu di-encode ke file output masing-masing.
+
+    Args:
+        crop_modes (list): crop mode per output.
+        output_files (list): path output, sejajar dengan crop_modes.
+        trim (tuple): (start, end) timestamp input yang dipotong di filtergraph, buat input yang tidak bisa di-seek (pipe).
+        has_audio (bool): input punya audio (wajib benar kalau pakai trim).
+        encoder_profile (str): nama profile di encoder_profiles.PROFILES (default: YTCLIPPER_ENCODER_PROFILE / draft).
+        copy_audio (bool): audio sumber di-copy apa adanya (diabaikan kalau pakai trim).
+        copy_video (list): crop mode yang videonya di-copy tanpa filter (diabaikan kalau ada subtitle/trim).
+
+    Returns:
+        list: argumen "-filter_complex ..." plus "-map ... <encode args> <output>" per varian.
+    """
+    crop_modes = list(crop_modes)
+    output_files = list(output_files)
+    if not crop_modes or len(crop_modes) != len(output_files):
+        raise ValueError("Jumlah crop mode dan file output harus sama.")
+    copy_video = set() if (trim is not None or subtitle_file) else set(copy_video or ())
+    video_args = video_encode_args(encoder_profile)
+    audio_args = ["-c:a", "copy"] if (copy_audio and trim is None) else audio_encode_args(encoder_profile)
+    if len(crop_modes) == 1 and trim is None and not copy_video:
+        return build_render_graph(crop_modes[0], subtitle_file, subtitle_position) + video_args + audio_args + [output_files[0]]
+
+    n = len(crop_modes)
+    filtered = [i for i, mode in enumerate(crop_modes) if mode not in copy_video]
+    video_src = "0:v"
+    audio_maps = ["0:a?"] * n
+    parts = []
+    if trim is not None:
+        t_start, t_end = float(trim[0]), float(trim[1])
+        parts.append(f"[0:v]trim=start={t_start:.3f}:end={t_end:.3f},setpts=PTS-STARTPTS[vtrim]")
+        video_src = "vtrim"
+        if has_audio:
+            a_split = f",asplit={n}" if n > 1 else ""
+            parts.append(f"[0:a]atrim=start={t_start:.3f}:end={t_end:.3f},asetpts=PTS-STARTPTS{a_split}" + "".join(f"[a{i}]" for i in range(n)))
+            audio_maps = [f"[a{i}]" for i in range(n)]
+        else:
+            audio_maps = [None] * n
+    if len(filtered) > 1:
+        parts.append(f"[{video_src}]split=" + str(len(filtered)) + "".join(f"[src{i}]" for i in filtered))
+        srcs = {i: f"src{i}" for i in filtered}
+    else:
+        srcs = {i: video_src for i in filtered}
+    for i in filtered:
+        mode = crop_modes[i]
+        if subtitle_file:
+            parts.append(crop_chain(mode, src=srcs[i], out=f"crop{i}", prefix=f"v{i}") + f";[crop{i}]{subtitle_filter(subtitle_file, subtitle_position)}[vout{i}]")
+        else:
+            parts.append(crop_chain(mode, src=srcs[i], out=f"vout{i}", prefix=f"v{i}"))
+    args = ["-filter_complex", ";".join(parts)] if parts else []
+    for i, out_file in enumerate(output_files):
+        if i in srcs:
+            args += ["-map", f"[vout{i}]"]
+        else:
+            args += ["-map", "0:v:0"]
+        if audio_maps[i]:
+            args += ["-map", audio_maps[i]]
+        args += [*(video_args if i in srcs else ["-c:v", "copy"]), *audio_args, out_file]
+    return args
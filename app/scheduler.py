@@ -0,0 +1,129 @@
+import collections
+import os
+import threading
+import traceback
+
+from app import job_events, job_store
+
+
+_LOCK = threading.Lock()
+_QUEUE = collections.OrderedDict()
+_RUNNING = {}
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _env_int(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return int(default)
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return int(default)
+
+
+def max_running_jobs():
+    return max(1, _env_int("YTCLIPPER_MAX_RUNNING_JOBS", 2))
+
+
+def max_queued_jobs():
+    return max(0, _env_int("YTCLIPPER_JOB_QUEUE_SIZE", 20))
+
+
+def _publish_positions_locked():
+    running = len(_RUNNING)
+    for pos, job_id in enumerate(_QUEUE, 1):
+        try:
+            job_store.update(
+                job_id,
+                {"stage": "queued", "queue_position": pos, "status": f"⏳ Antri #{pos} ({running} job lagi jalan)"},
+            )
+        except Exception:
+            pass
+        job_events.publish(job_id)
+
+
+def _dispatch_locked():
+    started = False
+    while _QUEUE and len(_RUNNING) < max_running_jobs():
+        job_id, (fn, args) = _QUEUE.popitem(last=False)
+        t = threading.Thread(target=_run, args=(job_id, fn, args), name=f"job-{job_id[:8]}", daemon=True)
+        _RUNNING[job_id] = t
+        try:
+            job_store.update(job_id, {"queue_position": None})
+        except Exception:
+            pass
+        t.start()
+        started = True
+    if started:
+        _publish_positions_locked()
+
+
+def _run(job_id, fn, args):
+    try:
+        fn(job_id, *args)
+    except Exception:
+        traceback.print_exc()
+    finally:
+        with _LOCK:
+            _RUNNING.pop(job_id, None)
+            _dispatch_locked()
+
+
+def submit(job_id, fn, *args):
+    """
+    Masukkan job ke antrian global; fn(job_id, *args) dijalankan di thread sendiri begitu slot kosong
+    (maksimal YTCLIPPER_MAX_RUNNING_JOBS barengan). Batas download/encode/Whisper antar job tetap
+    diatur semaphore per stage di clipper.
+
+    Returns:
+        int: posisi antrian (0 = langsung jalan).
+
+    Raises:
+        QueueFull: antrian sudah penuh (YTCLIPPER_JOB_QUEUE_SIZE).
+    """
+    with _LOCK:
+        if len(_RUNNING) >= max_running_jobs() and len(_QUEUE) >= max_queued_jobs():
+            raise QueueFull(
+                f"Antrian penuh: {len(_RUNNING)} job lagi jalan dan {len(_QUEUE)} job antri. Coba lagi sebentar lagi, Bos!"
+            )
+        _QUEUE[job_id] = (fn, args)
+        _dispatch_locked()
+        if job_id in _QUEUE:
+            _publish_positions_locked()
+            return list(_QUEUE).index(job_id) + 1
+        return 0
+
+
+def cancel(job_id):
+    """
+    Keluarkan job dari antrian sebelum sempat jalan.
+
+    Returns:
+        bool: True kalau job tadi masih antri (sudah dikeluarkan); False kalau sudah jalan / tidak dikenal.
+    """
+    with _LOCK:
+        if _QUEUE.pop(job_id, None) is None:
+            return False
+        _publish_positions_locked()
+        return True
+
+
+def queue_position(job_id):
+    with _LOCK:
+        if job_id not in _QUEUE:
+            return 0
+        return list(_QUEUE).index(job_id) + 1
+
+
+def stats():
+    with _LOCK:
+        return {
+            "running": list(_RUNNING),
+            "queued": list(_QUEUE),
+            "max_running": max_running_jobs(),
+            "max_queued": max_queued_jobs(),
+        }
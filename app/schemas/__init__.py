@@ -2,7 +2,18 @@ from app.schemas.ai import AiSegmentsRequest, AiSegmentsResponse, GeminiSuggesti
 from app.schemas.base import ErrorResponse, OkResponse
 from app.schemas.config import ConfigResponse, ConfigUpdateRequest
 from app.schemas.heatmap import HeatmapRequest, HeatmapResponse, ScoredSegment, Segment
-from app.schemas.jobs import JobStatusResponse, OpenOutputResponse, StartJobRequest, StartJobResponse
+from app.schemas.jobs import (
+    BatchChild,
+    BatchItem,
+    BatchJobRequest,
+    BatchJobResponse,
+    CancelJobResponse,
+    JobOptionsRequest,
+    JobStatusResponse,
+    OpenOutputResponse,
+    StartJobRequest,
+    StartJobResponse,
+)
 from app.schemas.video import VideoInfoRequest, VideoInfoResponse
 
 
@@ -23,6 +34,12 @@ __all__ = [
     "StartJobResponse",
     "JobStatusResponse",
     "OpenOutputResponse",
+    "CancelJobResponse",
+    "JobOptionsRequest",
+    "BatchItem",
+    "BatchJobRequest",
+    "BatchChild",
+    "BatchJobResponse",
     "VideoInfoRequest",
     "VideoInfoResponse",
 ]
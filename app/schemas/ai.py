@@ -18,10 +18,9 @@ class AiSegmentsResponse(OkResponse):
     segments: list[ScoredSegment]
 
 
-class StartJobRequest(BaseModel):
-    url: str = Field(min_length=1)
-    segments: list[Segment]
+class JobOptionsRequest(BaseModel):
     crop_mode: Literal["default", "fit", "split_left", "split_right"] = "default"
+    crop_modes: list[Literal["default", "fit", "split_left", "split_right"]] | None = Field(default=None, min_length=1, max_length=4)
     use_subtitle: bool = False
     whisper_model: str | None = None
     subtitle_language: str | None = None
@@ -29,11 +28,21 @@ class StartJobRequest(BaseModel):
     output_dir: str | None = None
     use_gemini_suggestions: bool = False
     gemini_api_key: str | None = None
+    clip_workers: int | None = Field(default=None, ge=1, le=16)
+    encoder_profile: Literal["draft", "balanced", "archival", "auto"] | None = None
+    target_turnaround_s: int | None = Field(default=None, ge=10, le=86400)
+    source_mode: Literal["auto", "per_clip"] | None = None
+
+
+class StartJobRequest(JobOptionsRequest):
+    url: str = Field(min_length=1)
+    segments: list[Segment]
 
 
 class StartJobResponse(OkResponse):
     job_id: str
     estimated_bytes: int
+    queue_position: int = 0
 
 
 class GeminiSuggestionRequest(BaseModel):
@@ -11,6 +11,7 @@ class ConfigResponse(BaseModel):
     whisper_model: str | None = None
     subtitle_language: str | None = None
     subtitle_position: str | None = None
+    encoder_profile: str | None = None
     preview_seconds: int | None = None
     deps_verbose: bool | None = None
     has_gemini_key: bool | None = None
@@ -28,6 +29,7 @@ class ConfigUpdateRequest(BaseModel):
     whisper_model: str | None = None
     subtitle_language: str | None = None
     subtitle_position: str | None = None
+    encoder_profile: str | None = None
     preview_seconds: int | None = None
     deps_verbose: bool | None = None
     use_gemini_suggestions: bool | None = None
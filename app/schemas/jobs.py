@@ -1,7 +1,10 @@
-from pydantic import BaseModel
+from typing import Any, Literal
 
-from app.schemas.ai import StartJobRequest, StartJobResponse
+from pydantic import BaseModel, Field
+
+from app.schemas.ai import JobOptionsRequest, StartJobRequest, StartJobResponse
 from app.schemas.base import OkResponse
+from app.schemas.heatmap import Segment
 
 
 class JobStatusResponse(BaseModel):
@@ -17,7 +20,15 @@ class JobStatusResponse(BaseModel):
     output_dir_ok: bool | None = None
     output_dir_error: str | None = None
     success_count: int | None = None
+    clips: list[dict[str, Any]] | None = None
+    queue_position: int | None = None
+    outputs: list[str] | None = None
+    archived: bool | None = None
+    parent_id: str | None = None
+    children: list[dict[str, Any]] | None = None
     logs: str | None = None
+    log_cursor: int | None = None
+    logs_truncated: bool | None = None
 
 
 class OpenOutputResponse(OkResponse):
@@ -25,9 +36,48 @@ class OpenOutputResponse(OkResponse):
     method: str
 
 
+class CancelJobResponse(OkResponse):
+    job_id: str
+    stage: str
+    status: str
+
+
+class BatchItem(BaseModel):
+    url: str = Field(min_length=1)
+    segments: list[Segment] = Field(min_length=1)
+
+
+class BatchJobRequest(JobOptionsRequest):
+    items: list[BatchItem] | None = None
+    # isi file CSV / JSONL (dibaca di browser), dipakai kalau items kosong
+    file: str | None = None
+    file_format: Literal["csv", "jsonl"] | None = None
+
+
+class BatchChild(BaseModel):
+    job_id: str
+    url: str
+    clips: int
+    queue_position: int = 0
+    rejected: bool = False
+
+
+class BatchJobResponse(OkResponse):
+    job_id: str
+    children: list[BatchChild]
+    rejected: int = 0
+    estimated_bytes: int
+
+
 __all__ = [
     "StartJobRequest",
     "StartJobResponse",
     "JobStatusResponse",
     "OpenOutputResponse",
+    "CancelJobResponse",
+    "JobOptionsRequest",
+    "BatchItem",
+    "BatchJobRequest",
+    "BatchChild",
+    "BatchJobResponse",
 ]
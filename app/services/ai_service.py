@@ -1,17 +1,21 @@
 import glob
 import os
 import re
+import shutil
 import subprocess
 import sys
 import tempfile
 import threading
 
+from app import media_cache, yt_engine
 from app.config_store import load_config
 from app.core_constants import MAX_DURATION
 from app.ffmpeg_deps import cek_dependensi
+from app.format_cache import client_profile, run_candidates
 from app.subtitle_ai import set_whisper_model, transcribe_timestamped_segments
 from app.yt_info import extract_video_id
-from app.services.gemini_service import generate_clip_metadata
+from app.services.metadata_service import get_clip_metadata
+from app.yt_stream import direct_streams_enabled, invalidate_streams, resolve_streams, stream_input_args
 from app.yt_utils import get_yt_dlp_cookies_args
 
 
@@ -30,6 +34,29 @@ def _ensure_ai_deps():
         _AI_DEPS_READY = True
 
 
+def _cached_audio(video_id, tmpdir):
+    hit = media_cache.lookup(video_id, "audio", 0.0, None)
+    if not hit:
+        return None
+    dest = os.path.join(tmpdir.name, "audio" + os.path.splitext(hit["path"])[1])
+    try:
+        try:
+            os.link(hit["path"], dest)
+        except Exception:
+            shutil.copyfile(hit["path"], dest)
+        return dest
+    except Exception:
+        return None
+    finally:
+        media_cache.release(hit["key"])
+
+
+def _remember_audio(video_id, audio_path):
+    if video_id:
+        media_cache.store(video_id, "audio", 0.0, None, audio_path, pin=False, move=False)
+    return audio_path
+
+
 def _download_audio_to_temp(url: str) -> tuple[str, tempfile.TemporaryDirectory]:
     tmpdir = tempfile.TemporaryDirectory(prefix="ytclipper_ai_")
     out_tpl = os.path.join(tmpdir.name, "audio.%(ext)s")
@@ -42,39 +69,71 @@ def _download_audio_to_temp(url: str) -> tuple[str, tempfile.TemporaryDirectory]
         "best",
     ]
 
-    try:
-        last_error = None
-        for fmt in format_candidates:
-            cmd = [
-                sys.executable,
-                "-m",
-                "yt_dlp",
-                "--force-ipv4",
-                "--quiet",
-                "--no-warnings",
-                "--no-playlist",
-                "--remote-components",
-                "ejs:github",
-                "--extractor-args",
-                "youtube:player_client=android,ios",
-                "-f",
-                fmt,
-                "-x",
-                "--audio-format",
-                "mp3",
-            ] + get_yt_dlp_cookies_args() + [
-                "-o",
-                out_tpl,
-                u,
-            ]
+    video_id = extract_video_id(u)
+    if video_id:
+        cached = _cached_audio(video_id, tmpdir)
+        if cached:
+            return cached, tmpdir
+
+    profile = client_profile("audio")
+    if video_id and direct_streams_enabled():
+        audio_path = os.path.join(tmpdir.name, "audio.mka")
+        try:
+            resolved = resolve_streams(video_id, format_candidates, profile=profile)
+            input_args, map_args = stream_input_args(resolved, audio_only=True)
+            cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *input_args, *map_args, "-vn", "-c:a", "copy", audio_path]
+            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            if os.path.exists(audio_path):
+                return _remember_audio(video_id, audio_path), tmpdir
+        except Exception:
+            invalidate_streams(video_id)
             try:
-                subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                last_error = None
-                break
-            except subprocess.CalledProcessError as e:
-                last_error = e
-        if last_error:
-            raise last_error
+                os.remove(audio_path)
+            except Exception:
+                pass
+
+    if video_id and yt_engine.inprocess_enabled():
+        try:
+            run_candidates(video_id, profile, format_candidates, lambda fmt: yt_engine.download_audio(video_id, fmt, out_tpl, audio_format="mp3"))
+            hits = sorted(glob.glob(os.path.join(tmpdir.name, "audio.*")))
+            if hits:
+                return _remember_audio(video_id, hits[0]), tmpdir
+        except Exception:
+            pass
+        yt_engine.invalidate_info(video_id)
+        for f in glob.glob(os.path.join(tmpdir.name, "audio.*")):
+            try:
+                os.remove(f)
+            except Exception:
+                pass
+
+    def _subproc(fmt):
+        cmd = [
+            sys.executable,
+            "-m",
+            "yt_dlp",
+            "--force-ipv4",
+            "--quiet",
+            "--no-warnings",
+            "--no-playlist",
+            "--remote-components",
+            "ejs:github",
+            "--extractor-args",
+            "youtube:player_client=android,ios",
+            "-f",
+            fmt,
+            "-x",
+            "--audio-format",
+            "mp3",
+        ] + get_yt_dlp_cookies_args() + [
+            "-o",
+            out_tpl,
+            u,
+        ]
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    try:
+        run_candidates(video_id or u, profile, format_candidates, _subproc)
     except subprocess.CalledProcessError as e:
         err = (e.stderr or "").strip() or (e.stdout or "").strip()
         tmpdir.cleanup()
@@ -86,7 +145,7 @@ def _download_audio_to_temp(url: str) -> tuple[str, tempfile.TemporaryDirectory]
         tmpdir.cleanup()
         raise ValueError("Gagal download audio untuk backup AI (file audio tidak ditemukan).")
 
-    return audio_path, tmpdir
+    return _remember_audio(video_id, audio_path), tmpdir
 
 
 def _get_url(data):
@@ -247,5 +306,5 @@ def generate_ai_suggestions(data):
     if not api_key:
         raise ValueError("Gemini API Key belum diset. Masukkan di Settings atau kirim langsung.")
 
-    result = generate_clip_metadata(text, api_key)
+    result = get_clip_metadata(text, api_key)
     return {"ok": True, "data": result}
@@ -0,0 +1,207 @@
+import csv
+import io
+import json
+import os
+import uuid
+
+from app.clipper import estimate_total_size_bytes
+from app.jobs import append_job_log, create_batch_job, create_job, start_job, update_job
+from app.scheduler import QueueFull
+from app.services.clip_service import build_payload, job_options, log_duration_warnings, parse_segments, remember_options
+from app.yt_info import extract_video_id
+
+
+def max_batch_items():
+    try:
+        return max(1, int(os.environ.get("YTCLIPPER_BATCH_MAX_ITEMS", "100")))
+    except Exception:
+        return 100
+
+
+def _parse_time(value):
+    """'90', '1:30', '00:01:30.5' → detik."""
+    total = 0.0
+    for part in str(value).strip().split(":"):
+        total = total * 60 + float(part)
+    return total
+
+
+def _parse_segment_list(value):
+    """'0:10-0:40; 1:00-1:30' → list segmen."""
+    segments = []
+    for chunk in str(value or "").replace(",", ";").split(";"):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        start, sep, end = chunk.partition("-")
+        if not sep:
+            raise ValueError(f"Format segmen tidak valid: {chunk} (contoh: 0:10-0:40)")
+        segments.append({"start": _parse_time(start), "end": _parse_time(end)})
+    return segments
+
+
+def _row_item(row):
+    url = str(row.get("url") or "").strip()
+    segments = row.get("segments")
+    if isinstance(segments, str):
+        segments = _parse_segment_list(segments)
+    segments = list(segments or [])
+    if row.get("start") not in (None, "") and row.get("end") not in (None, ""):
+        segments.append({"start": _parse_time(row["start"]), "end": _parse_time(row["end"])})
+    return {"url": url, "segments": segments}
+
+
+def parse_batch_file(text, file_format=None):
+    """
+    Baca daftar batch dari isi file CSV / JSONL.
+
+    CSV: header wajib punya kolom url, plus start & end (satu baris per segmen; baris dengan URL sama
+    digabung) atau segments ("0:10-0:40; 1:00-1:30"). JSONL: satu objek per baris, field-nya sama
+    (segments boleh list {"start", "end"}).
+
+    Args:
+        file_format: "csv" / "jsonl"; None = ditebak dari isi (baris pertama diawali "{" → JSONL).
+
+    Returns:
+        list: item {"url", "segments"}.
+
+    Raises:
+        ValueError: format tidak dikenal atau ada baris yang tidak bisa dibaca.
+    """
+    text = str(text or "").lstrip("\ufeff")
+    if file_format is None:
+        file_format = "jsonl" if text.lstrip().startswith("{") else "csv"
+    items = []
+    if file_format == "jsonl":
+        for n, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("bukan objek JSON")
+                items.append(_row_item(row))
+            except ValueError as e:
+                raise ValueError(f"Baris {n} JSONL tidak valid: {e}")
+        return items
+    if file_format != "csv":
+        raise ValueError(f"Format file batch tidak dikenal: {file_format}")
+
+    reader = csv.DictReader(io.StringIO(text))
+    fields = [str(f or "").strip().lower() for f in (reader.fieldnames or [])]
+    if "url" not in fields:
+        raise ValueError("CSV batch wajib punya header dengan kolom url.")
+    reader.fieldnames = fields
+    for n, row in enumerate(reader, 2):
+        if not any(str(v or "").strip() for v in row.values()):
+            continue
+        try:
+            items.append(_row_item(row))
+        except ValueError as e:
+            raise ValueError(f"Baris {n} CSV tidak valid: {e}")
+    return items
+
+
+def _group_by_video(items):
+    """Item dengan video yang sama digabung jadi satu job anak: cek durasi & download sumbernya cukup sekali."""
+    groups = {}
+    for n, item in enumerate(items, 1):
+        url = str(item.get("url") or "").strip()
+        video_id = extract_video_id(url) if url else None
+        if not video_id:
+            raise ValueError(f"Item #{n}: link YouTube tidak valid ({url or 'kosong'}).")
+        group = groups.setdefault(video_id, {"url": url, "segments": [], "seen": set(), "items": 0})
+        group["items"] += 1
+        for seg in item.get("segments") or []:
+            try:
+                key = (float(seg.get("start", 0) or 0), float(seg.get("end", 0) or 0))
+            except (AttributeError, TypeError, ValueError):
+                raise ValueError(f"Item #{n}: segmen tidak valid ({seg!r}).")
+            if key in group["seen"]:
+                continue
+            group["seen"].add(key)
+            group["segments"].append(seg)
+    return list(groups.values())
+
+
+def start_batch_job(data):
+    """
+    Antrikan banyak URL + segmen sekaligus sebagai satu job parent dengan job anak per video.
+    Opsi (crop, subtitle, output, encoder, Gemini) berlaku untuk semua item.
+
+    Raises:
+        ValueError: daftar kosong / terlalu panjang, URL atau segmen tidak valid (belum ada job yang dibuat).
+        QueueFull: antrian penuh sebelum satu pun job anak masuk.
+    """
+    data = data or {}
+    items = list(data.get("items") or [])
+    if not items and data.get("file"):
+        items = parse_batch_file(data["file"], data.get("file_format"))
+    if not items:
+        raise ValueError("Daftar batch kosong.")
+    if len(items) > max_batch_items():
+        raise ValueError(f"Batch maksimal {max_batch_items()} item (dapat {len(items)}).")
+
+    options = job_options(data)
+    groups = _group_by_video(items)
+    planned = []
+    for group in groups:
+        try:
+            cleaned, enabled_segments, total_sec, warnings = parse_segments(group["segments"])
+        except ValueError as e:
+            raise ValueError(f"{group['url']}: {e}")
+        planned.append(
+            {
+                "job_id": uuid.uuid4().hex,
+                "url": group["url"],
+                "clips": len(enabled_segments),
+                "payload": build_payload(options, group["url"], cleaned, len(enabled_segments)),
+                "warnings": warnings,
+                "estimated_bytes": estimate_total_size_bytes(total_sec) * len(options["crop_modes"]),
+            }
+        )
+
+    batch_id = uuid.uuid4().hex
+    for child in planned:
+        create_job(child["job_id"], output_dir=options["output_dir"])
+        log_duration_warnings(child["job_id"], child["warnings"])
+    create_batch_job(batch_id, options["output_dir"], planned)
+    append_job_log(
+        batch_id,
+        f"📦 Batch {len(items)} item → {len(planned)} job (per video), {sum(c['clips'] for c in planned)} clip\n",
+    )
+
+    children = []
+    rejected = 0
+    for child in planned:
+        if rejected:
+            position = None
+        else:
+            try:
+                position = int(start_job(child["job_id"], child["payload"]) or 0)
+            except QueueFull as e:
+                rejected_error = str(e)
+                position = None
+        if position is None:
+            rejected += 1
+            update_job(child["job_id"], done=True, stage="rejected", status="Ditolak", error=rejected_error)
+            append_job_log(batch_id, f"⛔ {child['url']} ditolak: antrian penuh\n")
+        else:
+            append_job_log(batch_id, f"• {child['url']} ({child['clips']} clip) → job {child['job_id']}\n")
+        children.append(
+            {"job_id": child["job_id"], "url": child["url"], "clips": child["clips"], "queue_position": position or 0, "rejected": position is None}
+        )
+
+    if rejected >= len(planned):
+        update_job(batch_id, done=True, stage="rejected", status="Ditolak", error=rejected_error)
+        raise QueueFull(rejected_error)
+
+    remember_options(data, options)
+
+    return {
+        "ok": True,
+        "job_id": batch_id,
+        "children": children,
+        "rejected": rejected,
+        "estimated_bytes": sum(c["estimated_bytes"] for c in planned),
+    }
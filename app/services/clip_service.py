@@ -3,10 +3,14 @@ import subprocess
 import sys
 import uuid
 
+from app import broker, job_control, scheduler
 from app.clipper import estimate_total_size_bytes
 from app.config_store import default_output_dir, load_config, save_config
 from app.core_constants import MAX_DURATION
-from app.jobs import append_job_log, create_job, get_job, start_job
+from app.encoder_profiles import AUTO_PROFILE, PROFILES, default_profile
+from app.jobs import append_job_log, create_job, get_job, mark_job_cancelled, start_job, update_job
+from app.render_graph import normalize_crop_modes
+from app.scheduler import QueueFull
 from app.subtitle_ai import get_whisper_model
 
 
@@ -17,7 +21,7 @@ def _get_url(data):
     return url
 
 
-def _parse_segments(segments):
+def parse_segments(segments):
     cleaned = []
     enabled_segments = []
     total_sec = 0
@@ -64,11 +68,14 @@ def _parse_segments(segments):
     return cleaned, enabled_segments, total_sec, warnings
 
 
-def start_clip_job(data):
+def job_options(data):
+    """Normalisasi opsi job yang dipakai bareng /api/start dan /api/batch (crop, subtitle, output, encoder, Gemini)."""
     data = data or {}
 
-    url = _get_url(data)
     crop_mode = str(data.get("crop_mode", "default")).strip() or "default"
+    if crop_mode not in ("default", "fit", "split_left", "split_right"):
+        crop_mode = "default"
+    crop_modes = normalize_crop_modes(data.get("crop_modes") or [crop_mode], default=crop_mode)
     use_subtitle = bool(data.get("use_subtitle", False))
     whisper_model = str(data.get("whisper_model", get_whisper_model())).strip() or get_whisper_model()
 
@@ -98,23 +105,6 @@ def start_clip_job(data):
     except Exception as e:
         raise ValueError(f"Folder output tidak bisa dibuat/diakses: {output_dir}\n\nDetail: {type(e).__name__}: {str(e)}")
 
-    cleaned, enabled_segments, total_sec, warnings = _parse_segments(data.get("segments", []))
-    est_bytes = estimate_total_size_bytes(total_sec)
-
-    job_id = uuid.uuid4().hex
-    create_job(job_id, output_dir=output_dir)
-
-    if warnings:
-        append_job_log(job_id, "\n⏱️ Standar durasi: maksimal 03:00 (180 detik) per klip.\n")
-        for w in warnings[:80]:
-            try:
-                append_job_log(
-                    job_id,
-                    f"⚠️ Durasi segmen melebihi batas, auto-trim end {w.get('end_before')} → {w.get('end_after')} (limit {w.get('limit_s')}s)\n",
-                )
-            except Exception:
-                continue
-
     use_gemini_suggestions = bool(data.get("use_gemini_suggestions", False))
     gemini_api_key = None
     if use_gemini_suggestions:
@@ -123,34 +113,149 @@ def start_clip_job(data):
             cfg_tmp = load_config()
             gemini_api_key = cfg_tmp.get("gemini_api_key")
 
-    payload = {
-        "url": url,
-        "segments": cleaned,
-        "crop_mode": crop_mode if crop_mode in ("default", "fit", "split_left", "split_right") else "default",
+    encoder_profile = str(data.get("encoder_profile") or (load_config() or {}).get("encoder_profile") or default_profile()).strip().lower()
+    if encoder_profile not in PROFILES and encoder_profile != AUTO_PROFILE:
+        encoder_profile = default_profile()
+    try:
+        target_turnaround_s = max(10, int(data.get("target_turnaround_s"))) if data.get("target_turnaround_s") else None
+    except Exception:
+        target_turnaround_s = None
+
+    # None = ikut YTCLIPPER_SOURCE_MODE / config (diputuskan di proses_dengan_segmen)
+    source_mode = str(data.get("source_mode") or "").strip().lower() or None
+    if source_mode not in (None, "auto", "per_clip"):
+        source_mode = None
+
+    clip_workers = data.get("clip_workers")
+    try:
+        clip_workers = max(1, int(clip_workers)) if clip_workers is not None else None
+    except Exception:
+        clip_workers = None
+
+    return {
+        "crop_modes": crop_modes,
         "use_subtitle": use_subtitle,
         "whisper_model": whisper_model,
         "subtitle_language": subtitle_language,
         "subtitle_position": subtitle_position,
         "output_dir": output_dir,
-        "apply_padding": False,
-        "total_clips": len(enabled_segments),
+        "use_gemini_suggestions": use_gemini_suggestions,
         "gemini_api_key": gemini_api_key,
+        "encoder_profile": encoder_profile,
+        "target_turnaround_s": target_turnaround_s,
+        "clip_workers": clip_workers,
+        "source_mode": source_mode,
+    }
+
+
+def build_payload(options, url, segments, total_clips):
+    return {
+        "url": url,
+        "segments": segments,
+        "crop_mode": options["crop_modes"][0],
+        "crop_modes": options["crop_modes"],
+        "use_subtitle": options["use_subtitle"],
+        "whisper_model": options["whisper_model"],
+        "subtitle_language": options["subtitle_language"],
+        "subtitle_position": options["subtitle_position"],
+        "output_dir": options["output_dir"],
+        "apply_padding": False,
+        "total_clips": total_clips,
+        "gemini_api_key": options["gemini_api_key"],
+        "clip_workers": options["clip_workers"],
+        "encoder_profile": options["encoder_profile"],
+        "target_turnaround_s": options["target_turnaround_s"],
+        "source_mode": options["source_mode"],
     }
 
-    start_job(job_id, payload)
 
+def log_duration_warnings(job_id, warnings):
+    if not warnings:
+        return
+    append_job_log(job_id, "\n⏱️ Standar durasi: maksimal 03:00 (180 detik) per klip.\n")
+    for w in warnings[:80]:
+        try:
+            append_job_log(
+                job_id,
+                f"⚠️ Durasi segmen melebihi batas, auto-trim end {w.get('end_before')} → {w.get('end_after')} (limit {w.get('limit_s')}s)\n",
+            )
+        except Exception:
+            continue
+
+
+def remember_options(data, options):
     cfg = load_config()
-    cfg["output_dir"] = output_dir
-    cfg["output_mode"] = "custom" if data.get("output_dir") else "default"
-    cfg["crop_mode"] = payload["crop_mode"]
-    cfg["use_subtitle"] = use_subtitle
-    cfg["whisper_model"] = whisper_model
-    cfg["subtitle_language"] = subtitle_language
-    cfg["subtitle_position"] = subtitle_position
-    cfg["use_gemini_suggestions"] = use_gemini_suggestions
+    cfg["output_dir"] = options["output_dir"]
+    cfg["output_mode"] = "custom" if (data or {}).get("output_dir") else "default"
+    cfg["crop_mode"] = options["crop_modes"][0]
+    cfg["use_subtitle"] = options["use_subtitle"]
+    cfg["whisper_model"] = options["whisper_model"]
+    cfg["subtitle_language"] = options["subtitle_language"]
+    cfg["subtitle_position"] = options["subtitle_position"]
+    cfg["encoder_profile"] = options["encoder_profile"]
+    cfg["use_gemini_suggestions"] = options["use_gemini_suggestions"]
     save_config(cfg)
 
-    return {"ok": True, "job_id": job_id, "estimated_bytes": est_bytes}
+
+def start_clip_job(data):
+    data = data or {}
+
+    url = _get_url(data)
+    options = job_options(data)
+
+    cleaned, enabled_segments, total_sec, warnings = parse_segments(data.get("segments", []))
+    est_bytes = estimate_total_size_bytes(total_sec) * len(options["crop_modes"])
+
+    job_id = uuid.uuid4().hex
+    create_job(job_id, output_dir=options["output_dir"])
+    log_duration_warnings(job_id, warnings)
+
+    payload = build_payload(options, url, cleaned, len(enabled_segments))
+
+    try:
+        queue_position = start_job(job_id, payload)
+    except QueueFull as e:
+        update_job(job_id, done=True, stage="rejected", status="Ditolak", error=str(e))
+        raise
+
+    remember_options(data, options)
+
+    return {"ok": True, "job_id": job_id, "estimated_bytes": est_bytes, "queue_position": int(queue_position or 0)}
+
+
+def cancel_job(job_id):
+    """
+    Batalkan job: yang masih antri langsung dikeluarkan dari scheduler / broker, yang lagi jalan di proses ini
+    dihentikan lewat token-nya (child ffmpeg/yt-dlp di-terminate). Job yang jalan di proses server lain
+    (atau worker node) ditandai cancel_requested dan berhenti waktu heartbeat-nya ngecek flag itu.
+    """
+    job = get_job(job_id)
+    if not job:
+        raise ValueError("Job tidak ditemukan.")
+    if job.get("done"):
+        return {"ok": True, "job_id": job_id, "stage": str(job.get("stage") or ""), "status": str(job.get("status") or "")}
+
+    update_job(job_id, cancel_requested=True)
+    if job.get("kind") == "batch":
+        # batch: semua job anak yang belum selesai ikut dibatalkan, status parent digabung dari anak
+        append_job_log(job_id, "\n🛑 Batch dibatalkan, menghentikan semua job anak...\n")
+        for child in job.get("children") or []:
+            try:
+                cancel_job(child["job_id"])
+            except ValueError:
+                continue
+        job = get_job(job_id, with_logs=False) or {}
+        if job.get("done"):
+            return {"ok": True, "job_id": job_id, "stage": str(job.get("stage") or ""), "status": str(job.get("status") or "")}
+        return {"ok": True, "job_id": job_id, "stage": "cancelling", "status": "Membatalkan..."}
+    if scheduler.cancel(job_id) or (broker.enabled() and broker.cancel(job_id)):
+        append_job_log(job_id, "\n🛑 Job dibatalkan sebelum mulai jalan.\n")
+        mark_job_cancelled(job_id)
+        return {"ok": True, "job_id": job_id, "stage": "cancelled", "status": "Dibatalkan"}
+
+    job_control.cancel(job_id)
+    append_job_log(job_id, "\n🛑 Permintaan batal diterima, menghentikan proses...\n")
+    return {"ok": True, "job_id": job_id, "stage": "cancelling", "status": "Membatalkan..."}
 
 
 def _open_folder(path):
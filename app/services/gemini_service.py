@@ -1,39 +1,60 @@
 import logging
 import json
+import threading
 
 from google import genai
 from google.genai import types
 
 logger = logging.getLogger(__name__)
 
-def generate_clip_metadata(transcript_text, api_key):
-    """
-    Generate saran judul dan caption untuk YouTube Shorts berdasarkan transkrip.
-    
-    Args:
-        transcript_text (str): Teks transkrip dari clip.
-        api_key (str): Gemini API Key.
-        
-    Returns:
-        dict: {
-            "title": "Judul yang disarankan",
-            "caption": "Caption yang disarankan",
-            "hashtags": ["#tag1", "#tag2"]
-        }
-    """
-    if not api_key:
-        raise ValueError("API Key Gemini belum diset. Cek settings, Bos!")
+PROMPT_VERSION = "shorts-v1"
 
-    if not transcript_text:
-        raise ValueError("Transkrip kosong. Gimana mau mikir kalo ga ada bahannya?")
+MODEL_CANDIDATES = ("gemini-2.0-flash", "gemini-flash-latest")
 
-    prompt = f"""
+_METADATA_SCHEMA = {
+    "type": "OBJECT",
+    "required": ["titles", "caption", "hashtags"],
+    "properties": {
+        "titles": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "caption": {"type": "STRING"},
+        "hashtags": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+}
+
+_BATCH_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "required": ["clip", "titles", "caption", "hashtags"],
+        "properties": {"clip": {"type": "INTEGER"}, **_METADATA_SCHEMA["properties"]},
+    },
+}
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(api_key):
+    """genai.Client dipakai ulang per API key (koneksi HTTP-nya ikut ke-reuse)."""
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(api_key)
+        if client is None:
+            client = genai.Client(api_key=api_key)
+            _CLIENTS[api_key] = client
+        return client
+
+
+_TASK = """
     Kamu adalah asisten kreatif media sosial yang ahli dalam membuat konten viral untuk YouTube Shorts (Indonesia).
 
     Tugasmu:
     Buatlah 3 opsi JUDUL yang clickbait tapi relevan, dan 1 CAPTION yang engaging untuk video pendek berdasarkan transkrip berikut.
     Sertakan juga 5-7 HASHTAG yang relevan dan trending.
+"""
 
+
+def build_prompt(transcript_text):
+    return f"""{_TASK}
     Format output WAJIB JSON valid seperti ini:
     {{
         "titles": ["Judul 1", "Judul 2", "Judul 3"],
@@ -45,35 +66,89 @@ def generate_clip_metadata(transcript_text, api_key):
     "{transcript_text}"
     """
 
-    cfg = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        response_schema={
-            "type": "OBJECT",
-            "required": ["titles", "caption", "hashtags"],
-            "properties": {
-                "titles": {"type": "ARRAY", "items": {"type": "STRING"}},
-                "caption": {"type": "STRING"},
-                "hashtags": {"type": "ARRAY", "items": {"type": "STRING"}},
-            },
-        },
-    )
-
-    client = genai.Client(api_key=api_key)
+
+def build_batch_prompt(transcripts):
+    blocks = "\n".join(f'    [CLIP {i}]\n    "{t}"\n' for i, t in enumerate(transcripts, 1))
+    return f"""{_TASK}
+    Kerjakan untuk SETIAP clip di bawah ini secara terpisah (jangan campur isi antar clip).
+
+    Format output WAJIB JSON array valid, satu objek per clip, "clip" = nomor clip:
+    [
+        {{"clip": 1, "titles": ["Judul 1", "Judul 2", "Judul 3"], "caption": "Isi caption...", "hashtags": ["#tag1", "#tag2"]}}
+    ]
+
+    Transkrip Video:
+{blocks}
+    """
+
+
+def _parse_json(text_response):
+    text_response = (text_response or "").strip()
+    if text_response.startswith("```json"):
+        text_response = text_response[7:]
+    if text_response.endswith("```"):
+        text_response = text_response[:-3]
+    text_response = text_response.strip()
+    if not text_response:
+        raise ValueError("Response dari Gemini kosong.")
+    return json.loads(text_response)
+
+
+def generate_json(api_key, prompt, schema):
+    cfg = types.GenerateContentConfig(response_mime_type="application/json", response_schema=schema)
+    client = get_client(api_key)
     last_err = None
-    for model_name in ("gemini-2.0-flash", "gemini-flash-latest"):
+    for model_name in MODEL_CANDIDATES:
         try:
             response = client.models.generate_content(model=model_name, contents=prompt, config=cfg)
-            text_response = (response.text or "").strip()
-            if text_response.startswith("```json"):
-                text_response = text_response[7:]
-            if text_response.endswith("```"):
-                text_response = text_response[:-3]
-            text_response = text_response.strip()
-            if not text_response:
-                raise ValueError("Response dari Gemini kosong.")
-            return json.loads(text_response)
+            return _parse_json(response.text)
         except Exception as e:
             last_err = e
 
     logger.error(f"Gemini Error: {str(last_err)}")
     raise Exception(f"Duh, Gemini lagi ngambek atau ada error: {str(last_err)}")
+
+
+def generate_clip_metadata(transcript_text, api_key):
+    """
+    Generate saran judul dan caption untuk YouTube Shorts berdasarkan transkrip.
+
+    Args:
+        transcript_text (str): Teks transkrip dari clip.
+        api_key (str): Gemini API Key.
+
+    Returns:
+        dict: {
+            "title": "Judul yang disarankan",
+            "caption": "Caption yang disarankan",
+            "hashtags": ["#tag1", "#tag2"]
+        }
+    """
+    if not api_key:
+        raise ValueError("API Key Gemini belum diset. Cek settings, Bos!")
+
+    if not transcript_text:
+        raise ValueError("Transkrip kosong. Gimana mau mikir kalo ga ada bahannya?")
+
+    return generate_json(api_key, build_prompt(transcript_text), _METADATA_SCHEMA)
+
+
+def generate_clip_metadata_batch(transcripts, api_key):
+    """
+    Satu request Gemini untuk beberapa transkrip clip sekaligus.
+
+    Returns:
+        dict: {nomor_clip (1-based): metadata}; clip yang tidak ada di response tidak ikut.
+    """
+    if not api_key:
+        raise ValueError("API Key Gemini belum diset. Cek settings, Bos!")
+    data = generate_json(api_key, build_batch_prompt(transcripts), _BATCH_SCHEMA)
+    out = {}
+    for item in data if isinstance(data, list) else []:
+        try:
+            n = int(item.get("clip"))
+        except Exception:
+            continue
+        if 1 <= n <= len(transcripts) and n not in out:
+            out[n] = {k: item.get(k) for k in ("titles", "caption", "hashtags")}
+    return out
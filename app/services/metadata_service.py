@@ -0,0 +1,221 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import job_control
+from app.services.gemini_service import PROMPT_VERSION, generate_clip_metadata, generate_clip_metadata_batch
+
+
+_LOCK = threading.Lock()
+_CACHE = None
+_DIRTY = False
+_MAX_ENTRIES = 5000
+
+_RATE_LOCK = threading.Lock()
+_NEXT_SLOT = 0.0
+
+
+def _env_int(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return int(default)
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return int(default)
+
+
+def cache_path():
+    p = os.environ.get("YTCLIPPER_METADATA_CACHE_PATH")
+    if p:
+        return str(p)
+    return os.path.join(os.path.expanduser("~"), ".ytclipper_metadata_cache.json")
+
+
+def cache_key(transcript_text):
+    norm = re.sub(r"\s+", " ", str(transcript_text or "")).strip()
+    return hashlib.sha256(f"{PROMPT_VERSION}\n{norm}".encode("utf-8")).hexdigest()
+
+
+def _load():
+    global _CACHE
+    if _CACHE is not None:
+        return _CACHE
+    entries = {}
+    try:
+        with open(cache_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get("entries"), dict):
+            entries = data["entries"]
+    except Exception:
+        pass
+    _CACHE = entries
+    return _CACHE
+
+
+def _save_locked():
+    global _DIRTY
+    if not _DIRTY:
+        return
+    path = cache_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"entries": _CACHE}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        _DIRTY = False
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+
+
+def flush():
+    with _LOCK:
+        if _CACHE is not None:
+            _save_locked()
+
+
+atexit.register(flush)
+
+
+def _cache_get(key):
+    with _LOCK:
+        it = _load().get(key)
+        return dict(it["meta"]) if it else None
+
+
+def _cache_put(key, meta):
+    global _DIRTY
+    with _LOCK:
+        cache = _load()
+        cache[key] = {"meta": meta, "ts": float(time.time())}
+        if len(cache) > _MAX_ENTRIES:
+            for k, _ in sorted(cache.items(), key=lambda kv: float(kv[1].get("ts", 0)))[: len(cache) - _MAX_ENTRIES]:
+                cache.pop(k, None)
+        _DIRTY = True
+        _save_locked()
+
+
+def _wait_rate_slot():
+    rpm = max(0, _env_int("YTCLIPPER_GEMINI_RPM", 15))
+    if rpm <= 0:
+        return
+    global _NEXT_SLOT
+    with _RATE_LOCK:
+        now = time.monotonic()
+        slot = max(now, _NEXT_SLOT)
+        _NEXT_SLOT = slot + 60.0 / float(rpm)
+    if slot > now:
+        time.sleep(slot - now)
+
+
+def _batches(items, max_items, max_chars):
+    batch = []
+    size = 0
+    for it in items:
+        n = len(it[1])
+        if batch and (len(batch) >= max_items or size + n > max_chars):
+            yield batch
+            batch = []
+            size = 0
+        batch.append(it)
+        size += n
+    if batch:
+        yield batch
+
+
+def _single(text, api_key):
+    _wait_rate_slot()
+    try:
+        return generate_clip_metadata(text, api_key)
+    except Exception as e:
+        return e
+
+
+def _run_batch(batch, api_key):
+    if len(batch) == 1:
+        return {batch[0][0]: _single(batch[0][1], api_key)}
+    _wait_rate_slot()
+    try:
+        got = generate_clip_metadata_batch([t for _, t in batch], api_key)
+    except Exception:
+        got = {}
+    out = {}
+    for n, (i, text) in enumerate(batch, 1):
+        meta = got.get(n)
+        out[i] = meta if meta and meta.get("titles") else _single(text, api_key)
+    return out
+
+
+def get_clip_metadata_many(transcripts, api_key):
+    """
+    Metadata judul/caption/hashtag untuk banyak transkrip clip. Yang sudah pernah di-generate
+    (hash transkrip + versi prompt sama) diambil dari cache; sisanya digabung per batch
+    dan dikirim paralel dengan batas request per menit.
+
+    Returns:
+        list: metadata (dict) atau Exception, sejajar dengan transcripts.
+    """
+    if not api_key:
+        raise ValueError("API Key Gemini belum diset. Cek settings, Bos!")
+    results = [None] * len(transcripts)
+    pending = []
+    keys = {}
+    for i, text in enumerate(transcripts):
+        text = str(text or "").strip()
+        if not text:
+            results[i] = ValueError("Transkrip kosong. Gimana mau mikir kalo ga ada bahannya?")
+            continue
+        key = cache_key(text)
+        keys[i] = key
+        cached = _cache_get(key)
+        if cached:
+            results[i] = cached
+        else:
+            pending.append((i, text))
+
+    if not pending:
+        return results
+
+    batches = list(
+        _batches(
+            pending,
+            max(1, _env_int("YTCLIPPER_GEMINI_BATCH_SIZE", 8)),
+            max(1000, _env_int("YTCLIPPER_GEMINI_BATCH_CHARS", 24000)),
+        )
+    )
+    workers = max(1, min(len(batches), _env_int("YTCLIPPER_GEMINI_CONCURRENCY", 3)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini") as pool:
+        futures = [(batch, pool.submit(job_control.wrap(_run_batch), batch, api_key)) for batch in batches]
+        for batch, fut in futures:
+            try:
+                got = fut.result()
+            except Exception as e:
+                for i, _ in batch:
+                    results[i] = e
+                continue
+            for i, meta in got.items():
+                results[i] = meta
+                if not isinstance(meta, Exception):
+                    _cache_put(keys[i], meta)
+    return results
+
+
+def get_clip_metadata(transcript_text, api_key):
+    result = get_clip_metadata_many([transcript_text], api_key)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def stats():
+    with _LOCK:
+        return {"path": cache_path(), "entries": len(_load()), "prompt_version": PROMPT_VERSION}
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from app import job_control
+from app.media_probe import start_time
+
+
+def plan_source_spans(ranges, gap_threshold_s=30.0, max_span_s=600.0):
+    """
+    Gabungkan range clip yang overlap/berdekatan jadi beberapa span sumber.
+
+    Args:
+        ranges (list): [(start, end), ...] sesuai urutan clip.
+        gap_threshold_s (float): jarak maksimal antar range supaya masih digabung.
+        max_span_s (float): panjang maksimal satu span hasil gabungan.
+
+    Returns:
+        list: [{"start": float, "end": float, "members": [idx, ...]}, ...] urut berdasarkan start.
+    """
+    gap = max(0.0, float(gap_threshold_s))
+    max_span = max(0.0, float(max_span_s))
+
+    order = sorted(range(len(ranges)), key=lambda i: (float(ranges[i][0]), float(ranges[i][1]), i))
+    spans = []
+    cur = None
+    for i in order:
+        st = float(ranges[i][0])
+        en = float(ranges[i][1])
+        if en <= st:
+            continue
+        if cur is not None and st <= cur["end"] + gap and (max(cur["end"], en) - cur["start"]) <= max_span:
+            cur["end"] = max(cur["end"], en)
+            cur["members"].append(i)
+            continue
+        cur = {"start": st, "end": en, "members": [i]}
+        spans.append(cur)
+    return spans
+
+
+class SourceSpan:
+    """
+    Satu file sumber yang dipakai bareng beberapa clip. fetch(span) dipanggil sekali dan
+    boleh mengembalikan path atau dict {"path", "base", "release"}; file dilepas saat ref terakhir release().
+    Kalau cuma path, base diukur dari timestamp awal file (potongan -c copy mulai di keyframe sebelum start).
+    """
+
+    def __init__(self, start, end, refs, fetch):
+        self.start = float(start)
+        self.end = float(end)
+        self._refs = int(refs)
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._done = False
+        self.source = None
+        self.error = None
+
+    @property
+    def path(self):
+        return (self.source or {}).get("path")
+
+    def _wrap(self, result):
+        if not result:
+            return None
+        if isinstance(result, dict):
+            return result
+        path = str(result)
+
+        def _remove():
+            try:
+                os.remove(path)
+            except Exception:
+                pass
+
+        base = start_time(path)
+        return {"path": path, "base": self.start if base is None else base, "release": _remove}
+
+    def acquire(self):
+        with self._lock:
+            if not self._done:
+                try:
+                    self.source = self._wrap(self._fetch(self))
+                except job_control.Cancelled as e:
+                    # job dibatalkan: jangan dianggap gagal download (fallback per-clip bakal download lagi)
+                    self.error = e
+                    self.source = None
+                    self._done = True
+                    raise
+                except Exception as e:
+                    self.error = e
+                    self.source = None
+                    print(f"⚠️ Download sumber bersama gagal, fallback ke download per-clip: {e}")
+                self._done = True
+            elif isinstance(self.error, job_control.Cancelled):
+                raise self.error
+            if self.path and os.path.exists(self.path):
+                return self.source
+            return None
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0 or not self.source:
+                return
+            release = self.source.get("release")
+            self.source = None
+        if release:
+            release()
+
+
+def make_scratch_dir():
+    base = os.environ.get("YTCLIPPER_SCRATCH_DIR") or None
+    if base:
+        os.makedirs(base, exist_ok=True)
+    return tempfile.mkdtemp(prefix="ytclipper_src_", dir=base)
+
+
+def remove_scratch_dir(path):
+    if not path:
+        return
+    shutil.rmtree(path, ignore_errors=True)
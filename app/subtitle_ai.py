@@ -3,6 +3,7 @@ import re
 import subprocess
 import tempfile
 
+from app import job_control
 from app.core_constants import DEFAULT_WHISPER_MODEL
 
 
@@ -79,25 +80,31 @@ def get_faster_whisper_model():
 
 def _run_ffmpeg(cmd):
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        job_control.run_process(cmd)
         return
     except subprocess.CalledProcessError as e:
         err = (e.stderr or "").strip() or (e.stdout or "").strip()
         raise ValueError("FFmpeg gagal saat preprocessing audio." + (f"\n\nDetail: {err}" if err else ""))
 
 
-def _preprocess_audio(input_path: str, tmpdir: tempfile.TemporaryDirectory) -> str:
+def _preprocess_audio(input_path: str, tmpdir: tempfile.TemporaryDirectory, start=None, end=None, input_args=None) -> str:
     out_wav = os.path.join(tmpdir.name, "audio.wav")
 
     audio_filter = _env_str("YTCLIPPER_ASR_AUDIO_FILTER")
+    if input_args is None:
+        input_args = []
+        if start is not None:
+            input_args += ["-ss", f"{float(start):.3f}"]
+        if end is not None:
+            input_args += ["-to", f"{float(end):.3f}"]
+        input_args += ["-i", str(input_path)]
     cmd = [
         "ffmpeg",
         "-y",
         "-hide_banner",
         "-loglevel",
         "error",
-        "-i",
-        str(input_path),
+        *input_args,
         "-map",
         "0:a:0?",
         "-vn",
@@ -175,65 +182,119 @@ def format_timestamp(seconds):
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
 
-def generate_subtitle(video_file, subtitle_file, language=None):
+def _segment_dict(segment):
+    words = []
+    for w in getattr(segment, "words", None) or []:
+        w_st = getattr(w, "start", None)
+        w_en = getattr(w, "end", None)
+        if w_st is None or w_en is None:
+            continue
+        words.append({"start": float(w_st), "end": float(w_en), "text": str(getattr(w, "word", "") or "")})
+    st = float(getattr(segment, "start", 0.0) or 0.0)
+    return {
+        "start": st,
+        "end": float(getattr(segment, "end", st) or st),
+        "text": str(getattr(segment, "text", "") or "").strip(),
+        "words": words,
+    }
+
+
+def write_srt(segments, subtitle_file):
+    """
+    Tulis segmen transkrip ({"start", "end", "text", "words"}) ke file SRT.
+    Kalau ada word timestamps, batas cue ikut kata pertama/terakhir.
+
+    Returns:
+        int: jumlah cue yang ditulis.
+    """
+    pad_ms = _env_int("YTCLIPPER_SRT_PAD_MS", 0)
+    pad_s = max(0.0, float(pad_ms) / 1000.0)
+    min_seg_ms = _env_int("YTCLIPPER_SRT_MIN_SEG_MS", 200)
+    min_seg_s = max(0.0, float(min_seg_ms) / 1000.0)
+
+    prev_end = 0.0
+    idx = 0
+
+    with open(subtitle_file, "w", encoding="utf-8") as f:
+        for segment in segments:
+            text = str(segment.get("text") or "").strip()
+            if not text:
+                continue
+
+            st = float(segment.get("start") or 0.0)
+            en = float(segment.get("end") or st)
+            words = segment.get("words")
+            if words:
+                st = min(float(w["start"]) for w in words)
+                en = max(float(w["end"]) for w in words)
+
+            st = max(0.0, st - pad_s)
+            en = max(st, en + pad_s)
+            if st < prev_end:
+                st = prev_end
+            if en - st < min_seg_s:
+                en = st + min_seg_s
+            if en <= st:
+                continue
+            prev_end = en
+
+            start_time = format_timestamp(st)
+            end_time = format_timestamp(en)
+            idx += 1
+            f.write(f"{idx}\n")
+            f.write(f"{start_time} --> {end_time}\n")
+            f.write(f"{text}\n\n")
+
+    return idx
+
+
+def _collect_segments(segments):
+    # segments dari faster-whisper itu generator: decode jalan sambil diiterasi, jadi cek pembatalan per segmen
+    out = []
+    for seg in segments:
+        job_control.check()
+        out.append(_segment_dict(seg))
+    return out
+
+
+def transcribe_words(input_path=None, language=None, start=None, end=None, input_args=None):
+    """
+    Transcribe audio (file atau input ffmpeg custom) dengan word timestamps.
+
+    Returns:
+        list: [{"start", "end", "text", "words": [{"start", "end", "text"}, ...]}, ...], waktu relatif awal audio.
+    """
+    model = get_faster_whisper_model()
+    with tempfile.TemporaryDirectory(prefix="ytclipper_asr_") as tmp:
+        tmpdir = tempfile.TemporaryDirectory(dir=tmp)
+        try:
+            wav = _preprocess_audio(input_path, tmpdir, start=start, end=end, input_args=input_args)
+            segments, info = _transcribe(model, wav, language=language, word_timestamps=True)
+            return _collect_segments(segments)
+        finally:
+            try:
+                tmpdir.cleanup()
+            except Exception:
+                pass
+
+
+def generate_subtitle(video_file, subtitle_file, language=None, start=None, end=None):
     try:
         model = get_faster_whisper_model()
 
         with tempfile.TemporaryDirectory(prefix="ytclipper_asr_") as tmp:
             tmpdir = tempfile.TemporaryDirectory(dir=tmp)
             try:
-                wav = _preprocess_audio(video_file, tmpdir)
+                wav = _preprocess_audio(video_file, tmpdir, start=start, end=end)
                 segments, info = _transcribe(model, wav, language=language, word_timestamps=None)
+                segments = _collect_segments(segments)
             finally:
                 try:
                     tmpdir.cleanup()
                 except Exception:
                     pass
 
-        pad_ms = _env_int("YTCLIPPER_SRT_PAD_MS", 0)
-        pad_s = max(0.0, float(pad_ms) / 1000.0)
-        min_seg_ms = _env_int("YTCLIPPER_SRT_MIN_SEG_MS", 200)
-        min_seg_s = max(0.0, float(min_seg_ms) / 1000.0)
-
-        prev_end = 0.0
-        idx = 0
-
-        with open(subtitle_file, "w", encoding="utf-8") as f:
-            for segment in segments:
-                text = str(getattr(segment, "text", "") or "").strip()
-                if not text:
-                    continue
-
-                st = float(getattr(segment, "start", 0.0) or 0.0)
-                en = float(getattr(segment, "end", st) or st)
-                words = getattr(segment, "words", None)
-                if words:
-                    try:
-                        w_st = [float(getattr(w, "start", None)) for w in words if getattr(w, "start", None) is not None]
-                        w_en = [float(getattr(w, "end", None)) for w in words if getattr(w, "end", None) is not None]
-                        if w_st and w_en:
-                            st = min(w_st)
-                            en = max(w_en)
-                    except Exception:
-                        pass
-
-                st = max(0.0, st - pad_s)
-                en = max(st, en + pad_s)
-                if st < prev_end:
-                    st = prev_end
-                if en - st < min_seg_s:
-                    en = st + min_seg_s
-                if en <= st:
-                    continue
-                prev_end = en
-
-                start_time = format_timestamp(st)
-                end_time = format_timestamp(en)
-                idx += 1
-                f.write(f"{idx}\n")
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{text}\n\n")
-
+        write_srt(segments, subtitle_file)
         return True
     except Exception:
         return False
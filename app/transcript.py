@@ -0,0 +1,144 @@
+import os
+import threading
+
+from app import job_control, media_cache
+from app.format_cache import client_profile
+from app.source_plan import plan_source_spans
+from app.subtitle_ai import transcribe_words
+from app.yt_stream import direct_streams_enabled, invalidate_streams, resolve_streams, stream_input_args
+
+
+AUDIO_FORMAT_CANDIDATES = ["bestaudio/best", "best"]
+
+
+def _env_bool(name, default=False):
+    v = os.environ.get(name)
+    if v is None:
+        return bool(default)
+    return str(v).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def shared_transcript_enabled():
+    return _env_bool("YTCLIPPER_SHARED_TRANSCRIPT", True)
+
+
+def _shift(item, offset):
+    out = dict(item)
+    out["start"] = float(item["start"]) + offset
+    out["end"] = float(item["end"]) + offset
+    return out
+
+
+class Transcript:
+    """
+    Transkrip satu video dengan waktu absolut (detik video) untuk range yang sudah di-transcribe.
+    Dipakai bareng semua clip di satu job: SRT dan teks Gemini per clip diiris dari sini.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.segments = []
+        self._lock = threading.Lock()
+
+    def add_span(self, start, end, segments):
+        """Tambah hasil transcribe untuk [start, end]; waktu segmen relatif terhadap start."""
+        offset = float(start)
+        shifted = []
+        for seg in segments:
+            s = _shift(seg, offset)
+            s["words"] = [_shift(w, offset) for w in seg.get("words") or []]
+            shifted.append(s)
+        with self._lock:
+            self.spans.append((float(start), float(end)))
+            self.segments.extend(shifted)
+            self.segments.sort(key=lambda s: s["start"])
+
+    def covers(self, start, end):
+        with self._lock:
+            return any(st <= float(start) + 1e-3 and float(end) - 1e-3 <= en for st, en in self.spans)
+
+    def slice(self, start, end):
+        """
+        Segmen yang jatuh di [start, end], digeser supaya 0 = awal clip. Kata dipilih berdasarkan
+        titik tengahnya; segmen tanpa word timestamps dipilih berdasarkan titik tengah segmen.
+        """
+        start = float(start)
+        end = float(end)
+        out = []
+        with self._lock:
+            segments = list(self.segments)
+        for seg in segments:
+            if seg["end"] <= start or seg["start"] >= end:
+                continue
+            words = [w for w in seg.get("words") or [] if start <= (w["start"] + w["end"]) / 2.0 < end]
+            if seg.get("words"):
+                if not words:
+                    continue
+                text = "".join(w["text"] for w in words).strip()
+                st = max(start, words[0]["start"])
+                en = min(end, words[-1]["end"])
+            else:
+                if not (start <= (seg["start"] + seg["end"]) / 2.0 < end):
+                    continue
+                text = seg["text"]
+                st = max(start, seg["start"])
+                en = min(end, seg["end"])
+            out.append(
+                {
+                    "start": st - start,
+                    "end": en - start,
+                    "text": text,
+                    "words": [
+                        {"start": max(0.0, w["start"] - start), "end": min(end, w["end"]) - start, "text": w["text"]} for w in words
+                    ],
+                }
+            )
+        return out
+
+    def text(self, start, end):
+        return " ".join(s["text"] for s in self.slice(start, end) if s["text"]).strip()
+
+
+def _audio_input_args(video_id, start, end):
+    hit = media_cache.lookup(video_id, "audio", 0.0, None)
+    if hit:
+        args = ["-ss", f"{float(start):.3f}", "-to", f"{float(end):.3f}", "-i", hit["path"]]
+        return args, lambda: media_cache.release(hit["key"])
+    if not direct_streams_enabled():
+        return None, None
+    resolved = resolve_streams(video_id, AUDIO_FORMAT_CANDIDATES, profile=client_profile("audio"))
+    args, _ = stream_input_args(resolved, start=start, end=end, audio_only=True)
+    return args, None
+
+
+def build_transcript(video_id, ranges, language=None, gap_threshold_s=30.0, max_span_s=1800.0):
+    """
+    Transcribe gabungan range clip sekali (per span hasil plan_source_spans) dengan word timestamps.
+
+    Returns:
+        Transcript | None: None kalau audio tidak bisa diambil; clip lalu fallback ke subtitle per clip.
+    """
+    spans = plan_source_spans(ranges, gap_threshold_s=gap_threshold_s, max_span_s=max_span_s)
+    if not spans:
+        return None
+    transcript = Transcript()
+    for sp in spans:
+        release = None
+        try:
+            input_args, release = _audio_input_args(video_id, sp["start"], sp["end"])
+            if not input_args:
+                continue
+            segments = transcribe_words(language=language, input_args=input_args)
+        except job_control.Cancelled:
+            raise
+        except Exception as e:
+            invalidate_streams(video_id)
+            print(f"⚠️ Transcribe {sp['start']:.0f}s → {sp['end']:.0f}s gagal, clip di range ini transcribe sendiri: {e}")
+            continue
+        finally:
+            if release:
+                release()
+        transcript.add_span(sp["start"], sp["end"], segments)
+    if not transcript.spans:
+        return None
+    return transcript
@@ -0,0 +1,213 @@
+import copy
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from app.yt_utils import get_cookies_path
+
+
+_INFO_CACHE = {}
+_INFO_CACHE_LOCK = threading.Lock()
+_INFO_LOCKS = {}
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _env_bool(name, default=False):
+    v = os.environ.get(name)
+    if v is None:
+        return bool(default)
+    return str(v).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def _env_int(name, default):
+    v = os.environ.get(name)
+    if v is None:
+        return int(default)
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return int(default)
+
+
+def inprocess_enabled():
+    if not _env_bool("YTCLIPPER_YTDLP_INPROCESS", True):
+        return False
+    try:
+        import yt_dlp  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def _info_ttl_s():
+    return max(0, _env_int("YTCLIPPER_YTDLP_INFO_TTL_S", 1800))
+
+
+class _QuietLogger:
+    def debug(self, msg):
+        return
+
+    def info(self, msg):
+        return
+
+    def warning(self, msg):
+        return
+
+    def error(self, msg):
+        return
+
+
+def base_params(**extra):
+    params = {
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "noplaylist": True,
+        "source_address": "0.0.0.0",
+        "remote_components": ["ejs:github"],
+        "extractor_args": {"youtube": {"player_client": ["android", "ios"]}},
+        "logger": _QuietLogger(),
+    }
+    cookies = get_cookies_path()
+    if cookies:
+        params["cookiefile"] = cookies
+    params.update(extra)
+    return params
+
+
+def _new_ydl(**extra):
+    from yt_dlp import YoutubeDL
+
+    return YoutubeDL(base_params(**extra))
+
+
+class YdlPool:
+    def __init__(self, size, fmt=None):
+        self.size = max(1, int(size))
+        self.fmt = fmt
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self):
+        ydl = None
+        try:
+            ydl = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    ydl = _new_ydl(**({"format": self.fmt} if self.fmt else {}))
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                ydl = self._idle.get()
+        try:
+            yield ydl
+        finally:
+            self._idle.put(ydl)
+
+
+def _pool(fmt=None):
+    key = str(fmt or "")
+    with _POOLS_LOCK:
+        p = _POOLS.get(key)
+        if p is None:
+            p = YdlPool(_env_int("YTCLIPPER_YTDLP_POOL_SIZE", 4), fmt=fmt)
+            _POOLS[key] = p
+        return p
+
+
+def _info_lock(video_id):
+    with _INFO_CACHE_LOCK:
+        lock = _INFO_LOCKS.get(video_id)
+        if lock is None:
+            lock = threading.Lock()
+            _INFO_LOCKS[video_id] = lock
+        return lock
+
+
+def _cached_info(video_id):
+    ttl_s = _info_ttl_s()
+    with _INFO_CACHE_LOCK:
+        it = _INFO_CACHE.get(video_id)
+        if not it:
+            return None
+        if ttl_s <= 0 or (time.time() - float(it["ts"])) > ttl_s:
+            _INFO_CACHE.pop(video_id, None)
+            return None
+        return it["info"]
+
+
+def raw_info(video_id):
+    """
+    Info dict mentah (belum pilih format) untuk satu video. Di-cache per video_id
+    supaya extractor YouTube cuma jalan sekali untuk durasi, resolve stream, dan download.
+    """
+    vid = str(video_id)
+    info = _cached_info(vid)
+    if info is not None:
+        return info
+    with _info_lock(vid):
+        info = _cached_info(vid)
+        if info is not None:
+            return info
+        with _pool().borrow() as ydl:
+            info = ydl.extract_info(f"https://youtu.be/{vid}", download=False, process=False)
+        if not isinstance(info, dict):
+            raise ValueError("yt-dlp tidak mengembalikan info video.")
+        with _INFO_CACHE_LOCK:
+            _INFO_CACHE[vid] = {"ts": float(time.time()), "info": info}
+        return info
+
+
+def invalidate_info(video_id):
+    with _INFO_CACHE_LOCK:
+        _INFO_CACHE.pop(str(video_id), None)
+
+
+def get_duration_seconds(video_id):
+    info = raw_info(video_id)
+    dur = info.get("duration")
+    if dur is None:
+        return None
+    return int(round(float(dur)))
+
+
+def select_format(video_id, fmt):
+    raw = raw_info(video_id)
+    with _pool(fmt).borrow() as ydl:
+        return ydl.process_ie_result(copy.deepcopy(raw), download=False)
+
+
+def download(video_id, fmt, outtmpl, **params):
+    raw = raw_info(video_id)
+    ydl = _new_ydl(format=fmt, outtmpl=outtmpl, **params)
+    try:
+        ydl.process_ie_result(copy.deepcopy(raw), download=True)
+    finally:
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+
+def download_audio(video_id, fmt, outtmpl, audio_format="mp3"):
+    download(
+        video_id,
+        fmt,
+        outtmpl,
+        postprocessors=[{"key": "FFmpegExtractAudio", "preferredcodec": str(audio_format)}],
+    )
@@ -4,6 +4,7 @@ import time
 import subprocess
 import sys
 from urllib.parse import parse_qs, urlparse
+from app import yt_engine
 from app.yt_utils import get_yt_dlp_cookies_args
 
 
@@ -51,6 +52,19 @@ def get_duration(video_id):
                 except Exception:
                     _DURATION_CACHE.pop(key, None)
 
+    duration = None
+    if yt_engine.inprocess_enabled():
+        try:
+            duration = yt_engine.get_duration_seconds(video_id)
+        except Exception:
+            yt_engine.invalidate_info(video_id)
+            duration = None
+    if duration is not None:
+        if ttl_s > 0:
+            with _DURATION_CACHE_LOCK:
+                _DURATION_CACHE[key] = {"ts": float(time.time()), "duration": int(duration)}
+        return int(duration)
+
     cmd = [
         sys.executable,
         "-m",
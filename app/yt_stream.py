@@ -0,0 +1,248 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from app import format_cache, yt_engine
+from app.yt_utils import get_yt_dlp_cookies_args
+
+
+_STREAM_CACHE = {}
+_STREAM_CACHE_LOCK = threading.Lock()
+_RESOLVE_LOCKS = {}
+
+_HEIGHT_LADDER = (144, 240, 360, 480, 720, 1080, 1440, 2160, 4320)
+
+_DEFAULT_TTL_S = 3600
+_EXPIRY_MARGIN_S = 300
+
+
+def _env_bool(name, default=False):
+    v = os.environ.get(name)
+    if v is None:
+        return bool(default)
+    return str(v).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def direct_streams_enabled():
+    return _env_bool("YTCLIPPER_DIRECT_STREAMS", True)
+
+
+def source_height_cap(required_height):
+    raw = str(os.environ.get("YTCLIPPER_SOURCE_HEIGHT_CAP") or "auto").strip().lower()
+    if raw in ("0", "off", "none", "false"):
+        return None
+    if raw != "auto":
+        try:
+            return max(144, int(raw))
+        except Exception:
+            pass
+    for h in _HEIGHT_LADDER:
+        if h >= int(required_height):
+            return h
+    return None
+
+
+def capped_format_candidates(required_height, fallback):
+    """
+    Selector yt-dlp yang ambil stream terkecil yang masih cukup buat geometri output:
+    best dengan height <= rung ladder pertama yang >= required_height, lalu fallback list lama.
+    """
+    cap = source_height_cap(required_height)
+    if not cap:
+        return list(fallback)
+    capped = [
+        f"bestvideo[height<={cap}][ext=mp4]+bestaudio[ext=m4a]/best[height<={cap}][ext=mp4]/best[height<={cap}]",
+        f"bestvideo[height<={cap}]+bestaudio/best[height<={cap}]",
+    ]
+    return capped + [f for f in fallback if f not in capped]
+
+
+def _url_expiry(url, now):
+    try:
+        raw = parse_qs(urlparse(str(url)).query).get("expire", [None])[0]
+        if raw:
+            return float(raw)
+    except Exception:
+        pass
+    return now + _DEFAULT_TTL_S
+
+
+def _stream_from_format(fmt):
+    return {
+        "url": fmt.get("url"),
+        "format_id": fmt.get("format_id"),
+        "ext": fmt.get("ext"),
+        "vcodec": fmt.get("vcodec"),
+        "acodec": fmt.get("acodec"),
+        "width": fmt.get("width"),
+        "height": fmt.get("height"),
+        "http_headers": dict(fmt.get("http_headers") or {}),
+    }
+
+
+def parse_resolved_info(info, now=None):
+    now = time.time() if now is None else float(now)
+    requested = info.get("requested_formats") or []
+    video = None
+    audio = None
+    if requested:
+        for fmt in requested:
+            if fmt.get("vcodec") not in (None, "none") and video is None:
+                video = _stream_from_format(fmt)
+            elif fmt.get("acodec") not in (None, "none") and audio is None:
+                audio = _stream_from_format(fmt)
+    elif info.get("url"):
+        single = _stream_from_format(info)
+        if single.get("vcodec") in (None, "none"):
+            audio = single
+        else:
+            video = single
+
+    urls = [s["url"] for s in (video, audio) if s and s.get("url")]
+    if not urls:
+        raise ValueError("yt-dlp tidak mengembalikan URL stream.")
+    expires_at = min(_url_expiry(u, now) for u in urls)
+    return {
+        "video": video,
+        "audio": audio,
+        "duration": info.get("duration"),
+        "resolved_at": now,
+        "expires_at": float(expires_at),
+    }
+
+
+def _resolve_subprocess(video_id, fmt):
+    cmd = [
+        sys.executable,
+        "-m",
+        "yt_dlp",
+        "--force-ipv4",
+        "--quiet",
+        "--no-warnings",
+        "--no-playlist",
+        "--remote-components",
+        "ejs:github",
+        "--extractor-args",
+        "youtube:player_client=android,ios",
+        "-f",
+        fmt,
+        "-j",
+    ] + get_yt_dlp_cookies_args() + [
+        f"https://youtu.be/{video_id}",
+    ]
+    res = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=60)
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+
+def _resolve_info(video_id, fmt):
+    if yt_engine.inprocess_enabled():
+        try:
+            return yt_engine.select_format(video_id, fmt)
+        except Exception:
+            yt_engine.invalidate_info(video_id)
+    return _resolve_subprocess(video_id, fmt)
+
+
+def _resolve_lock(key):
+    with _STREAM_CACHE_LOCK:
+        lock = _RESOLVE_LOCKS.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _RESOLVE_LOCKS[key] = lock
+        return lock
+
+
+def _cache_get(key, now):
+    with _STREAM_CACHE_LOCK:
+        it = _STREAM_CACHE.get(key)
+        if not it:
+            return None
+        if now >= float(it.get("expires_at", 0)) - _EXPIRY_MARGIN_S:
+            _STREAM_CACHE.pop(key, None)
+            return None
+        return it
+
+
+def resolve_streams(video_id, format_candidates, profile=None):
+    """
+    Ambil URL stream video/audio langsung (sekali per video+format), cache sampai mendekati expire.
+
+    Returns:
+        dict: {"video": {...}|None, "audio": {...}|None, "format": str, "expires_at": float, ...}
+    """
+    profile = profile or format_cache.client_profile("stream")
+    last_error = None
+    attempts = 0
+    for fmt in format_cache.ordered_candidates(video_id, profile, format_candidates):
+        key = (str(video_id), str(fmt))
+        now = time.time()
+        cached = _cache_get(key, now)
+        if cached:
+            return cached
+        with _resolve_lock(key):
+            cached = _cache_get(key, time.time())
+            if cached:
+                return cached
+            attempts += 1
+            try:
+                info = _resolve_info(video_id, fmt)
+                resolved = parse_resolved_info(info)
+            except Exception as e:
+                last_error = e
+                format_cache.record_result(video_id, profile, fmt, ok=False)
+                continue
+            format_cache.note_lookup(video_id, profile, attempts, succeeded=True)
+            format_cache.record_result(video_id, profile, fmt, ok=True)
+            resolved["format"] = str(fmt)
+            with _STREAM_CACHE_LOCK:
+                _STREAM_CACHE[key] = resolved
+            return resolved
+    if attempts:
+        format_cache.note_lookup(video_id, profile, attempts, succeeded=False)
+    if last_error:
+        raise last_error
+    raise ValueError("Tidak ada format stream yang bisa di-resolve.")
+
+
+def invalidate_streams(video_id):
+    vid = str(video_id)
+    yt_engine.invalidate_info(vid)
+    with _STREAM_CACHE_LOCK:
+        for key in [k for k in _STREAM_CACHE if k[0] == vid]:
+            _STREAM_CACHE.pop(key, None)
+
+
+def ffmpeg_input_args(stream, start=None, end=None):
+    args = []
+    headers = dict(stream.get("http_headers") or {})
+    ua = headers.pop("User-Agent", None)
+    if ua:
+        args += ["-user_agent", str(ua)]
+    if headers:
+        args += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+    if start is not None:
+        args += ["-ss", f"{float(start):.3f}"]
+    if end is not None:
+        args += ["-to", f"{float(end):.3f}"]
+    args += ["-i", str(stream["url"])]
+    return args
+
+
+def stream_input_args(resolved, start=None, end=None, audio_only=False):
+    """
+    Argumen input ffmpeg (plus -map) untuk stream hasil resolve_streams, dengan seek -ss/-to di sisi input.
+    """
+    video = resolved.get("video")
+    audio = resolved.get("audio")
+    if audio_only:
+        src = audio or video
+        return ffmpeg_input_args(src, start, end), ["-map", "0:a:0"]
+    if video and audio:
+        args = ffmpeg_input_args(video, start, end) + ffmpeg_input_args(audio, start, end)
+        return args, ["-map", "0:v:0", "-map", "1:a:0"]
+    src = video or audio
+    return ffmpeg_input_args(src, start, end), ["-map", "0:v:0?", "-map", "0:a:0?"]
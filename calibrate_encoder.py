@@ -0,0 +1,25 @@
+import argparse
+
+from app.encoder_profiles import PROFILE_ORDER, calibration_path, calibrate
+from app.render_graph import CROP_MODES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ukur kecepatan encode (fps) tiap encoder profile di mesin ini.")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILE_ORDER, default=list(PROFILE_ORDER))
+    parser.add_argument("--crop-modes", nargs="+", choices=CROP_MODES, default=list(CROP_MODES))
+    parser.add_argument("--seconds", type=int, default=5, help="Durasi clip uji (detik).")
+    parser.add_argument("--source-height", type=int, default=1080, help="Tinggi video sumber uji (px).")
+    args = parser.parse_args()
+
+    print("--- 🎛️ Kalibrasi encoder profile ---\n")
+    result = calibrate(profiles=args.profiles, crop_modes=args.crop_modes, seconds=args.seconds, source_height=args.source_height)
+
+    print("\n" + "=" * 40)
+    for name, entry in result["profiles"].items():
+        print(f"{name:<9} rata-rata {entry['fps']:>7.1f} fps")
+    print(f"\n💾 Disimpan ke {calibration_path()}")
+
+
+if __name__ == "__main__":
+    main()
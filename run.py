@@ -8,9 +8,13 @@ if __name__ == "__main__":
     debug = bool(settings.debug)
     host = str(settings.host)
     port = int(settings.port)
+    # hot reload cuma bisa satu proses; state job dibagi antar worker lewat SQLite (app/job_store.py)
+    workers = 1 if debug else int(settings.workers)
     print(f"🚀 Server running at http://{host}:{port}")
     print(f"🔥 Hot reload: {'ON' if debug else 'OFF'} (set DEBUG=0 to disable)")
+    if workers > 1:
+        print(f"👷 Worker server: {workers}")
     target = "app.main:app" if debug else "app.main:app"
     # Enable proxy headers for correct IP and scheme behind Nginx
-    uvicorn.run(target, host=host, port=port, reload=debug, proxy_headers=True, forwarded_allow_ips="*")
+    uvicorn.run(target, host=host, port=port, reload=debug, workers=workers, proxy_headers=True, forwarded_allow_ips="*")
 
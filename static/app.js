@@ -352,6 +352,13 @@ let busyCount = 0;
 let busyJob = false;
 
 let lastJobStatus = null;
+// log job diambil incremental: cursor baris terakhir + ETag response status terakhir
+let jobLogCursor = 0;
+let jobLogText = '';
+let jobStatusEtag = null;
+let pollInFlight = false;
+let jobEvents = null;
+const JOB_LOG_MAX_CHARS = 400000;
 
 let openFolderDesiredState = { visible: false, disabled: true, title: 'Buka folder output (hasil clip).' };
 
@@ -499,6 +506,10 @@ const runWithBusy = async (title, msg, fn) => {
 const setBusyJob = (on, title, msg) => {
   busyJob = !!on;
   if (busyJob) setBusyText(title || 'Memproses...', msg ?? 'Mohon tunggu...');
+  const actions = $('busyActions');
+  if (actions) actions.classList.toggle('on', busyJob);
+  const cancelBtn = $('cancelJob');
+  if (cancelBtn && busyJob) cancelBtn.disabled = false;
   updateBusyState();
 };
 
@@ -570,6 +581,7 @@ const applyCfg = (cfg) => {
   if (cfg.whisper_model) $('model').value = cfg.whisper_model;
   if (cfg.subtitle_language && $('subLang')) $('subLang').value = cfg.subtitle_language;
   if (cfg.subtitle_position) $('subPos').value = cfg.subtitle_position;
+  if (cfg.encoder_profile && $('encProfile')) $('encProfile').value = cfg.encoder_profile;
   if (cfg.preview_seconds) $('previewSecs').value = cfg.preview_seconds;
   geminiKeyStoredOnServer = !!cfg.has_gemini_key;
   if (cfg.has_gemini_key && $('geminiKey') && !$('geminiKey').value) {
@@ -581,6 +593,14 @@ const applyCfg = (cfg) => {
   updateCropPreview();
 };
 
+const selectedCropModes = () => {
+  const modes = [$('crop').value];
+  document.querySelectorAll('#cropExtra input[type="checkbox"]:checked').forEach((el) => {
+    if (!modes.includes(el.value)) modes.push(el.value);
+  });
+  return modes;
+};
+
 const collectCfgLocal = () => ({
   output_mode: document.querySelector('input[name="outMode"]:checked')?.value || 'default',
   output_dir: $('outDir').value.trim(),
@@ -591,6 +611,7 @@ const collectCfgLocal = () => ({
   whisper_model: $('model').value,
   subtitle_language: $('subLang') ? $('subLang').value : 'id',
   subtitle_position: $('subPos').value,
+  encoder_profile: $('encProfile') ? $('encProfile').value : 'draft',
   preview_seconds: parseInt($('previewSecs').value || '30', 10),
 });
 
@@ -1069,73 +1090,159 @@ const setProgress = (p, status, eta, isActive = true) => {
   }
 };
 
+const renderJobLog = () => {
+  let logText = jobLogText;
+  if (lastJobStatus && lastJobStatus.error) {
+    logText += '\n\n❌ ERROR: ' + lastJobStatus.error;
+  }
+
+  if (logText && logText.includes('__AI_JSON__')) {
+    const parts = logText.split('__AI_JSON__');
+    let cleanLog = parts[0];
+    for (let i = 1; i < parts.length; i++) {
+      try {
+        const lineEnd = parts[i].indexOf('\n');
+        const jsonStr = lineEnd === -1 ? parts[i] : parts[i].substring(0, lineEnd);
+        const rest = lineEnd === -1 ? '' : parts[i].substring(lineEnd);
+
+        const meta = JSON.parse(jsonStr);
+        const titles = (meta.titles || []).map((t) => '• ' + t).join('\n');
+        const tags = (meta.hashtags || []).join(' ');
+
+        cleanLog +=
+          '\n\n✨ AI SUGGESTION:\n' +
+          '----------------------------------------\n' +
+          'JUDUL:\n' +
+          titles +
+          '\n\n' +
+          'CAPTION:\n' +
+          (meta.caption || '-') +
+          '\n\n' +
+          'HASHTAGS:\n' +
+          tags +
+          '\n' +
+          '----------------------------------------\n';
+        cleanLog += rest;
+      } catch (e) {
+        cleanLog += parts[i];
+      }
+    }
+    logText = cleanLog;
+  }
+
+  setLog(logText);
+};
+
+const appendJobLogText = (text, truncated) => {
+  if (truncated) jobLogText = '';
+  jobLogText += text || '';
+  if (jobLogText.length > JOB_LOG_MAX_CHARS) jobLogText = jobLogText.slice(-JOB_LOG_MAX_CHARS);
+};
+
+const applyJobStatus = (data) => {
+  lastJobStatus = data;
+  const isRunning = data.running && !data.done;
+  setProgress(data.percent, data.status, data.eta, isRunning);
+  if (busyJob && data.queue_position && !data.done) {
+    setBusyText('Menunggu antrian...', (data.status || '').trim());
+  }
+  if (busyJob && isRunning) {
+    const pct = Math.max(0, Math.min(100, Number(data.percent || 0)));
+    const st = (data.status || '').trim();
+    setBusyText('Sedang memproses...', (st ? st + ' • ' : '') + pct.toFixed(0) + '%');
+  }
+  renderJobLog();
+  syncOpenFolderButton();
+  if (data.done) {
+    stopJobEvents();
+    clearInterval(pollTimer);
+    pollTimer = null;
+    setBusyJob(false);
+    syncOpenFolderButton();
+    if (data.stage === 'cancelled') {
+      const done = (data.outputs || []).length;
+      uiAlert('🛑 Proses dibatalkan.' + (done ? '\n\n' + done + ' file sudah jadi sebelum dibatalkan:\n' + data.outputs.join('\n') : ''), { type: 'info', title: 'Dibatalkan', modal: true });
+    } else if (data.error) {
+      uiAlert('❌ Proses gagal!\n\n' + normText(data.error), { type: 'error', title: 'Proses gagal', modal: true });
+    } else if (data.success_count > 0) {
+      uiAlert('✅ Selesai! ' + data.success_count + ' clip berhasil dibuat.\n\nOutput: ' + (data.output_dir || ''), { type: 'success', title: 'Selesai', modal: true });
+    }
+  }
+};
+
 const poll = async () => {
-  if (!jobId) return;
+  if (!jobId || pollInFlight) return;
+  pollInFlight = true;
   try {
-    const res = await fetch(apiUrl('/api/status/') + jobId);
+    const headers = jobStatusEtag ? { 'If-None-Match': jobStatusEtag } : {};
+    const res = await fetch(apiUrl('/api/status/') + jobId + '?since=' + jobLogCursor, { headers, cache: 'no-store' });
+    if (res.status === 304) return;
     const data = await res.json();
     if (!data.ok) return;
-    lastJobStatus = data;
-    const isRunning = data.running && !data.done;
-    setProgress(data.percent, data.status, data.eta, isRunning);
-    if (busyJob && isRunning) {
-      const pct = Math.max(0, Math.min(100, Number(data.percent || 0)));
-      const st = (data.status || '').trim();
-      setBusyText('Sedang memproses...', (st ? st + ' • ' : '') + pct.toFixed(0) + '%');
-    }
-    let logText = data.logs || '';
-    if (data.error) {
-      logText += '\n\n❌ ERROR: ' + data.error;
-    }
+    jobStatusEtag = res.headers.get('ETag');
+    appendJobLogText(data.logs, data.logs_truncated);
+    if (data.log_cursor !== null && data.log_cursor !== undefined) jobLogCursor = data.log_cursor;
+    applyJobStatus(data);
+  } catch {} finally {
+    pollInFlight = false;
+  }
+};
 
-    if (logText && logText.includes('__AI_JSON__')) {
-      const parts = logText.split('__AI_JSON__');
-      let cleanLog = parts[0];
-      for (let i = 1; i < parts.length; i++) {
-        try {
-          const lineEnd = parts[i].indexOf('\n');
-          const jsonStr = lineEnd === -1 ? parts[i] : parts[i].substring(0, lineEnd);
-          const rest = lineEnd === -1 ? '' : parts[i].substring(lineEnd);
-
-          const meta = JSON.parse(jsonStr);
-          const titles = (meta.titles || []).map((t) => '• ' + t).join('\n');
-          const tags = (meta.hashtags || []).join(' ');
-
-          cleanLog +=
-            '\n\n✨ AI SUGGESTION:\n' +
-            '----------------------------------------\n' +
-            'JUDUL:\n' +
-            titles +
-            '\n\n' +
-            'CAPTION:\n' +
-            (meta.caption || '-') +
-            '\n\n' +
-            'HASHTAGS:\n' +
-            tags +
-            '\n' +
-            '----------------------------------------\n';
-          cleanLog += rest;
-        } catch (e) {
-          cleanLog += parts[i];
-        }
-      }
-      logText = cleanLog;
-    }
+const startPolling = () => {
+  if (pollTimer) clearInterval(pollTimer);
+  pollTimer = setInterval(poll, 700);
+  poll();
+};
 
-    setLog(logText);
-    syncOpenFolderButton();
-    if (data.done) {
-      clearInterval(pollTimer);
-      pollTimer = null;
-      setBusyJob(false);
-      syncOpenFolderButton();
-      if (data.error) {
-        uiAlert('❌ Proses gagal!\n\n' + normText(data.error), { type: 'error', title: 'Proses gagal', modal: true });
-      } else if (data.success_count > 0) {
-        uiAlert('✅ Selesai! ' + data.success_count + ' clip berhasil dibuat.\n\nOutput: ' + (data.output_dir || ''), { type: 'success', title: 'Selesai', modal: true });
+const stopJobEvents = () => {
+  if (!jobEvents) return;
+  jobEvents.close();
+  jobEvents = null;
+};
+
+// progress job lewat SSE; kalau browser/proxy tidak mendukung, balik ke polling /api/status
+const watchJob = () => {
+  stopJobEvents();
+  if (pollTimer) clearInterval(pollTimer);
+  pollTimer = null;
+  if (typeof EventSource === 'undefined') {
+    startPolling();
+    return;
+  }
+  const es = new EventSource(apiUrl('/api/jobs/') + jobId + '/events');
+  let opened = false;
+  jobEvents = es;
+  es.addEventListener('open', () => {
+    opened = true;
+  });
+  es.addEventListener('log', (e) => {
+    try {
+      const d = JSON.parse(e.data);
+      appendJobLogText(d.text, d.truncated);
+      if (e.lastEventId) jobLogCursor = Number(e.lastEventId) || jobLogCursor;
+      renderJobLog();
+    } catch {}
+  });
+  es.addEventListener('status', (e) => {
+    try {
+      const d = JSON.parse(e.data);
+      if (d.done) {
+        // status final (output_dir_ok dkk.) diambil sekali dari /api/status
+        stopJobEvents();
+        poll();
+        return;
       }
+      applyJobStatus(Object.assign({ ok: true }, d));
+    } catch {}
+  });
+  es.addEventListener('done', () => stopJobEvents());
+  es.onerror = () => {
+    if (jobEvents !== es) return;
+    if (!opened || es.readyState === EventSource.CLOSED) {
+      stopJobEvents();
+      startPolling();
     }
-  } catch {}
+  };
 };
 
 const startJob = async () => {
@@ -1148,15 +1255,20 @@ const startJob = async () => {
     url,
     segments: segs,
     crop_mode: $('crop').value,
+    crop_modes: selectedCropModes(),
     use_subtitle: $('subOn').checked,
     whisper_model: $('model').value,
     subtitle_language: $('subLang') ? $('subLang').value : 'id',
     subtitle_position: $('subPos').value,
+    encoder_profile: $('encProfile') ? $('encProfile').value : 'draft',
     output_dir: outDir,
     use_gemini_suggestions: useGemini,
     gemini_api_key: useGemini ? $('geminiKey').value.trim() : null,
   };
   lastJobStatus = null;
+  jobLogCursor = 0;
+  jobLogText = '';
+  jobStatusEtag = null;
   setOpenFolderState({ visible: false, disabled: true, title: 'Tombol ini aktif setelah proses selesai.' });
   setLog('🚀 Memulai proses...');
   setProgress(0, 'Memulai...', '', true);
@@ -1168,9 +1280,7 @@ const startJob = async () => {
     throw new Error(data.error || 'Gagal start job');
   }
   jobId = data.job_id;
-  if (pollTimer) clearInterval(pollTimer);
-  pollTimer = setInterval(poll, 700);
-  await poll();
+  watchJob();
 };
 
 const applyVideoInfo = (data) => {
@@ -1465,6 +1575,24 @@ $('go').addEventListener('click', async () => {
   }
 });
 
+const _cancelJobBtn = $('cancelJob');
+if (_cancelJobBtn)
+  _cancelJobBtn.addEventListener('click', async () => {
+    if (!jobId) return;
+    _cancelJobBtn.disabled = true;
+    setBusyText('Membatalkan...', 'Menghentikan proses yang lagi jalan...');
+    try {
+      const res = await fetch(apiUrl('/api/cancel/') + jobId, { method: 'POST', headers: { Accept: 'application/json' }, cache: 'no-store' });
+      const data = await res.json().catch(() => null);
+      if (!res.ok || !data || !data.ok) throw new Error((data && (data.detail || data.error)) || 'Gagal membatalkan job.');
+      appendLog('[cancel] ' + (data.status || 'Membatalkan...'));
+      if (!jobEvents) await poll();
+    } catch (e) {
+      _cancelJobBtn.disabled = false;
+      uiAlert(errText(e), { type: 'error' });
+    }
+  });
+
 const _openFolderBtn = $('openFolder');
 if (_openFolderBtn)
   _openFolderBtn.addEventListener('click', async (ev) => {
@@ -0,0 +1,166 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import ffmpeg_deps, job_store, jobs
+from app.scheduler import QueueFull
+from app.services import batch_service, clip_service
+
+
+class TestBatchFile(unittest.TestCase):
+    def test_csv_rows_and_segment_lists(self):
+        text = (
+            "URL,start,end,segments\n"
+            "https://youtu.be/aaaaaaaaaaa,0:10,0:40,\n"
+            "https://youtu.be/bbbbbbbbbbb,,,1:00-1:30; 00:02:00-00:02:10.5\n"
+            ",,,\n"
+        )
+        items = batch_service.parse_batch_file(text)
+        self.assertEqual(items[0], {"url": "https://youtu.be/aaaaaaaaaaa", "segments": [{"start": 10.0, "end": 40.0}]})
+        self.assertEqual(items[1]["segments"], [{"start": 60.0, "end": 90.0}, {"start": 120.0, "end": 130.5}])
+
+    def test_jsonl_and_errors(self):
+        text = '{"url": "https://youtu.be/aaaaaaaaaaa", "segments": [{"start": 1, "end": 5}]}\n\n{"url": "u", "start": 3, "end": "0:09"}\n'
+        items = batch_service.parse_batch_file(text)
+        self.assertEqual(items[1], {"url": "u", "segments": [{"start": 3.0, "end": 9.0}]})
+        with self.assertRaises(ValueError):
+            batch_service.parse_batch_file("url,segments\nx,10\n", "csv")
+        with self.assertRaises(ValueError):
+            batch_service.parse_batch_file("start,end\n1,2\n", "csv")
+
+
+class TestBatchJob(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._env = mock.patch.dict(os.environ, {"YTCLIPPER_JOB_DB_PATH": os.path.join(self._tmp.name, "jobs.sqlite3")})
+        self._env.start()
+        self._patches = [
+            mock.patch.object(clip_service, "load_config", return_value={}),
+            mock.patch.object(clip_service, "save_config"),
+        ]
+        for p in self._patches:
+            p.start()
+        self.started = []
+
+    def tearDown(self):
+        for p in self._patches:
+            p.stop()
+        job_store.flush_logs()
+        for conn in getattr(job_store._LOCAL, "conns", {}).values():
+            conn.close()
+        job_store._LOCAL.conns = {}
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def _fake_start_job(self, job_id, payload):
+        self.started.append((job_id, payload))
+        return len(self.started)
+
+    def _submit(self, items, fake=None):
+        with mock.patch.object(batch_service, "start_job", side_effect=fake or self._fake_start_job):
+            return batch_service.start_batch_job({"items": items, "output_dir": self._tmp.name})
+
+    def test_same_video_is_merged_and_progress_is_aggregated(self):
+        res = self._submit(
+            [
+                {"url": "https://youtu.be/aaaaaaaaaaa", "segments": [{"start": 0, "end": 10}]},
+                {"url": "https://www.youtube.com/watch?v=aaaaaaaaaaa", "segments": [{"start": 0, "end": 10}, {"start": 30, "end": 40}]},
+                {"url": "https://youtu.be/bbbbbbbbbbb", "segments": [{"start": 5, "end": 20}, {"start": 50, "end": 60}]},
+            ]
+        )
+        self.assertEqual([c["clips"] for c in res["children"]], [2, 2])
+        self.assertEqual([len(p["segments"]) for _, p in self.started], [2, 2])
+        first, second = [c["job_id"] for c in res["children"]]
+        self.assertEqual(jobs.get_job(first)["parent_id"], res["job_id"])
+
+        parent = jobs.get_job(res["job_id"])
+        self.assertEqual(parent["stage"], "queued")
+        self.assertIn("📦 Batch 3 item → 2 job", "".join(parent["logs"]))
+
+        jobs.update_job(first, running=True, percent=50.0, stage="clip")
+        parent = jobs.get_job(res["job_id"])
+        self.assertTrue(parent["running"])
+        self.assertEqual(parent["percent"], 25.0)
+        self.assertEqual(parent["status"], "[0/2 job selesai] 1 jalan, 1 antri")
+
+        jobs.update_job(first, running=False, done=True, stage="done", success_count=2)
+        jobs.update_job(second, running=False, done=True, stage="error", error="rusak")
+        parent = jobs.get_job(res["job_id"])
+        self.assertTrue(parent["done"])
+        self.assertEqual((parent["stage"], parent["success_count"]), ("done", 2))
+        self.assertEqual(parent["status"], "Selesai (1 dari 2 job gagal)")
+        self.assertEqual([c["stage"] for c in job_store.get(res["job_id"])["children"]], ["done", "error"])
+
+    def test_parent_is_not_marked_stale_while_children_are_alive(self):
+        res = self._submit([{"url": "https://youtu.be/aaaaaaaaaaa", "segments": [{"start": 0, "end": 10}]}])
+        child = res["children"][0]["job_id"]
+        jobs.update_job(child, running=True, stage="transcript")
+        self.assertTrue(jobs.get_job(res["job_id"])["running"])
+
+        with job_store.transaction() as conn:
+            conn.execute("UPDATE jobs SET updated_at = updated_at - 1000 WHERE id = ?", (res["job_id"],))
+        with mock.patch.dict(os.environ, {"YTCLIPPER_JOB_STALE_S": "60"}):
+            parent = jobs.get_job(res["job_id"])
+            self.assertEqual((parent["done"], parent["stage"]), (False, "batch"))
+
+            # anak yang beneran yatim tetap ketahuan, parent ikut selesai lewat agregasi
+            with job_store.transaction() as conn:
+                conn.execute("UPDATE jobs SET updated_at = updated_at - 1000 WHERE id = ?", (child,))
+            parent = jobs.get_job(res["job_id"])
+        self.assertEqual((parent["done"], parent["stage"]), (True, "error"))
+        self.assertEqual(parent["children"][0]["error"], "Job terputus (server restart atau proses worker mati).")
+
+    def test_source_mode_reaches_clipper(self):
+        with mock.patch.object(batch_service, "start_job", side_effect=self._fake_start_job):
+            batch_service.start_batch_job(
+                {"items": [{"url": "https://youtu.be/aaaaaaaaaaa", "segments": [{"start": 0, "end": 10}]}], "output_dir": self._tmp.name, "source_mode": "per_clip"}
+            )
+        job_id, payload = self.started[0]
+        result = {"success_count": 1, "outputs": [], "output_dir": self._tmp.name}
+        with mock.patch.object(jobs, "proses_dengan_segmen", return_value=result) as run:
+            jobs.run_job(job_id, payload)
+        self.assertEqual(run.call_args.kwargs["source_mode"], "per_clip")
+
+    def test_invalid_item_creates_no_jobs(self):
+        with self.assertRaises(ValueError):
+            self._submit([{"url": "https://youtu.be/aaaaaaaaaaa", "segments": [{"start": 0, "end": 10}]}, {"url": "bukan-link", "segments": []}])
+        self.assertEqual(job_store.list_ids(), [])
+
+    def test_queue_full_rejects_rest_and_cancel_stops_children(self):
+        def _fake(job_id, payload):
+            if self.started:
+                raise QueueFull("penuh")
+            self.started.append(job_id)
+            return 1
+
+        items = [{"url": f"https://youtu.be/{c * 11}", "segments": [{"start": 0, "end": 10}]} for c in "abc"]
+        res = self._submit(items, fake=_fake)
+        self.assertEqual(res["rejected"], 2)
+        self.assertEqual([c["rejected"] for c in res["children"]], [False, True, True])
+
+        with mock.patch.object(clip_service.scheduler, "cancel", return_value=True):
+            out = clip_service.cancel_job(res["job_id"])
+        self.assertEqual(out["stage"], "cancelled")
+        self.assertEqual(jobs.get_job(res["children"][0]["job_id"])["stage"], "cancelled")
+
+        with self.assertRaises(QueueFull):
+            self._submit(items[:1], fake=mock.Mock(side_effect=QueueFull("penuh")))
+
+
+class TestDependencyCheckCache(unittest.TestCase):
+    def test_successful_check_is_reused_within_ttl(self):
+        ffmpeg_deps._CHECKED.clear()
+        with mock.patch.object(ffmpeg_deps, "cek_dependensi") as check:
+            self.assertTrue(ffmpeg_deps.cek_dependensi_cached(install_whisper=False))
+            self.assertFalse(ffmpeg_deps.cek_dependensi_cached(install_whisper=False))
+            self.assertTrue(ffmpeg_deps.cek_dependensi_cached(install_whisper=True))
+            self.assertFalse(ffmpeg_deps.cek_dependensi_cached(install_whisper=False))
+            with mock.patch.dict(os.environ, {"YTCLIPPER_DEPS_CHECK_TTL_S": "0"}):
+                self.assertTrue(ffmpeg_deps.cek_dependensi_cached(install_whisper=False))
+        self.assertEqual(check.call_count, 3)
+        ffmpeg_deps._CHECKED.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app import broker, job_control, job_store, jobs, node_worker
+from app.services import clip_service
+from app.scheduler import QueueFull
+
+
+class TestBroker(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._env = mock.patch.dict(
+            os.environ,
+            {
+                "YTCLIPPER_JOB_DB_PATH": os.path.join(self._tmp.name, "jobs.sqlite3"),
+                "YTCLIPPER_JOB_EXECUTOR": "broker",
+                "YTCLIPPER_BROKER_MAX_ATTEMPTS": "2",
+                "YTCLIPPER_JOB_QUEUE_SIZE": "3",
+            },
+        )
+        self._env.start()
+
+    def tearDown(self):
+        job_store.flush_logs()
+        for conn in getattr(job_store._LOCAL, "conns", {}).values():
+            conn.close()
+        job_store._LOCAL.conns = {}
+        for conn in getattr(broker._LOCAL, "conns", {}).values():
+            conn.close()
+        broker._LOCAL.conns = {}
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def _enqueue(self, job_id):
+        jobs.create_job(job_id, output_dir=None)
+        return jobs.start_job(job_id, {"url": "u", "job": job_id})
+
+    def test_fifo_claim_renew_complete_and_cancel(self):
+        self.assertEqual([self._enqueue(j) for j in ("a", "b", "c")], [1, 2, 3])
+        with self.assertRaises(QueueFull):
+            self._enqueue("d")
+        self.assertEqual(job_store.get("b")["status"].split()[:2], ["⏳", "Antri"])
+
+        job_id, payload, attempts = broker.claim("w1", lease=30)
+        self.assertEqual((job_id, payload["job"], attempts), ("a", "a", 1))
+        self.assertEqual(job_store.get("b")["queue_position"], 1)
+        self.assertTrue(broker.renew("a", "w1"))
+        self.assertFalse(broker.renew("a", "w2"))
+        self.assertFalse(broker.cancel("a"))
+        self.assertTrue(broker.cancel("b"))
+        self.assertTrue(broker.complete("a", "w1"))
+        self.assertEqual(broker.claim("w1")[0], "c")
+        self.assertIsNone(broker.claim("w1"))
+
+    def test_broker_uses_its_own_rollback_journal_database(self):
+        self._enqueue("j")
+        self.assertNotEqual(broker.db_path(), job_store.db_path())
+        self.assertEqual(broker._conn().execute("PRAGMA journal_mode").fetchone()[0], "delete")
+        self.assertEqual(job_store._conn().execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+    def test_worker_opens_job_db_in_delete_mode_without_executor_env(self):
+        with mock.patch.dict(os.environ, {"YTCLIPPER_JOB_EXECUTOR": "thread"}):
+            self.assertEqual(node_worker.serve(worker_id="w1", poll_s=0.05, drain=True), 0)
+            self.assertTrue(broker.enabled())
+            self.assertEqual(job_store._conn().execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+    def test_cancel_without_broker_mode_does_not_create_broker_db(self):
+        with mock.patch.dict(os.environ, {"YTCLIPPER_JOB_EXECUTOR": "thread"}):
+            jobs.create_job("t1", output_dir=None)
+            jobs.update_job("t1", running=True, stage="clip")
+            self.assertEqual(clip_service.cancel_job("t1")["stage"], "cancelling")
+        self.assertFalse(os.path.exists(broker.db_path()))
+
+    def test_stats_outside_broker_mode_does_not_open_db(self):
+        with mock.patch.dict(os.environ, {"YTCLIPPER_JOB_EXECUTOR": "thread"}):
+            self.assertEqual(broker.stats(), {"enabled": False})
+        self.assertFalse(os.path.exists(broker.db_path()))
+        self.assertEqual(broker.stats()["queued"], [])
+
+    def test_expired_lease_is_requeued_then_failed_after_max_attempts(self):
+        self._enqueue("x")
+        self.assertEqual(broker.claim("dead", lease=30)[0], "x")
+        jobs.update_job("x", running=True, stage="clip")
+
+        self.assertEqual(broker.reap(now=time.time() + 60), {"requeued": 1, "failed": 0})
+        job = job_store.get("x")
+        self.assertFalse(job["running"])
+        self.assertEqual(job["stage"], "queued")
+        self.assertIn("Worker hilang", "".join(job["logs"]))
+
+        job_id, _, attempts = broker.claim("w2", lease=30)
+        self.assertEqual((job_id, attempts), ("x", 2))
+        self.assertFalse(broker.renew("x", "dead"))
+        self.assertEqual(broker.reap(now=time.time() + 60), {"requeued": 0, "failed": 1})
+        self.assertEqual(job_store.get("x")["stage"], "error")
+        self.assertIsNone(broker.claim("w3"))
+
+    def test_concurrent_claims_never_share_a_job(self):
+        for j in ("p", "q", "r"):
+            self._enqueue(j)
+        got, lock = [], threading.Lock()
+
+        def _claim(n):
+            while True:
+                task = broker.claim(f"w{n}")
+                if task is None:
+                    return
+                with lock:
+                    got.append(task[0])
+
+        threads = [threading.Thread(target=_claim, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+        self.assertEqual(sorted(got), ["p", "q", "r"])
+
+    def test_worker_runs_job_and_uploads_outputs(self):
+        shared = os.path.join(self._tmp.name, "shared")
+        self._enqueue("n1")
+
+        def _fake_run_job(job_id, payload, finalize=None):
+            with open(os.path.join(payload["output_dir"], "clip_1.mp4"), "w") as f:
+                f.write("video")
+            result = {"output_dir": payload["output_dir"], "success_count": 1}
+            result.update(finalize(result))
+            jobs.update_job(job_id, done=True, stage="done", output_dir=result["output_dir"])
+
+        with mock.patch.object(node_worker, "run_job", _fake_run_job):
+            count = node_worker.serve(worker_id="w1", poll_s=0.05, output_root=shared, drain=True)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(os.listdir(shared), ["clip_1.mp4"])
+        self.assertEqual(job_store.get("n1")["output_dir"], shared)
+        self.assertEqual(broker.stats()["leased"], [])
+
+    def test_cancelled_job_still_uploads_finished_clips(self):
+        shared = os.path.join(self._tmp.name, "shared")
+        self._enqueue("c1")
+
+        def _fake_run_job(job_id, payload, finalize=None):
+            for name in ("clip_1.mp4", "temp_cropped_2.mp4"):
+                with open(os.path.join(payload["output_dir"], name), "w") as f:
+                    f.write("video")
+            jobs.mark_job_cancelled(job_id, 1, [os.path.join(payload["output_dir"], "clip_1.mp4")])
+
+        with mock.patch.object(node_worker, "run_job", _fake_run_job):
+            node_worker.serve(worker_id="w1", poll_s=0.05, output_root=shared, drain=True)
+
+        job = job_store.get("c1")
+        self.assertEqual(os.listdir(shared), ["clip_1.mp4"])
+        self.assertEqual((job["stage"], job["output_dir"], job["outputs"]), ("cancelled", shared, ["clip_1.mp4"]))
+
+    def test_lost_lease_does_not_overwrite_job_state(self):
+        jobs.create_job("l1", output_dir=None)
+        jobs.update_job("l1", running=True, stage="clip", status="dipegang worker lain")
+        token = job_control.CancelToken("l1")
+        token.cancel(broker.LEASE_LOST)
+        jobs._report_cancelled("l1", 0, [], token)
+        self.assertEqual(job_store.get("l1")["status"], "dipegang worker lain")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+
+from app import clipper, job_control
+
+
+class TestClipPool(unittest.TestCase):
+    def _run(self, segments, fake, workers):
+        with tempfile.TemporaryDirectory() as d:
+            with mock.patch.object(clipper, "cek_dependensi_cached"):
+                with mock.patch.object(clipper, "get_duration", return_value=600):
+                    with mock.patch.object(clipper, "proses_satu_clip", side_effect=fake):
+                        return clipper.proses_dengan_segmen(
+                            "https://youtu.be/dQw4w9WgXcQ",
+                            segments,
+                            output_dir=d,
+                            max_workers=workers,
+                        )
+
+    def test_indices_follow_segment_order(self):
+        seen = []
+        lock = threading.Lock()
+
+        def _fake(**kw):
+            time.sleep(0.05 if kw["index"] == 1 else 0.0)
+            with lock:
+                seen.append((kw["index"], kw["item"]["start"]))
+            return True, None
+
+        segs = [{"start": i * 20, "end": i * 20 + 10} for i in range(4)]
+        res = self._run(segs, _fake, workers=3)
+        self.assertEqual(res["success_count"], 4)
+        self.assertEqual(sorted(seen), [(1, 0.0), (2, 20.0), (3, 40.0), (4, 60.0)])
+
+    def test_errors_aggregated_in_order(self):
+        def _fake(**kw):
+            if kw["index"] in (2, 3):
+                return False, f"gagal {kw['index']}"
+            return True, None
+
+        segs = [{"start": i * 20, "end": i * 20 + 10} for i in range(3)]
+        res = self._run(segs, _fake, workers=2)
+        self.assertEqual(res["success_count"], 1)
+
+        with self.assertRaises(RuntimeError) as ctx:
+            self._run(segs[1:], lambda **kw: (False, f"gagal {kw['index']}"), workers=2)
+        self.assertIn("gagal 1; gagal 2", str(ctx.exception))
+
+    def test_worker_count_from_env(self):
+        with mock.patch.dict("os.environ", {"YTCLIPPER_CLIP_WORKERS": "5"}):
+            self.assertEqual(clipper.clip_worker_count(), 5)
+        self.assertEqual(clipper.clip_worker_count(2), 2)
+
+
+class TestPipeContainer(unittest.TestCase):
+    def test_known_codecs_stream_through_matroska(self):
+        resolved = {"video": {"vcodec": "vp09.00.40.08"}, "audio": {"acodec": "opus"}}
+        self.assertIn("matroska", clipper.pipe_container(resolved))
+        self.assertIsNotNone(clipper.pipe_container({"video": {"vcodec": "avc1.64001f", "acodec": "mp4a.40.2"}}))
+
+    def test_unknown_codec_falls_back_to_temp_file(self):
+        self.assertIsNone(clipper.pipe_container({"video": {"vcodec": "mystery"}, "audio": {"acodec": "opus"}}))
+        self.assertIsNone(clipper.pipe_container({"video": None, "audio": {"acodec": "opus"}}))
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg tidak ada")
+class TestSourceBase(unittest.TestCase):
+    def _first_frame(self, seek, path):
+        cmd = ["ffmpeg", "-v", "error", "-ss", f"{seek:.3f}", "-i", path, "-map", "0:v", "-frames:v", "1", "-f", "md5", "-"]
+        return subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+
+    def test_copy_cut_base_is_the_keyframe_before_start(self):
+        with tempfile.TemporaryDirectory() as d:
+            src = os.path.join(d, "src.mp4")
+            cmd = ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=25", "-t", "30"]
+            cmd += ["-c:v", "libx264", "-g", "250", "-keyint_min", "250", "-sc_threshold", "0", src]
+            subprocess.run(cmd, check=True)
+            resolved = {"format": "test", "video": {"url": src, "vcodec": "avc1", "acodec": "none"}}
+            env = {"YTCLIPPER_MEDIA_CACHE_MAX_MB": "0", "YTCLIPPER_DIRECT_STREAMS": "1"}
+            with mock.patch.dict(os.environ, env), mock.patch.object(clipper, "resolve_streams", return_value=resolved):
+                src_info = clipper.acquire_source("vid", 15.0, 22.0, os.path.join(d, "cut"))
+            try:
+                # GOP 10 detik: potongan -c copy mulai di keyframe 10s, bukan di 15s yang diminta
+                self.assertAlmostEqual(src_info["base"], 10.0, delta=0.1)
+                self.assertEqual(self._first_frame(15.0 - src_info["base"], src_info["path"]), self._first_frame(15.0, src))
+            finally:
+                src_info["release"]()
+
+
+@unittest.skipUnless(shutil.which("ffmpeg") and hasattr(os, "mkfifo"), "butuh ffmpeg & mkfifo")
+class TestInprocessRangeCancel(unittest.TestCase):
+    def test_cancel_kills_inprocess_range_download(self):
+        with tempfile.TemporaryDirectory() as d:
+            stall = os.path.join(d, "stall")
+            os.mkfifo(stall)  # ffmpeg nunggu writer selamanya, tidak pernah lapor progress
+            env = {
+                "YTCLIPPER_DIRECT_STREAMS": "0",
+                "YTCLIPPER_YTDLP_INPROCESS": "1",
+                "YTCLIPPER_FORMAT_CACHE_PATH": os.path.join(d, "formats.json"),
+            }
+            token = job_control.new_token("inproc-cancel")
+            result = {}
+
+            def _run():
+                with job_control.activate(token):
+                    try:
+                        clipper._download_range("vid", 0, 10, os.path.join(d, "cut"), ["best"])
+                    except job_control.Cancelled:
+                        result["cancelled"] = True
+
+            with mock.patch.dict(os.environ, env), mock.patch.object(clipper.yt_engine, "inprocess_enabled", return_value=True):
+                with mock.patch.object(clipper.yt_engine, "select_format", return_value={"url": stall}):
+                    t = threading.Thread(target=_run)
+                    t.start()
+                    deadline = time.time() + 10
+                    while token.process_count() == 0 and time.time() < deadline:
+                        time.sleep(0.05)
+                    self.assertEqual(token.process_count(), 1)
+                    token.cancel()
+                    t.join(5)
+            job_control.drop_token("inproc-cancel")
+            self.assertFalse(t.is_alive())
+            self.assertTrue(result.get("cancelled"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import unittest
+from unittest import mock
+
+from app import encoder_profiles
+from app.encoder_profiles import encode_args, pick_profile, profile_fps, resolve_profile
+from app.render_graph import build_variant_render_graph
+
+
+_CAL = {
+    "profiles": {
+        "draft": {"fps": 120.0, "crop_modes": {"default": 120.0, "fit": 120.0}},
+        "balanced": {"fps": 60.0, "crop_modes": {"default": 60.0, "fit": 60.0}},
+        "archival": {"fps": 20.0, "crop_modes": {"default": 20.0, "fit": 20.0}},
+    }
+}
+
+
+class TestEncoderProfiles(unittest.TestCase):
+    def test_draft_matches_previous_defaults(self):
+        self.assertEqual(encode_args("draft"), ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "26", "-c:a", "aac", "-b:a", "128k"])
+        self.assertIn("-tune", encode_args("archival"))
+        with self.assertRaises(ValueError):
+            encode_args("turbo")
+
+    def test_render_graph_uses_profile(self):
+        args = build_variant_render_graph(["default", "fit"], ["a.mp4", "b.mp4"], encoder_profile="balanced")
+        self.assertEqual(args.count("veryfast"), 2)
+
+    def test_threads_reach_ffmpeg_command(self):
+        with mock.patch.dict(encoder_profiles.PROFILES["archival"], {"threads": 4}):
+            args = build_variant_render_graph(["default"], ["a.mp4"], encoder_profile="archival")
+            self.assertEqual(args[args.index("-threads") + 1], "4")
+        with mock.patch.dict(os.environ, {"YTCLIPPER_ENCODER_THREADS": "2"}):
+            args = build_variant_render_graph(["default", "fit"], ["a.mp4", "b.mp4"], encoder_profile="draft")
+            self.assertEqual([args[i + 1] for i, a in enumerate(args) if a == "-threads"], ["2", "2"])
+        self.assertNotIn("-threads", encode_args("draft"))
+
+    def test_pick_profile_for_target(self):
+        # 60 detik @30fps = 1800 frame
+        self.assertEqual(pick_profile(60, 100, calibration=_CAL), "archival")
+        self.assertEqual(pick_profile(60, 40, calibration=_CAL), "balanced")
+        self.assertEqual(pick_profile(60, 5, calibration=_CAL), "draft")
+        # dua varian = waktu per frame dijumlah
+        self.assertAlmostEqual(profile_fps("balanced", ["default", "fit"], calibration=_CAL), 30.0)
+        self.assertEqual(pick_profile(60, 40, crop_modes=["default", "fit"], calibration=_CAL), "draft")
+        self.assertEqual(pick_profile(60, 1000, calibration={}), "draft")
+
+    def test_resolve_profile(self):
+        self.assertEqual(resolve_profile("Balanced"), "balanced")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+from app import format_cache
+
+
+CANDS = ["a", "b", "c"]
+
+
+class TestFormatCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._env = mock.patch.dict(os.environ, {"YTCLIPPER_FORMAT_CACHE_PATH": os.path.join(self._tmp.name, "fc.json")})
+        self._env.start()
+        format_cache._STATE = None
+
+    def tearDown(self):
+        format_cache._STATE = None
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def _attempt(self, ok_fmt, tried):
+        def _run(fmt):
+            tried.append(fmt)
+            if fmt != ok_fmt:
+                raise RuntimeError(fmt)
+            return fmt
+
+        return _run
+
+    def test_learned_selector_tried_first(self):
+        tried = []
+        format_cache.run_candidates("vid", "clip", CANDS, self._attempt("c", tried))
+        self.assertEqual(tried, ["a", "b", "c"])
+
+        tried = []
+        fmt, _ = format_cache.run_candidates("vid", "clip", CANDS, self._attempt("c", tried))
+        self.assertEqual((fmt, tried), ("c", ["c"]))
+
+        st = format_cache.stats()
+        self.assertEqual((st["misses"], st["hits"], st["wasted_runs"]), (1, 1, 2))
+
+    def test_frequently_failing_selector_demoted(self):
+        for i in range(4):
+            format_cache.run_candidates(f"v{i}", "clip", CANDS, self._attempt("b", []))
+        self.assertEqual(format_cache.ordered_candidates("new", "clip", CANDS), ["b", "c", "a"])
+        self.assertEqual(format_cache.ordered_candidates("new", "audio", CANDS), CANDS)
+
+    def test_persisted_to_disk(self):
+        format_cache.run_candidates("vid", "clip", CANDS, self._attempt("b", []))
+        format_cache.flush()
+        with open(os.environ["YTCLIPPER_FORMAT_CACHE_PATH"], "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(data["videos"]["clip|vid"]["selector"], "b")
+
+        format_cache._STATE = None
+        self.assertEqual(format_cache.ordered_candidates("vid", "clip", CANDS)[0], "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
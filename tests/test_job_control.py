@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from app import job_control, scheduler
+from app.progress import run_with_progress
+
+
+SLEEPER = [sys.executable, "-c", "import time; print('x', flush=True); time.sleep(30)"]
+
+
+class TestJobControl(unittest.TestCase):
+    def setUp(self):
+        self.token = job_control.new_token("job-1")
+
+    def tearDown(self):
+        job_control.drop_token("job-1")
+
+    def _cancel_later(self, delay=0.3):
+        t = threading.Timer(delay, job_control.cancel, args=("job-1",))
+        t.start()
+        return t
+
+    def test_run_process_is_terminated_on_cancel(self):
+        t0 = time.monotonic()
+        self._cancel_later()
+        with job_control.activate(self.token):
+            with self.assertRaises(job_control.Cancelled):
+                job_control.run_process(SLEEPER)
+        self.assertLess(time.monotonic() - t0, 10)
+        self.assertEqual(self.token.process_count(), 0)
+
+    def test_progress_runner_is_terminated_on_cancel(self):
+        self._cancel_later()
+        with job_control.activate(self.token):
+            with self.assertRaises(job_control.Cancelled):
+                run_with_progress(SLEEPER, lambda line: None)
+
+    def test_cancelled_token_refuses_new_processes(self):
+        self.token.cancel()
+        with job_control.activate(self.token):
+            with mock.patch.object(job_control.subprocess, "Popen") as popen:
+                with self.assertRaises(job_control.Cancelled):
+                    job_control.run_process(["ffmpeg", "-version"])
+            popen.assert_not_called()
+
+    def test_no_active_token_behaves_like_subprocess_run(self):
+        res = job_control.run_process([sys.executable, "-c", "print('ok')"])
+        self.assertEqual(res.stdout.strip(), "ok")
+        with self.assertRaises(subprocess.CalledProcessError):
+            job_control.run_process([sys.executable, "-c", "import sys; sys.exit(3)"])
+        self.assertFalse(job_control.cancel("tidak-ada"))
+
+    def test_token_follows_wrapped_pool_threads(self):
+        with job_control.activate(self.token):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                seen = [f.result() for f in [pool.submit(job_control.wrap(job_control.current)) for _ in range(3)]]
+                unwrapped = pool.submit(job_control.current).result()
+        self.assertEqual(seen, [self.token] * 3)
+        self.assertIsNone(unwrapped)
+
+
+class TestSchedulerCancel(unittest.TestCase):
+    def setUp(self):
+        self._env = mock.patch.dict(os.environ, {"YTCLIPPER_MAX_RUNNING_JOBS": "1", "YTCLIPPER_JOB_QUEUE_SIZE": "5"})
+        self._env.start()
+        self._store = mock.patch.object(scheduler.job_store, "update")
+        self._store.start()
+
+    def tearDown(self):
+        self._store.stop()
+        self._env.stop()
+
+    def test_queued_job_is_removed_and_never_runs(self):
+        gate = threading.Event()
+        ran = []
+        finished = threading.Event()
+
+        def _job(job_id):
+            ran.append(job_id)
+            if job_id == "cx-a":
+                gate.wait(5)
+            else:
+                finished.set()
+
+        scheduler.submit("cx-a", _job)
+        scheduler.submit("cx-b", _job)
+        scheduler.submit("cx-c", _job)
+        self.assertTrue(scheduler.cancel("cx-b"))
+        self.assertFalse(scheduler.cancel("cx-a"))
+        self.assertEqual(scheduler.queue_position("cx-c"), 1)
+
+        gate.set()
+        self.assertTrue(finished.wait(5))
+        self.assertEqual(ran, ["cx-a", "cx-c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
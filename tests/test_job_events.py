@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app import job_events, job_store, jobs
+
+
+def _parse(body):
+    events = []
+    for block in body.split("\n\n"):
+        fields = {}
+        for line in block.splitlines():
+            key, _, value = line.partition(": ")
+            fields[key] = value
+        if "event" in fields:
+            events.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return events
+
+
+class TestJobEvents(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._env = mock.patch.dict(os.environ, {"YTCLIPPER_JOB_DB_PATH": os.path.join(self._tmp.name, "jobs.sqlite3")})
+        self._env.start()
+
+    def tearDown(self):
+        job_store.flush_logs()
+        for conn in getattr(job_store._LOCAL, "conns", {}).values():
+            conn.close()
+        job_store._LOCAL.conns = {}
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def _client(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from app.api.routes.jobs import router
+
+        app = FastAPI()
+        app.include_router(router, prefix="/api")
+        return TestClient(app)
+
+    def test_finished_job_streams_logs_clips_status_and_done(self):
+        jobs.create_job("e1", output_dir="/tmp/out")
+        jobs.append_job_log("e1", "satu\n")
+        jobs.append_job_log("e1", "dua\n")
+        jobs.update_job("e1", done=True, stage="done", status="Selesai", clips=[{"index": 1, "stage": "clip_done", "ok": True}])
+        client = self._client()
+
+        res = client.get("/api/jobs/e1/events")
+        self.assertEqual(res.headers["content-type"].split(";")[0], "text/event-stream")
+        events = _parse(res.text)
+        self.assertEqual([e[0] for e in events], ["log", "clip", "status", "done"])
+        self.assertEqual(events[0][2], {"text": "satu\ndua\n", "truncated": False})
+        self.assertEqual(events[1][2]["index"], 1)
+        self.assertEqual(events[2][2]["stage"], "done")
+
+        # reconnect dari event id baris pertama: cuma baris sesudahnya yang dikirim ulang
+        first_id = jobs.read_job_logs("e1", since=0, limit=1)["cursor"]
+        again = _parse(client.get("/api/jobs/e1/events", headers={"Last-Event-ID": str(first_id)}).text)
+        self.assertEqual(again[0][2]["text"], "dua\n")
+        self.assertEqual(client.get("/api/jobs/nope/events").status_code, 404)
+
+    def test_update_wakes_stream_without_waiting_for_poll(self):
+        jobs.create_job("e2", output_dir=None)
+        jobs.update_job("e2", running=True, stage="clip", status="jalan")
+
+        async def _run():
+            gen = job_events.stream("e2", jobs.get_job, jobs.read_job_logs)
+            self.assertTrue((await gen.__anext__()).startswith("retry:"))
+            first = await gen.__anext__()
+            self.assertIn("event: status", first)
+            self.assertEqual(job_events.subscriber_count("e2"), 1)
+
+            def _finish():
+                time.sleep(0.2)
+                jobs.append_job_log("e2", "kelar\n")
+                jobs.update_job("e2", running=False, done=True, stage="done")
+
+            threading.Thread(target=_finish).start()
+            t0 = time.monotonic()
+            chunks = []
+            async for chunk in gen:
+                chunks.append(chunk)
+            return time.monotonic() - t0, "".join(chunks)
+
+        with mock.patch.dict(os.environ, {"YTCLIPPER_SSE_POLL_S": "30", "YTCLIPPER_SSE_HEARTBEAT_S": "30"}):
+            elapsed, body = asyncio.run(_run())
+        self.assertLess(elapsed, 5)
+        self.assertIn("kelar", body)
+        self.assertEqual(_parse(body)[-1][0], "done")
+        self.assertEqual(job_events.subscriber_count("e2"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import logging
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app import job_control, job_log
+
+
+class _Writer:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, s):
+        self.parts.append(s)
+
+    def flush(self):
+        return
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+class TestJobLog(unittest.TestCase):
+    def test_concurrent_jobs_keep_their_own_output(self):
+        writers = {name: _Writer() for name in ("a", "b")}
+        barrier = threading.Barrier(2)
+
+        def _job(name):
+            with job_log.activate(writers[name]):
+                barrier.wait(5)
+                for i in range(200):
+                    print(f"{name}{i}")
+                with ThreadPoolExecutor(max_workers=3) as pool:
+                    for f in [pool.submit(job_control.wrap(print), f"{name}-pool{i}") for i in range(10)]:
+                        f.result()
+                print(f"{name}-err", file=sys.stderr)
+                logging.getLogger("app.test_job_log").warning("%s-log", name)
+
+        threads = [threading.Thread(target=_job, args=(n,)) for n in writers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+
+        for name, other in (("a", "b"), ("b", "a")):
+            lines = writers[name].text.splitlines()
+            self.assertEqual(len([l for l in lines if l.startswith(name)]), 200 + 10 + 1)
+            self.assertFalse([l for l in lines if l.startswith(other)])
+            self.assertIn(f"[WARNING] app.test_job_log: {name}-log", lines)
+
+    def test_output_outside_job_goes_to_original_stream(self):
+        w = _Writer()
+        with job_log.activate(w):
+            self.assertIs(job_log.current(), w)
+        outside = _Writer()
+        original = sys.stdout
+        sys.stdout = outside
+        try:
+            job_log.install()
+            print("console")
+        finally:
+            sys.stdout = original
+        self.assertEqual(outside.text, "console\n")
+        self.assertEqual(w.text, "")
+        self.assertIsNone(job_log.current())
+
+
+if __name__ == "__main__":
+    unittest.main()
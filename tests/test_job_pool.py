@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import job_pool
+
+
+def _record_pid(job_id, out_dir):
+    with open(os.path.join(out_dir, job_id), "w") as f:
+        f.write(str(os.getpid()))
+
+
+def _crash(job_id):
+    os._exit(3)
+
+
+def _fail(job_id):
+    raise ValueError("rusak")
+
+
+class TestJobPool(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._env = mock.patch.dict(os.environ, {"YTCLIPPER_JOB_WORKER_MAX_JOBS": "2"})
+        self._env.start()
+
+    def tearDown(self):
+        job_pool.shutdown()
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def _pid(self, job_id):
+        with open(os.path.join(self._tmp.name, job_id)) as f:
+            return int(f.read())
+
+    def test_worker_is_reused_then_recycled(self):
+        for job_id in ("j1", "j2", "j3"):
+            job_pool.run(_record_pid, job_id, self._tmp.name)
+        self.assertNotEqual(self._pid("j1"), os.getpid())
+        self.assertEqual(self._pid("j1"), self._pid("j2"))
+        self.assertNotEqual(self._pid("j2"), self._pid("j3"))
+        st = job_pool.stats()
+        self.assertGreaterEqual(st["recycled"], 1)
+        self.assertEqual([w["jobs"] for w in st["workers"]], [1])
+
+    def test_crash_and_error_do_not_break_the_pool(self):
+        with self.assertRaises(job_pool.WorkerCrashed):
+            job_pool.run(_crash, "boom")
+        with self.assertRaises(RuntimeError) as ctx:
+            job_pool.run(_fail, "err")
+        self.assertIn("rusak", str(ctx.exception))
+        job_pool.run(_record_pid, "after", self._tmp.name)
+        self.assertNotEqual(self._pid("after"), os.getpid())
+
+
+if __name__ == "__main__":
+    unittest.main()
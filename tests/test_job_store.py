@@ -0,0 +1,166 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app import job_store, jobs
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._env = mock.patch.dict(os.environ, {"YTCLIPPER_JOB_DB_PATH": os.path.join(self._tmp.name, "jobs.sqlite3")})
+        self._env.start()
+
+    def tearDown(self):
+        job_store.flush_logs()
+        for conn in getattr(job_store._LOCAL, "conns", {}).values():
+            conn.close()
+        job_store._LOCAL.conns = {}
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def test_api_roundtrip_and_logs_in_order(self):
+        jobs.create_job("j1", output_dir="/tmp/out")
+        jobs.update_job("j1", running=True, percent=12.5, clips=[{"index": 1}])
+        for i in range(50):
+            jobs.append_job_log("j1", f"baris {i}\n")
+        job = jobs.get_job("j1")
+        self.assertTrue(job["running"])
+        self.assertEqual(job["percent"], 12.5)
+        self.assertEqual(job["output_dir"], "/tmp/out")
+        self.assertEqual(job["clips"], [{"index": 1}])
+        self.assertEqual(job["logs"], [f"baris {i}\n" for i in range(50)])
+        self.assertIsNone(jobs.get_job("nope"))
+
+    def test_state_survives_new_connection(self):
+        jobs.create_job("j2", output_dir="/tmp/out")
+        jobs.append_job_log("j2", "halo\n")
+        jobs.update_job("j2", done=True, success_count=3)
+        job_store.flush_logs()
+
+        def _other_process():
+            # thread baru = koneksi baru, sama seperti worker server lain
+            self.seen = jobs.get_job("j2")
+
+        t = threading.Thread(target=_other_process)
+        t.start()
+        t.join()
+        self.assertEqual((self.seen["done"], self.seen["success_count"], self.seen["logs"]), (True, 3, ["halo\n"]))
+
+    def test_logs_are_trimmed(self):
+        jobs.create_job("j3", output_dir=None)
+        with mock.patch.object(job_store, "_LOG_MAX_LINES", 30), mock.patch.object(job_store, "_LOG_KEEP_LINES", 10):
+            for i in range(45):
+                jobs.append_job_log("j3", f"{i}")
+                job_store.flush_logs()
+        logs = jobs.get_job("j3")["logs"]
+        self.assertLessEqual(len(logs), 30)
+        self.assertEqual(logs[-1], "44")
+
+    def test_read_logs_since_cursor(self):
+        jobs.create_job("j5", output_dir=None)
+        for i in range(5):
+            jobs.append_job_log("j5", f"a{i}\n")
+        first = jobs.read_job_logs("j5", since=0, limit=3)
+        self.assertEqual(first["lines"], ["a0\n", "a1\n", "a2\n"])
+        rest = jobs.read_job_logs("j5", since=first["cursor"])
+        self.assertEqual(rest["lines"], ["a3\n", "a4\n"])
+        self.assertEqual(rest["cursor"], jobs.job_log_cursor("j5"))
+        idle = jobs.read_job_logs("j5", since=rest["cursor"])
+        self.assertEqual((idle["lines"], idle["cursor"], idle["truncated"]), ([], rest["cursor"], False))
+
+    def test_byte_capped_ring_buffer_reports_truncation(self):
+        jobs.create_job("j6", output_dir=None)
+        jobs.append_job_log("j6", "awal\n")
+        start = jobs.read_job_logs("j6", since=0)
+        with mock.patch.dict(os.environ, {"YTCLIPPER_JOB_LOG_MAX_BYTES": "10000"}):
+            for i in range(40):
+                jobs.append_job_log("j6", f"{i:03d}" + "x" * 996)
+                job_store.flush_logs()
+        lines = jobs.get_job("j6")["logs"]
+        self.assertLessEqual(sum(len(t) for t in lines), 10000)
+        self.assertEqual(lines[-1][:3], "039")
+        page = jobs.read_job_logs("j6", since=start["cursor"])
+        self.assertTrue(page["truncated"])
+        self.assertEqual(page["lines"], lines)
+        self.assertFalse(jobs.read_job_logs("j6", since=page["cursor"])["truncated"])
+
+    def test_status_route_incremental_logs_and_etag(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from app.api.routes.jobs import router
+
+        app = FastAPI()
+        app.include_router(router, prefix="/api")
+        client = TestClient(app)
+        jobs.create_job("j7", output_dir=None)
+        jobs.append_job_log("j7", "satu\n")
+        r1 = client.get("/api/status/j7", params={"since": 0})
+        self.assertEqual(r1.json()["logs"], "satu\n")
+        etag = r1.headers["etag"]
+        cursor = r1.json()["log_cursor"]
+        r2 = client.get("/api/status/j7", params={"since": cursor}, headers={"If-None-Match": r1.headers["etag"]})
+        self.assertEqual(r2.status_code, 200)
+        r3 = client.get("/api/status/j7", params={"since": cursor}, headers={"If-None-Match": r2.headers["etag"]})
+        self.assertEqual(r3.status_code, 304)
+        jobs.append_job_log("j7", "dua\n")
+        r4 = client.get("/api/status/j7", params={"since": cursor}, headers={"If-None-Match": r2.headers["etag"]})
+        self.assertEqual((r4.status_code, r4.json()["logs"]), (200, "dua\n"))
+        self.assertNotEqual(etag, r4.headers["etag"])
+        self.assertEqual(client.get("/api/status/j7").json()["logs"], "satu\ndua\n")
+
+    def test_finished_jobs_are_archived_by_age_and_log_budget(self):
+        for jid in ("old", "big", "small", "live"):
+            jobs.create_job(jid, output_dir="/tmp/out")
+        for i in range(30):
+            jobs.append_job_log("old", f"old {i}\n")
+        jobs.append_job_log("big", "x" * 600_000)
+        jobs.append_job_log("small", "kecil\n")
+        jobs.append_job_log("live", "y" * 600_000)
+        jobs.update_job("old", done=True, stage="done", status="Selesai", success_count=2, outputs=["a.mp4"], clips=[{"index": 1, "ok": True, "phases": {}}])
+        jobs.update_job("big", done=True, stage="error", status="Error", error="boom")
+        jobs.update_job("small", done=True, stage="done")
+        jobs.update_job("live", running=True)
+        now = time.time()
+        job_store._conn().execute("UPDATE jobs SET updated_at = ? WHERE id = 'old'", (now - 7200,))
+
+        env = {"YTCLIPPER_JOB_RETENTION_S": "3600", "YTCLIPPER_JOB_LOG_BUDGET_BYTES": "1000000"}
+        with mock.patch.dict(os.environ, env):
+            res = job_store.evict(now=now)
+        # old: lewat umur; big: job selesai paling lama setelah itu, cukup buat balik di bawah budget
+        self.assertEqual(res["archived"], ["old", "big"])
+
+        old = jobs.get_job("old")
+        self.assertTrue(old["archived"])
+        self.assertEqual((old["stage"], old["success_count"], old["outputs"]), ("done", 2, ["a.mp4"]))
+        self.assertEqual(old["clips"], [{"index": 1, "ok": True}])
+        self.assertEqual(old["logs"], [f"old {i}\n" for i in range(10, 30)])
+        self.assertEqual(old["log_lines"], 30)
+        self.assertEqual(jobs.get_job("big")["error"], "boom")
+        self.assertEqual(jobs.get_job("small")["logs"], ["kecil\n"])
+        self.assertFalse(jobs.get_job("live").get("archived"))
+
+        st = job_store.stats()
+        self.assertEqual((st["archived"], st["finished"], st["running"]), (2, 1, 1))
+        self.assertEqual(st["log_bytes"], len("kecil\n") + 600_000)
+
+        with mock.patch.dict(os.environ, {"YTCLIPPER_JOB_ARCHIVE_KEEP_S": "3600", "YTCLIPPER_JOB_RETENTION_S": "3600"}):
+            self.assertEqual(job_store.evict(now=now + 86400)["purged"], 2)
+        self.assertIsNone(jobs.get_job("old"))
+
+    def test_stale_running_job_is_marked_error(self):
+        jobs.create_job("j4", output_dir=None)
+        jobs.update_job("j4", running=True)
+        with mock.patch.object(jobs.time, "time", return_value=time.time() + 3600):
+            job = jobs.get_job("j4")
+        self.assertFalse(job["running"])
+        self.assertEqual(job["stage"], "error")
+        self.assertTrue(jobs.get_job("j4")["done"])
+
+
+if __name__ == "__main__":
+    unittest.main()
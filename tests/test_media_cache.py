@@ -0,0 +1,128 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+
+from app import media_cache
+
+
+def _store_many(cache_dir, work_dir, tag, n):
+    os.environ["YTCLIPPER_MEDIA_CACHE_DIR"] = cache_dir
+    os.environ["YTCLIPPER_MEDIA_CACHE_MAX_MB"] = "64"
+    for i in range(n):
+        path = os.path.join(work_dir, f"{tag}_{i}.mkv")
+        with open(path, "wb") as f:
+            f.write(b"x" * 100)
+        media_cache.store(tag, "best", i * 10, i * 10 + 5, path, pin=False)
+
+
+def _hold_pin(cache_dir, src, ready, done):
+    os.environ["YTCLIPPER_MEDIA_CACHE_DIR"] = cache_dir
+    os.environ["YTCLIPPER_MEDIA_CACHE_MAX_MB"] = "1"
+    media_cache.store("held", "best", 0, 10, src, pin=True)
+    ready.set()
+    done.wait(60)
+
+
+class TestMediaCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self._tmp.name, "cache")
+        self._env = mock.patch.dict(os.environ, {"YTCLIPPER_MEDIA_CACHE_DIR": self.cache_dir, "YTCLIPPER_MEDIA_CACHE_MAX_MB": "1"})
+        self._env.start()
+        media_cache._INDEX = None
+
+    def tearDown(self):
+        self._env.stop()
+        media_cache._INDEX = None
+        self._tmp.cleanup()
+
+    def _file(self, name, size):
+        path = os.path.join(self._tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_lookup_returns_covering_range(self):
+        entry = media_cache.store("vid", "h1440", 10, 100, self._file("a.mkv", 10), pin=False)
+        self.assertIsNotNone(entry)
+        hit = media_cache.lookup("vid", "h1440", 20, 50, pin=False)
+        self.assertEqual(hit["key"], entry["key"])
+        self.assertEqual(hit["start"], 10.0)
+        self.assertIsNone(media_cache.lookup("vid", "h1440", 5, 50, pin=False))
+        self.assertIsNone(media_cache.lookup("vid", "h480", 20, 50, pin=False))
+
+    def test_evicts_least_recently_used_but_not_pinned(self):
+        half = 600 * 1024
+        a = media_cache.store("vid", "best", 0, 10, self._file("a.mkv", half), pin=True)
+        time.sleep(0.01)
+        b = media_cache.store("vid", "best", 20, 30, self._file("b.mkv", half), pin=False)
+        self.assertTrue(os.path.exists(a["path"]))
+        self.assertFalse(os.path.exists(b["path"]))
+
+        media_cache.release(a["key"])
+        c = media_cache.store("vid", "best", 40, 50, self._file("c.mkv", half), pin=False)
+        self.assertFalse(os.path.exists(a["path"]))
+        self.assertTrue(os.path.exists(c["path"]))
+
+    def test_index_survives_reload(self):
+        media_cache.store("vid", "audio", 0, None, self._file("a.m4a", 10), pin=False, move=False)
+        media_cache._INDEX = None
+        hit = media_cache.lookup("vid", "audio", 0, None, pin=False)
+        self.assertIsNotNone(hit)
+        self.assertTrue(os.path.exists(hit["path"]))
+
+    def test_processes_merge_index_instead_of_overwriting(self):
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_store_many, args=(self.cache_dir, self._tmp.name, f"v{n}", 5)) for n in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(60)
+        with open(os.path.join(self.cache_dir, "index.json"), encoding="utf-8") as f:
+            entries = json.load(f)["entries"]
+        files = [n for n in os.listdir(self.cache_dir) if n.endswith(".mkv")]
+        self.assertEqual(len(entries), 20)
+        self.assertEqual(sorted(os.path.basename(e["path"]) for e in entries.values()), sorted(files))
+        self.assertEqual(media_cache.stats()["entries"], 20)
+
+    def test_pin_from_other_process_blocks_eviction_until_it_dies(self):
+        half = 600 * 1024
+        ctx = multiprocessing.get_context("spawn")
+        ready, done = ctx.Event(), ctx.Event()
+        proc = ctx.Process(target=_hold_pin, args=(self.cache_dir, self._file("held.mkv", half), ready, done))
+        proc.start()
+        try:
+            self.assertTrue(ready.wait(60))
+            held = media_cache.lookup("held", "best", 0, 10, pin=False)
+            time.sleep(0.01)
+            b = media_cache.store("vid", "best", 0, 10, self._file("b.mkv", half), pin=False)
+            self.assertTrue(os.path.exists(held["path"]))
+            self.assertFalse(os.path.exists(b["path"]))
+        finally:
+            done.set()
+            proc.join(60)
+
+        # proses pemegang pin sudah mati → pin-nya dibuang, file boleh di-evict
+        c = media_cache.store("vid", "best", 20, 30, self._file("c.mkv", half), pin=False)
+        self.assertFalse(os.path.exists(held["path"]))
+        self.assertTrue(os.path.exists(c["path"]))
+
+    def test_probe_lookup_does_not_rewrite_index(self):
+        media_cache.store("vid", "best", 0, 100, self._file("a.mkv", 10), pin=False)
+        index_path = os.path.join(self.cache_dir, "index.json")
+        before = os.stat(index_path).st_mtime_ns
+        time.sleep(0.01)
+        self.assertIsNotNone(media_cache.lookup("vid", "best", 10, 20, pin=False))
+        self.assertEqual(os.stat(index_path).st_mtime_ns, before)
+        hit = media_cache.lookup("vid", "best", 10, 20, pin=True)
+        self.assertNotEqual(os.stat(index_path).st_mtime_ns, before)
+        media_cache.release(hit["key"])
+
+
+if __name__ == "__main__":
+    unittest.main()
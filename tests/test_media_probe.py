@@ -0,0 +1,53 @@
+import unittest
+from unittest import mock
+
+from app import media_probe
+from app.render_graph import build_variant_render_graph
+
+
+def _info(vcodec="h264", width=720, height=1280, acodec="aac"):
+    return {
+        "video": {"codec_name": vcodec, "width": width, "height": height, "pix_fmt": "yuv420p", "sample_aspect_ratio": "1:1"},
+        "audio": {"codec_name": acodec},
+        "start_time": 0.0,
+    }
+
+
+class TestNegotiate(unittest.TestCase):
+    def _negotiate(self, info, keyframes, modes, start=10.0, burn_subtitle=False):
+        with mock.patch.object(media_probe, "probe", return_value=info), mock.patch.object(media_probe, "keyframes", return_value=keyframes):
+            return media_probe.negotiate("src.mkv", modes, start, start + 20.0, burn_subtitle=burn_subtitle)
+
+    def test_vertical_h264_aac_is_copied_and_snapped(self):
+        plan = self._negotiate(_info(), [9.0, 9.8, 11.0], ["default", "split_left"])
+        self.assertTrue(plan["copy_audio"])
+        self.assertEqual(plan["copy_video"], ["default"])
+        self.assertAlmostEqual(plan["start"], 9.8)
+
+    def test_no_keyframe_within_tolerance_keeps_encode(self):
+        plan = self._negotiate(_info(), [8.0, 12.0], ["fit"])
+        self.assertEqual(plan["copy_video"], [])
+        self.assertEqual(plan["start"], 10.0)
+        self.assertTrue(plan["copy_audio"])
+
+    def test_landscape_or_subtitle_or_opus_reencodes(self):
+        self.assertEqual(self._negotiate(_info(width=1280, height=720), [10.0], ["default"])["copy_video"], [])
+        self.assertEqual(self._negotiate(_info(), [10.0], ["default"], burn_subtitle=True)["copy_video"], [])
+        self.assertFalse(self._negotiate(_info(acodec="opus"), [10.0], ["default"])["copy_audio"])
+
+    def test_probe_failure_means_encode(self):
+        plan = self._negotiate(None, [], ["default"])
+        self.assertEqual((plan["copy_audio"], plan["copy_video"]), (False, []))
+
+    def test_render_graph_copies_only_negotiated_streams(self):
+        args = build_variant_render_graph(["default", "fit"], ["a.mp4", "b.mp4"], copy_audio=True, copy_video=["default"])
+        a_idx = args.index("a.mp4")
+        self.assertIn("0:v:0", args[: a_idx])
+        self.assertEqual(args[a_idx - 4 : a_idx], ["-c:v", "copy", "-c:a", "copy"])
+        self.assertNotIn("split=", args[1])
+        self.assertEqual(args[-5:], ["-crf", "26", "-c:a", "copy", "b.mp4"])
+        self.assertEqual(build_variant_render_graph(["fit"], ["c.mp4"], copy_video=["fit"])[:4], ["-map", "0:v:0", "-map", "0:a?"])
+
+
+if __name__ == "__main__":
+    unittest.main()
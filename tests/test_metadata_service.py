@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+from app.services import metadata_service
+
+
+class TestMetadataService(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._env = mock.patch.dict(
+            os.environ,
+            {"YTCLIPPER_METADATA_CACHE_PATH": os.path.join(self._tmp.name, "meta.json"), "YTCLIPPER_GEMINI_RPM": "0"},
+        )
+        self._env.start()
+        metadata_service._CACHE = None
+
+    def tearDown(self):
+        self._env.stop()
+        metadata_service._CACHE = None
+        self._tmp.cleanup()
+
+    def test_batches_uncached_and_caches_results(self):
+        calls = []
+
+        def _batch(texts, api_key):
+            calls.append(list(texts))
+            return {n: {"titles": [f"T{t}"], "caption": t, "hashtags": []} for n, t in enumerate(texts, 1)}
+
+        single = mock.Mock(return_value={"titles": ["Td"], "caption": "d", "hashtags": []})
+        with mock.patch.object(metadata_service, "generate_clip_metadata_batch", side_effect=_batch):
+            with mock.patch.object(metadata_service, "generate_clip_metadata", single):
+                out = metadata_service.get_clip_metadata_many(["a", "b", "c"], "KEY")
+                self.assertEqual([m["caption"] for m in out], ["a", "b", "c"])
+                self.assertEqual(calls, [["a", "b", "c"]])
+
+                metadata_service._CACHE = None
+                out = metadata_service.get_clip_metadata_many(["b", " c ", "d"], "KEY")
+        self.assertEqual([m["caption"] for m in out], ["b", "c", "d"])
+        self.assertEqual(len(calls), 1)
+        single.assert_called_once_with("d", "KEY")
+
+    def test_missing_batch_items_fall_back_to_single_calls(self):
+        with mock.patch.object(metadata_service, "generate_clip_metadata_batch", return_value={1: {"titles": ["x"], "caption": "1", "hashtags": []}}):
+            with mock.patch.object(metadata_service, "generate_clip_metadata", return_value={"titles": ["y"], "caption": "single", "hashtags": []}) as single:
+                out = metadata_service.get_clip_metadata_many(["one", "two"], "KEY")
+        self.assertEqual([m["caption"] for m in out], ["1", "single"])
+        single.assert_called_once_with("two", "KEY")
+
+    def test_errors_are_returned_per_clip_and_not_cached(self):
+        with mock.patch.object(metadata_service, "generate_clip_metadata", side_effect=RuntimeError("quota")):
+            out = metadata_service.get_clip_metadata_many(["solo", ""], "KEY")
+        self.assertIsInstance(out[0], RuntimeError)
+        self.assertIsInstance(out[1], ValueError)
+        self.assertEqual(metadata_service.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from app.progress import (
+    YTDLP_PROGRESS_PREFIX,
+    ClipProgress,
+    ffmpeg_progress_fraction,
+    parse_out_time,
+    parse_ytdlp_progress,
+    with_progress_args,
+    ytdlp_progress_hook,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class TestParsers(unittest.TestCase):
+    def test_out_time_keys(self):
+        self.assertAlmostEqual(parse_out_time("out_time_us", "2500000"), 2.5)
+        self.assertAlmostEqual(parse_out_time("out_time_ms", "2500000"), 2.5)
+        self.assertAlmostEqual(parse_out_time("out_time", "00:01:02.500000"), 62.5)
+        self.assertIsNone(parse_out_time("out_time", "N/A"))
+        self.assertIsNone(parse_out_time("frame", "12"))
+
+    def test_ffmpeg_fraction(self):
+        self.assertAlmostEqual(ffmpeg_progress_fraction("out_time_us=3000000\n", 6.0), 0.5)
+        self.assertEqual(ffmpeg_progress_fraction("out_time_us=9000000", 6.0), 1.0)
+        self.assertEqual(ffmpeg_progress_fraction("progress=end", 6.0), 1.0)
+        self.assertIsNone(ffmpeg_progress_fraction("progress=continue", 6.0))
+
+    def test_with_progress_args(self):
+        self.assertEqual(with_progress_args(["ffmpeg", "-i", "a"])[:4], ["ffmpeg", "-progress", "pipe:1", "-nostats"])
+
+    def test_ytdlp(self):
+        self.assertAlmostEqual(parse_ytdlp_progress(f"{YTDLP_PROGRESS_PREFIX}50/NA/200"), 0.25)
+        self.assertIsNone(parse_ytdlp_progress(f"{YTDLP_PROGRESS_PREFIX}50/NA/NA"))
+        self.assertIsNone(parse_ytdlp_progress("[download] 10%"))
+        got = []
+        hook = ytdlp_progress_hook(got.append)
+        hook({"status": "downloading", "downloaded_bytes": 10, "total_bytes_estimate": 40})
+        hook({"status": "finished"})
+        self.assertEqual(got, [0.25, 1.0])
+
+
+class TestClipProgress(unittest.TestCase):
+    def test_percent_and_eta_weighted_by_duration(self):
+        clock = _Clock()
+        published = []
+        p = ClipProgress({1: 10.0, 2: 30.0}, ["download", "clip"], publish=published.append, min_interval_s=1.0, clock=clock)
+        p.update(1, stage="download", force=True)
+        clock.t = 4.0
+        snap = p.update(1, phase="download", fraction=1.0)
+        # 10 dari total 80 detik-media
+        self.assertAlmostEqual(snap["fraction"], 0.125)
+        self.assertAlmostEqual(snap["eta_s"], 28.0)
+        self.assertEqual(snap["clips"][0]["phases"], {"download": 100.0, "clip": 0.0})
+
+        clock.t = 4.5
+        self.assertIsNone(p.update(1, phase="clip", fraction=0.5))
+        self.assertEqual(len(published), 2)
+
+    def test_stage_completes_earlier_phases_and_is_monotonic(self):
+        p = ClipProgress({1: 10.0}, ["download", "subtitle", "clip"], min_interval_s=0.0, clock=_Clock())
+        p.update(1, phase="clip", fraction=0.6)
+        p.update(1, phase="clip", fraction=0.4)
+        snap = p.update(1, stage="clip")
+        self.assertEqual(snap["clips"][0]["phases"], {"download": 100.0, "subtitle": 100.0, "clip": 60.0})
+        snap = p.update(1, stage="clip_done", ok=True)
+        self.assertEqual(snap["clips"][0]["percent"], 100.0)
+        self.assertAlmostEqual(snap["fraction"], 1.0)
+
+    def test_set_durations_drops_skipped_clips(self):
+        p = ClipProgress({1: 10.0, 2: 10.0, 3: 10.0}, ["clip"], min_interval_s=0.0, clock=_Clock())
+        p.set_durations({1: 10.0, 2: 30.0})
+        snap = p.update(2, phase="clip", fraction=1.0)
+        self.assertAlmostEqual(snap["fraction"], 0.75)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+
+from app.render_graph import CROP_MODES, build_render_graph, build_variant_render_graph, normalize_crop_modes, required_source_height
+
+
+class TestRenderGraph(unittest.TestCase):
+    def test_every_crop_mode_maps_single_video_output(self):
+        for mode in CROP_MODES:
+            args = build_render_graph(mode)
+            self.assertEqual(args[0], "-filter_complex")
+            self.assertTrue(args[1].endswith("[vout]"))
+            self.assertEqual(args[2:], ["-map", "[vout]", "-map", "0:a?"])
+
+    def test_subtitle_burn_is_fused_into_crop_graph(self):
+        args = build_render_graph("split_left", subtitle_file="/tmp/x.srt", subtitle_position="bottom")
+        graph = args[1]
+        self.assertIn("vstack=inputs=2[vcrop]", graph)
+        self.assertIn("[vcrop]subtitles='/tmp/x.srt'", graph)
+        self.assertIn("Alignment=2", graph)
+        self.assertEqual(graph.count("subtitles="), 1)
+
+    def test_unknown_crop_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            build_render_graph("zoom")
+
+    def test_required_source_height_per_crop_mode(self):
+        self.assertEqual(required_source_height("default"), 1280)
+        self.assertEqual(required_source_height("split_right"), 1280)
+        self.assertEqual(required_source_height("fit"), 405)
+
+    def test_variants_share_one_decode(self):
+        args = build_variant_render_graph(["split_left", "split_right"], ["a.mp4", "b.mp4"], subtitle_file="/tmp/x.srt")
+        graph = args[1]
+        self.assertTrue(graph.startswith("[0:v]split=2[src0][src1]"))
+        self.assertEqual(graph.count("subtitles="), 2)
+        self.assertIn("[v0scaled]", graph)
+        self.assertIn("[v1scaled]", graph)
+        self.assertEqual(args.count("-map"), 4)
+        self.assertEqual(args[args.index("[vout0]") + 2], "0:a?")
+        self.assertEqual(args[-1], "b.mp4")
+
+    def test_single_variant_matches_plain_render(self):
+        args = build_variant_render_graph(["fit"], ["a.mp4"])
+        self.assertEqual(args[:6], build_render_graph("fit"))
+        self.assertEqual(args[-1], "a.mp4")
+
+    def test_trim_cuts_video_and_audio_in_graph(self):
+        args = build_variant_render_graph(["default", "fit"], ["a.mp4", "b.mp4"], trim=(12, 18.5))
+        graph = args[1]
+        self.assertTrue(graph.startswith("[0:v]trim=start=12.000:end=18.500,setpts=PTS-STARTPTS[vtrim]"))
+        self.assertIn("[0:a]atrim=start=12.000:end=18.500,asetpts=PTS-STARTPTS,asplit=2[a0][a1]", graph)
+        self.assertIn("[vtrim]split=2[src0][src1]", graph)
+        self.assertEqual(args[args.index("[vout1]") + 2], "[a1]")
+
+        silent = build_variant_render_graph(["fit"], ["a.mp4"], trim=(0, 5), has_audio=False)
+        self.assertNotIn("atrim", silent[1])
+        self.assertEqual(silent.count("-map"), 1)
+
+    def test_normalize_crop_modes(self):
+        self.assertEqual(normalize_crop_modes(["fit", "zoom", "fit", "default"]), ["fit", "default"])
+        self.assertEqual(normalize_crop_modes(None, default="split_left"), ["split_left"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import threading
+import unittest
+from unittest import mock
+
+from app import scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self._env = mock.patch.dict(os.environ, {"YTCLIPPER_MAX_RUNNING_JOBS": "1", "YTCLIPPER_JOB_QUEUE_SIZE": "2"})
+        self._env.start()
+        self.updates = []
+        self._store = mock.patch.object(scheduler.job_store, "update", side_effect=lambda jid, f: self.updates.append((jid, dict(f))))
+        self._store.start()
+
+    def tearDown(self):
+        self._store.stop()
+        self._env.stop()
+
+    def test_bounded_queue_positions_and_rejection(self):
+        gates = {j: threading.Event() for j in ("a", "b", "c")}
+        done = threading.Semaphore(0)
+        order = []
+
+        def _job(job_id):
+            order.append(job_id)
+            gates[job_id].wait(5)
+            done.release()
+
+        self.assertEqual(scheduler.submit("a", _job), 0)
+        self.assertEqual(scheduler.submit("b", _job), 1)
+        self.assertEqual(scheduler.submit("c", _job), 2)
+        self.assertEqual(scheduler.queue_position("c"), 2)
+        with self.assertRaises(scheduler.QueueFull):
+            scheduler.submit("d", _job)
+        self.assertIn(("c", {"stage": "queued", "queue_position": 2, "status": "⏳ Antri #2 (1 job lagi jalan)"}), self.updates)
+
+        gates["a"].set()
+        self.assertTrue(done.acquire(timeout=5))
+        gates["b"].set()
+        gates["c"].set()
+        self.assertTrue(done.acquire(timeout=5))
+        self.assertTrue(done.acquire(timeout=5))
+        self.assertEqual(order, ["a", "b", "c"])
+        self.assertIn(("c", {"stage": "queued", "queue_position": 1, "status": "⏳ Antri #1 (1 job lagi jalan)"}), self.updates)
+
+    def test_failing_job_frees_slot(self):
+        ran = threading.Event()
+
+        def _boom(job_id):
+            raise RuntimeError("x")
+
+        scheduler.submit("x1", _boom)
+        scheduler.submit("x2", lambda job_id: ran.set())
+        self.assertTrue(ran.wait(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+
+from app import job_control
+from app.source_plan import SourceSpan, plan_source_spans
+
+
+class TestSourcePlan(unittest.TestCase):
+    def test_merges_overlapping_and_nearby_ranges(self):
+        spans = plan_source_spans([(100, 130), (0, 30), (120, 150), (40, 60)], gap_threshold_s=15, max_span_s=600)
+        self.assertEqual([(s["start"], s["end"]) for s in spans], [(0.0, 60.0), (100.0, 150.0)])
+        self.assertEqual(spans[0]["members"], [1, 3])
+        self.assertEqual(spans[1]["members"], [0, 2])
+
+    def test_gap_above_threshold_stays_separate(self):
+        spans = plan_source_spans([(0, 30), (200, 230)], gap_threshold_s=30)
+        self.assertEqual(len(spans), 2)
+        self.assertTrue(all(len(s["members"]) == 1 for s in spans))
+
+    def test_max_span_limits_merge(self):
+        spans = plan_source_spans([(0, 100), (110, 200), (210, 300)], gap_threshold_s=30, max_span_s=250)
+        self.assertEqual([s["members"] for s in spans], [[0, 1], [2]])
+
+    def test_span_downloads_once_and_cleans_up(self):
+        calls = []
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "span.mp4")
+
+            def _fetch(span):
+                calls.append(span.start)
+                with open(path, "wb") as f:
+                    f.write(b"x")
+                return path
+
+            span = SourceSpan(0, 60, refs=2, fetch=_fetch)
+            self.assertEqual(span.acquire()["path"], path)
+            self.assertEqual(span.acquire()["base"], 0.0)
+            self.assertEqual(len(calls), 1)
+            span.release()
+            self.assertTrue(os.path.exists(path))
+            span.release()
+            self.assertFalse(os.path.exists(path))
+
+    def test_span_release_callback_runs_once(self):
+        released = []
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "cached.mkv")
+            with open(path, "wb") as f:
+                f.write(b"x")
+            span = SourceSpan(10, 60, refs=2, fetch=lambda sp: {"path": path, "base": 5.0, "release": lambda: released.append(1)})
+            self.assertEqual(span.acquire()["base"], 5.0)
+            span.release()
+            span.release()
+            self.assertEqual(released, [1])
+            self.assertTrue(os.path.exists(path))
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg tidak ada")
+    def test_span_path_base_is_measured_from_copy_cut(self):
+        with tempfile.TemporaryDirectory() as d:
+            src = os.path.join(d, "src.mp4")
+            cut = os.path.join(d, "span.mkv")
+            cmd = ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=25", "-t", "30"]
+            subprocess.run(cmd + ["-c:v", "libx264", "-g", "250", "-keyint_min", "250", "-sc_threshold", "0", src], check=True)
+
+            def _fetch(span):
+                cmd = ["ffmpeg", "-v", "error", "-ss", str(span.start), "-to", str(span.end), "-i", src, "-c", "copy", "-copyts", cut]
+                subprocess.run(cmd, check=True)
+                return cut
+
+            # GOP 10 detik: potongan mulai di keyframe 10s, bukan di 15s
+            span = SourceSpan(15, 22, refs=1, fetch=_fetch)
+            self.assertAlmostEqual(span.acquire()["base"], 10.0, delta=0.1)
+            span.release()
+
+    def test_failed_fetch_falls_back(self):
+        def _fetch(span):
+            raise RuntimeError("boom")
+
+        span = SourceSpan(0, 60, refs=1, fetch=_fetch)
+        self.assertIsNone(span.acquire())
+
+    def test_cancelled_fetch_is_not_a_fallback(self):
+        calls = []
+
+        def _fetch(span):
+            calls.append(1)
+            raise job_control.Cancelled("Job dibatalkan.")
+
+        span = SourceSpan(0, 60, refs=2, fetch=_fetch)
+        for _ in range(2):
+            with self.assertRaises(job_control.Cancelled):
+                span.acquire()
+        self.assertEqual(calls, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+
+from app.subtitle_ai import write_srt
+from app.transcript import Transcript
+
+
+def _seg(start, end, words):
+    return {
+        "start": start,
+        "end": end,
+        "text": "".join(w[2] for w in words).strip(),
+        "words": [{"start": s, "end": e, "text": t} for s, e, t in words],
+    }
+
+
+class TestTranscript(unittest.TestCase):
+    def _transcript(self):
+        t = Transcript()
+        t.add_span(
+            100,
+            130,
+            [
+                _seg(0.0, 4.0, [(0.0, 1.0, " halo"), (1.0, 2.0, " semua"), (2.5, 4.0, " apa")]),
+                _seg(10.0, 12.0, [(10.0, 11.0, " kabar"), (11.0, 12.0, " baik")]),
+            ],
+        )
+        return t
+
+    def test_slice_shifts_to_clip_start_and_cuts_words(self):
+        t = self._transcript()
+        out = t.slice(101.2, 112.0)
+        self.assertEqual([s["text"] for s in out], ["semua apa", "kabar baik"])
+        self.assertAlmostEqual(out[0]["start"], 0.0)
+        self.assertAlmostEqual(out[0]["words"][1]["start"], 1.3)
+        self.assertAlmostEqual(out[1]["end"], 10.8)
+        self.assertEqual(t.text(109.0, 111.0), "kabar")
+
+    def test_covers_only_transcribed_spans(self):
+        t = self._transcript()
+        self.assertTrue(t.covers(100, 130))
+        self.assertFalse(t.covers(90, 110))
+
+    def test_write_srt_uses_word_bounds(self):
+        t = self._transcript()
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "x.srt")
+            self.assertEqual(write_srt(t.slice(100, 130), path), 2)
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            self.assertEqual(write_srt([], os.path.join(d, "empty.srt")), 0)
+        self.assertIn("00:00:10,000 --> 00:00:12,000\nkabar baik", content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import threading
+import unittest
+from unittest import mock
+
+
+from app import yt_engine
+
+
+class _FakeYdl:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def extract_info(self, url, download=False, process=False):
+        self.calls.append(url)
+        return {"id": "abc", "duration": 61.6, "formats": []}
+
+
+class TestYtEngine(unittest.TestCase):
+    def setUp(self):
+        yt_engine._INFO_CACHE.clear()
+        yt_engine._POOLS.clear()
+
+    def test_info_extracted_once_across_threads(self):
+        calls = []
+        with mock.patch.object(yt_engine, "_new_ydl", side_effect=lambda **kw: _FakeYdl(calls)):
+            threads = [threading.Thread(target=yt_engine.get_duration_seconds, args=("abc",)) for _ in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(yt_engine.get_duration_seconds("abc"), 62)
+        self.assertEqual(len(calls), 1)
+
+    def test_pool_reuses_instances(self):
+        created = []
+
+        def _make(**kw):
+            created.append(kw)
+            return object()
+
+        pool = yt_engine.YdlPool(2)
+        with mock.patch.object(yt_engine, "_new_ydl", side_effect=_make):
+            for _ in range(5):
+                with pool.borrow():
+                    pass
+            with pool.borrow() as a:
+                with pool.borrow() as b:
+                    self.assertIsNot(a, b)
+        self.assertEqual(len(created), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+
+from app import yt_stream
+
+
+_INFO = {
+    "duration": 120,
+    "requested_formats": [
+        {"format_id": "137", "url": "https://r1.googlevideo.com/v?expire=5000", "vcodec": "avc1", "acodec": "none", "height": 1080},
+        {"format_id": "140", "url": "https://r1.googlevideo.com/a?expire=4000", "vcodec": "none", "acodec": "mp4a"},
+    ],
+}
+
+
+class TestYtStream(unittest.TestCase):
+    def setUp(self):
+        yt_stream._STREAM_CACHE.clear()
+
+    def test_parse_uses_earliest_expiry(self):
+        r = yt_stream.parse_resolved_info(_INFO, now=1000)
+        self.assertEqual(r["video"]["format_id"], "137")
+        self.assertEqual(r["audio"]["format_id"], "140")
+        self.assertEqual(r["expires_at"], 4000.0)
+
+    def test_resolve_cached_until_expiry(self):
+        info = dict(_INFO)
+        with mock.patch.object(yt_stream, "_resolve_subprocess", return_value=info) as m:
+            with mock.patch.object(yt_stream.time, "time", return_value=1000.0):
+                yt_stream.resolve_streams("abc", ["best"])
+                yt_stream.resolve_streams("abc", ["best"])
+            self.assertEqual(m.call_count, 1)
+            with mock.patch.object(yt_stream.time, "time", return_value=3900.0):
+                yt_stream.resolve_streams("abc", ["best"])
+            self.assertEqual(m.call_count, 2)
+
+    def test_input_args_seek_both_inputs(self):
+        r = yt_stream.parse_resolved_info(_INFO, now=0)
+        args, maps = yt_stream.stream_input_args(r, start=10, end=20)
+        self.assertEqual(args.count("-ss"), 2)
+        self.assertEqual(maps, ["-map", "0:v:0", "-map", "1:a:0"])
+
+    def test_capped_candidates_use_smallest_covering_rung(self):
+        with mock.patch.dict("os.environ", {}, clear=False):
+            cands = yt_stream.capped_format_candidates(1280, ["best"])
+        self.assertIn("height<=1440", cands[0])
+        self.assertEqual(cands[-1], "best")
+
+    def test_height_cap_can_be_disabled(self):
+        with mock.patch.dict("os.environ", {"YTCLIPPER_SOURCE_HEIGHT_CAP": "0"}):
+            self.assertEqual(yt_stream.capped_format_candidates(1280, ["best"]), ["best"])
+        with mock.patch.dict("os.environ", {"YTCLIPPER_SOURCE_HEIGHT_CAP": "720"}):
+            self.assertIn("height<=720", yt_stream.capped_format_candidates(1280, ["best"])[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
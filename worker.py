@@ -0,0 +1,44 @@
+import argparse
+import os
+import signal
+import threading
+
+from app.node_worker import default_worker_id, serve
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Worker node: ambil job clip dari broker (database job store bersama) lalu render di mesin ini."
+    )
+    parser.add_argument("--id", default=None, help="Nama worker (default: hostname-pid).")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("YTCLIPPER_MAX_RUNNING_JOBS", "1")))
+    parser.add_argument("--poll", type=float, default=2.0, help="Jeda cek antrian kalau kosong (detik).")
+    parser.add_argument(
+        "--output-dir",
+        default=os.environ.get("YTCLIPPER_SHARED_OUTPUT_DIR") or None,
+        help="Folder output bersama tujuan upload hasil (default: output_dir dari job).",
+    )
+    parser.add_argument("--scratch-dir", default=os.environ.get("YTCLIPPER_WORKER_SCRATCH_DIR") or None, help="Folder kerja lokal.")
+    parser.add_argument("--drain", action="store_true", help="Berhenti begitu antrian kosong.")
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    worker_id = args.id or default_worker_id()
+    print(f"--- 🖥️ Worker {worker_id} (concurrency {args.concurrency}) ---")
+    count = serve(
+        worker_id=worker_id,
+        concurrency=args.concurrency,
+        poll_s=args.poll,
+        output_root=args.output_dir,
+        scratch_dir=args.scratch_dir,
+        stop=stop,
+        drain=args.drain,
+    )
+    print(f"\n✅ Worker berhenti, {count} job dijalankan.")
+
+
+if __name__ == "__main__":
+    main()